@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Batch warnings audit over many models for the Enhanced Warnings Browser
+Takes exported warning snapshots (see snapshot.py) or stand-in documents (JSON dumps of the
+warnings and failing elements, run through the same grouping and element info code as the
+browser) and audits them in a process pool - one worker process per model, recycled after
+every model so memory stays bounded by the largest single model. Only per-model summaries
+travel back to the parent, which writes one consolidated report.
+No clr imports - runs on any machine with Python:
+
+    python batch_audit.py exports/*.jsonl stand_in.doc.json --report audit.csv
+"""
+
+import argparse
+import csv
+import glob
+import heapq
+import io
+import json
+import os
+import sys
+from operator import itemgetter
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+from warnings_data import group_warnings, ElementInfoIndex
+from snapshot import build_snapshot, read_snapshot
+from taxonomy import WarningClassifier, SEVERITIES
+
+STANDIN_SUFFIX = '.doc.json'
+REVIT_SUFFIXES = ('.rvt', '.rfa')
+TOP_MESSAGES = 10
+REPORT_COLUMNS = ['model', 'source', 'created', 'warnings', 'warning_types', 'elements'] + \
+    [SEVERITIES[rank] for rank in sorted(SEVERITIES)] + ['top_message', 'error']
+
+
+class _StandInCategory(object):
+    def __init__(self, name):
+        self.Name = name
+        self.Id = name
+
+
+class _StandInElement(object):
+    """Just enough of a Revit element for warnings_data.read_element_info"""
+
+    def __init__(self, element_id, data, level_ids):
+        self.Id = element_id
+        self.Name = data.get('name')
+        self.Category = _StandInCategory(data['category']) if data.get('category') else None
+        self.LevelId = level_ids.get(data.get('level'), -1)
+        self.FamilyName = data.get('family')
+        self._type_id = -element_id - 1 if data.get('family') else -1
+
+    def GetTypeId(self):
+        return self._type_id
+
+
+class _StandInLevel(object):
+    def __init__(self, name):
+        self.Name = name
+
+
+class _StandInWarning(object):
+    def __init__(self, message, element_ids):
+        self._message = message
+        self._element_ids = element_ids
+
+    def GetDescriptionText(self):
+        return self._message
+
+    def GetFailingElements(self):
+        return self._element_ids
+
+
+# Synthetic ids: element types are -(id + 1), levels below this base
+_LEVEL_ID_BASE = -(10 ** 12)
+
+
+class StandInDocument(object):
+    """Document stand-in built from a JSON dump
+
+    {"title": ..., "path": ...,
+     "warnings": [{"message": ..., "element_ids": [...]}, ...],
+     "elements": {"<id>": {"name": ..., "category": ..., "level": ..., "family": ...}}}
+    Element ids are plain ints; levels and element types get synthetic negative ids.
+    """
+
+    def __init__(self, data):
+        self.Title = data.get('title')
+        self.PathName = data.get('path')
+        self._warnings = [_StandInWarning(w['message'], [int(v) for v in w.get('element_ids', [])])
+                          for w in data.get('warnings', [])]
+        level_names = sorted(set(e.get('level') for e in data.get('elements', {}).values() if e.get('level')))
+        level_ids = dict((name, _LEVEL_ID_BASE - index) for index, name in enumerate(level_names))
+        self._elements = {}
+        for key, element_data in data.get('elements', {}).items():
+            element = _StandInElement(int(key), element_data, level_ids)
+            self._elements[element.Id] = element
+            if element.FamilyName:
+                self._elements[element.GetTypeId()] = element  # Type lookup only reads FamilyName
+        for name, level_id in level_ids.items():
+            self._elements[level_id] = _StandInLevel(name)
+
+    @classmethod
+    def load(cls, file_path):
+        with io.open(file_path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def GetWarnings(self):
+        return self._warnings
+
+    def GetElement(self, element_id):
+        return self._elements.get(element_id)
+
+
+def load_model(file_path):
+    """Snapshot dict for an exported snapshot or a stand-in document"""
+    if file_path.lower().endswith(STANDIN_SUFFIX):
+        doc = StandInDocument.load(file_path)
+        warning_groups, unique_ids = group_warnings(doc.GetWarnings())
+        element_index = ElementInfoIndex(doc)
+        element_index.build(unique_ids.values())
+        return build_snapshot(warning_groups, element_index, model=doc.Title, path=doc.PathName or file_path)
+    return read_snapshot(file_path)
+
+
+def audit_snapshot(snapshot, classifier=None):
+    """Per-model totals of one snapshot"""
+    classifier = classifier or WarningClassifier()
+    records = snapshot['records']
+    per_message = {}
+    elements = set()
+    for record in records:
+        per_message[record['message']] = per_message.get(record['message'], 0) + 1
+        elements.update(record['element_ids'])
+
+    by_severity = dict((label, 0) for label in SEVERITIES.values())
+    for message, count in per_message.items():
+        by_severity[classifier.classify(message).severity_label] += count
+
+    return {
+        'model': snapshot.get('model'),
+        'created': snapshot.get('created'),
+        'warnings': len(records),
+        'warning_types': len(per_message),
+        'elements': len(elements),
+        'by_severity': by_severity,
+        'top_messages': heapq.nlargest(TOP_MESSAGES, per_message.items(), key=itemgetter(1))
+    }
+
+
+def audit_file(file_path):
+    """Worker entry point - never raises, errors are part of the result"""
+    try:
+        if file_path.lower().endswith(REVIT_SUFFIXES):
+            raise ValueError("Revit-Dateien zuerst mit BIMKRAFT_WARNINGS_SNAPSHOT_DIR exportieren")
+        summary = audit_snapshot(load_model(file_path))
+        summary['model'] = summary['model'] or os.path.splitext(os.path.basename(file_path))[0]
+        summary['error'] = None
+    except Exception as ex:
+        summary = {'model': os.path.basename(file_path), 'error': str(ex)}
+    summary['source'] = file_path
+    return summary
+
+
+def run_audit(paths, workers=None):
+    """Summaries of all models in input order
+
+    One worker process per model (maxtasksperchild=1) so the memory of a model is released
+    as soon as it is done; at most `workers` models are in memory at a time. Falls back to
+    sequential processing where multiprocessing is not available (IronPython).
+    """
+    paths = list(paths)
+    workers = workers or (multiprocessing.cpu_count() if multiprocessing else 1)
+    workers = max(1, min(workers, len(paths)))
+    if multiprocessing is None or workers == 1:
+        return [audit_file(file_path) for file_path in paths]
+
+    pool = multiprocessing.Pool(processes=workers, maxtasksperchild=1)
+    try:
+        summaries = pool.map(audit_file, paths, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    return summaries
+
+
+def report_rows(summaries):
+    rows = []
+    for summary in summaries:
+        by_severity = summary.get('by_severity', {})
+        top = summary.get('top_messages') or []
+        rows.append([
+            summary.get('model'),
+            summary.get('source'),
+            summary.get('created'),
+            summary.get('warnings', ''),
+            summary.get('warning_types', ''),
+            summary.get('elements', '')
+        ] + [by_severity.get(SEVERITIES[rank], '') for rank in sorted(SEVERITIES)] + [
+            u"{} ({})".format(top[0][0], top[0][1]) if top else '',
+            summary.get('error') or ''
+        ])
+    return rows
+
+
+def write_report(summaries, file_path):
+    """Consolidated report - CSV (one row per model plus a total row) or full JSON"""
+    if file_path.lower().endswith('.json'):
+        text = json.dumps({'models': summaries}, ensure_ascii=False, indent=1)
+        if not isinstance(text, type(u"")):
+            text = text.decode('utf-8')
+        with io.open(file_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return file_path
+
+    ok = [summary for summary in summaries if not summary.get('error')]
+    with io.open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_COLUMNS)
+        for row in report_rows(summaries):
+            writer.writerow(row)
+        writer.writerow(['TOTAL', len(summaries), '',
+                         sum(s['warnings'] for s in ok), '', sum(s['elements'] for s in ok)] +
+                        [sum(s['by_severity'][SEVERITIES[rank]] for s in ok) for rank in sorted(SEVERITIES)] +
+                        ['', len(summaries) - len(ok)])
+    return file_path
+
+
+def format_summary(summaries):
+    lines = []
+    for summary in summaries:
+        if summary.get('error'):
+            lines.append(u"{:<40} FEHLER: {}".format(summary['model'], summary['error']))
+        else:
+            lines.append(u"{:<40} {:>7} Warnungen  {:>5} Typen  {:>7} Elemente".format(
+                summary['model'], summary['warnings'], summary['warning_types'], summary['elements']))
+    lines.append(u"{} Modelle, {} Warnungen gesamt".format(
+        len(summaries), sum(s.get('warnings', 0) for s in summaries)))
+    return u"\n".join(lines)
+
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit the warnings of many models in parallel")
+    parser.add_argument('inputs', nargs='+', help="snapshot files (jsonl, csv, columnar) or *.doc.json stand-ins")
+    parser.add_argument('--report', default='warnings_audit.csv', help="consolidated report (.csv or .json)")
+    parser.add_argument('--workers', type=int, default=None, help="parallel worker processes")
+    parser.add_argument('--max-warnings', type=int, default=None,
+                        help="exit with status 1 if any model has more warnings")
+    args = parser.parse_args(argv)
+
+    summaries = run_audit(expand_paths(args.inputs), workers=args.workers)
+    write_report(summaries, args.report)
+    print(format_summary(summaries))
+    print("Report: {}".format(args.report))
+
+    failed = any(summary.get('error') for summary in summaries)
+    if args.max_warnings is not None:
+        failed = failed or any(summary.get('warnings', 0) > args.max_warnings for summary in summaries)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
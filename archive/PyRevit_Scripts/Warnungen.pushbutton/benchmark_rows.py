@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Memory benchmark for the warnings grid rows
+Builds the same synthetic model twice - once with the former eager rows (every display
+string formatted up front, one string copy per element as Revit hands them out) and once
+with warning_rows.WarningRow over an interned element info table - and reports the memory
+per row measured with tracemalloc (CPython only):
+
+    python benchmark_rows.py --rows 50000 --elements-per-row 2
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from warnings_data import StringTable, INTERNED_FIELDS
+from warning_rows import WarningRow
+
+CATEGORIES = [u"Wände", u"Türen", u"Fenster", u"Geschossdecken", u"Rohre", u"Luftkanäle", u"Stützen"]
+
+
+class _ElementId(object):
+    """Stand-in for Autodesk.Revit.DB.ElementId - the former rows kept these per element"""
+    __slots__ = ('IntegerValue',)
+
+    def __init__(self, value):
+        self.IntegerValue = value
+
+
+class EagerRow(object):
+    """The former WarningItem: all columns formatted when the row is built"""
+
+    def __init__(self, message, element_ids, element_info, occurrence_count=1, is_group=True, parent_item=None):
+        self.Message = message
+        self.ElementCount = len(element_ids)
+        self.OccurrenceCount = occurrence_count if is_group else ""
+        self.ElementIds = "; ".join([str(eid.IntegerValue) for eid in element_ids])
+        self.ElementNames = "; ".join([info['name'] for info in element_info])
+        self.Levels = "; ".join(list(set([info['level'] for info in element_info])))
+        self.Views = "; ".join(list(set([view for info in element_info for view in info['views']])))
+        self.Categories = "; ".join(list(set([info['category'] for info in element_info])))
+        self._element_ids = element_ids
+        self.IsGroup = is_group
+        self.IsExpanded = False
+        self.Parent = parent_item
+        self.ExpandSymbol = "[+]" if is_group and occurrence_count > 1 else ""
+        self._occurrence_total = occurrence_count if is_group else 1
+        self._children = None
+        self._child_factory = None
+        self.WarningType = ""
+        self.Severity = ""
+        self.SeverityRank = 99
+        self.SuggestedFix = ""
+
+
+def _fresh(text):
+    """A new string object, like every Revit API property read"""
+    return u"".join(list(text))
+
+
+def synthetic_info(key):
+    category = CATEGORIES[key % len(CATEGORIES)]
+    return {
+        'name': _fresh(u"{} Typ {}".format(category, key % 40)),
+        'level': _fresh(u"Ebene {}".format(key % 12)),
+        'level_id': 1000 + key % 12,
+        'category': _fresh(category),
+        'family': _fresh(u"Familie {}".format(key % 60)),
+        'views': [_fresh(u"Grundriss Ebene {}".format(key % 12)), _fresh(u"3D")]
+    }
+
+
+def row_ids(rows, per_row):
+    return [list(range(index * per_row, (index + 1) * per_row)) for index in range(rows)]
+
+
+def build_infos(ids_per_row, strings=None):
+    """int id -> info dict; with a StringTable the repeated names are interned like
+    warnings_data.ElementInfoIndex does"""
+    infos = {}
+    for values in ids_per_row:
+        for value in values:
+            if value in infos:
+                continue
+            info = synthetic_info(value)
+            if strings is not None:
+                for field in INTERNED_FIELDS:
+                    info[field] = strings.intern(info[field])
+                info['views'] = [strings.intern(view) for view in info['views']]
+            infos[value] = info
+    return infos
+
+
+def build_eager_rows(ids_per_row, infos):
+    return [EagerRow(u"Warnung {}".format(index % 300),
+                     [_ElementId(value) for value in values],
+                     [infos[value] for value in values])
+            for index, values in enumerate(ids_per_row)]
+
+
+def build_compact_rows(ids_per_row, infos):
+    info_for = infos.get
+    return [WarningRow(u"Warnung {}".format(index % 300), values, info_for)
+            for index, values in enumerate(ids_per_row)]
+
+
+def allocated(build, *args):
+    """(result, bytes still allocated by build)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(*args)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def measure(ids_per_row, compact):
+    """(bytes of the element info, bytes of the rows, seconds to format every cell once)"""
+    infos, info_bytes = allocated(build_infos, ids_per_row, StringTable() if compact else None)
+    rows, row_bytes = allocated(build_compact_rows if compact else build_eager_rows, ids_per_row, infos)
+    started = time.time()
+    for row in rows:
+        (row.ElementIds, row.ElementNames, row.Levels, row.Views, row.Categories)
+    return info_bytes, row_bytes, time.time() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory per warnings grid row, before and after")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--elements-per-row', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    ids_per_row = row_ids(args.rows, args.elements_per_row)
+    print("{} Zeilen, {} Elemente pro Zeile".format(args.rows, args.elements_per_row))
+    print(u"{:<8} {:>12} {:>18} {:>14}".format("", "Bytes/Zeile", "inkl. Elementinfo", "Alle Zellen ms"))
+    per_row = {}
+    for label, compact in (("vorher", False), ("nachher", True)):
+        info_bytes, row_bytes, format_seconds = measure(ids_per_row, compact)
+        per_row[label] = row_bytes / float(args.rows)
+        print(u"{:<8} {:>12.0f} {:>18.0f} {:>14.0f}".format(
+            label, per_row[label], (info_bytes + row_bytes) / float(args.rows), format_seconds * 1000.0))
+    print("Zeilen {:.1f}x kleiner".format(per_row["vorher"] / max(per_row["nachher"], 1.0)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
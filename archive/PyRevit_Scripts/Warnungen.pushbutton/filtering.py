@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Search and column filters for the Enhanced Warnings Browser
+Rows are indexed once: an inverted token index over the text columns and one bitset per
+value of the filter columns. Bitsets are plain Python ints (bit i = row i), so a query is a
+handful of AND / OR operations regardless of the number of rows.
+No clr imports - rows are read with getattr.
+"""
+
+import binascii
+import re
+from bisect import bisect_left
+
+SEARCH_COLUMNS = ('Message', 'Variables', 'ElementNames', 'Levels', 'Categories')
+FACET_COLUMNS = ('Severity', 'Levels', 'Categories')
+
+# Separator of multi-valued cells (see WarningItem)
+VALUE_SEPARATOR = u"; "
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    """Lower-case word tokens of a cell or query text"""
+    return _TOKEN.findall((text or u"").lower())
+
+
+def split_values(text):
+    return [value for value in (text or u"").split(VALUE_SEPARATOR) if value]
+
+
+def bits_from_indexes(indexes):
+    """Bitset with the given row indexes set - built in one pass, not one big-int OR per row"""
+    if len(indexes) < 32:
+        bits = 0
+        for index in indexes:
+            bits |= 1 << index
+        return bits
+    flags = bytearray((max(indexes) >> 3) + 1)
+    for index in indexes:
+        flags[index >> 3] |= 1 << (index & 7)
+    flags.reverse()  # Most significant byte first for the hex conversion
+    return int(binascii.hexlify(flags), 16)
+
+
+def members(bits):
+    """Set of row indexes whose bit is set"""
+    result = set()
+    digits = bin(bits)[:1:-1]  # Least significant bit first
+    index = digits.find('1')
+    while index >= 0:
+        result.add(index)
+        index = digits.find('1', index + 1)
+    return result
+
+
+class FilterIndex(object):
+    """Inverted token index plus per-column value bitsets over a fixed list of rows"""
+
+    def __init__(self, rows, search_columns=SEARCH_COLUMNS, facet_columns=FACET_COLUMNS):
+        self.count = len(rows)
+        self.all_bits = (1 << self.count) - 1
+        self.facet_columns = tuple(facet_columns)
+        self._prefix_cache = {}
+
+        # Collect row lists first, convert each to a bitset once at the end
+        postings = {}
+        facets = dict((column, {}) for column in self.facet_columns)
+        for index, row in enumerate(rows):
+            tokens = set()
+            for column in search_columns:
+                tokens.update(tokenize(getattr(row, column, u"")))
+            for token in tokens:
+                postings.setdefault(token, []).append(index)
+            for column in self.facet_columns:
+                values = facets[column]
+                for value in set(split_values(u"{}".format(getattr(row, column, u"") or u""))):
+                    values.setdefault(value, []).append(index)
+
+        self._postings = dict((token, bits_from_indexes(indexes)) for token, indexes in postings.items())
+        self._facets = dict((column, dict((value, bits_from_indexes(indexes)) for value, indexes in values.items()))
+                            for column, values in facets.items())
+        self._tokens = sorted(self._postings)
+
+    def __len__(self):
+        return self.count
+
+    def token_bits(self, token):
+        """Rows containing a token that starts with `token` - typing narrows as you go"""
+        bits = self._prefix_cache.get(token)
+        if bits is None:
+            bits = 0
+            tokens = self._tokens
+            position = bisect_left(tokens, token)
+            while position < len(tokens) and tokens[position].startswith(token):
+                bits |= self._postings[tokens[position]]
+                position += 1
+            self._prefix_cache[token] = bits
+        return bits
+
+    def search_bits(self, text):
+        """Rows matching every token of a search text (all rows for an empty text)"""
+        bits = self.all_bits
+        for token in tokenize(text):
+            bits &= self.token_bits(token)
+            if not bits:
+                break
+        return bits
+
+    def facet_values(self, column):
+        return sorted(self._facets.get(column, {}))
+
+    def facet_bits(self, column, values):
+        """Rows having any of the given values in a filter column"""
+        column_values = self._facets.get(column, {})
+        bits = 0
+        for value in values:
+            bits |= column_values.get(value, 0)
+        return bits
+
+    def query(self, text=None, filters=None):
+        """Bitset of rows matching the search text and every column filter
+
+        filters maps column -> selected value or list of values; empty selections are ignored.
+        """
+        bits = self.search_bits(text) if text else self.all_bits
+        for column, values in (filters or {}).items():
+            if not bits:
+                break
+            if not values:
+                continue
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            bits &= self.facet_bits(column, values)
+        return bits
+
+    def matches(self, text=None, filters=None):
+        """Set of matching row indexes"""
+        return members(self.query(text, filters))
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+Highlight state for the Enhanced Warnings Browser
+Tracks highlighted and saved elements in hash maps keyed by integer element id and applies
+each selection change as one add/remove set difference inside a single transaction.
+Two engines: HighlightManager overrides every element, FilterHighlightManager puts the
+elements into one selection filter per view with a single filter override - a constant
+number of API calls per change, falling back to per-element overrides where a view takes
+no filters. Every temporary override is recorded in an OverrideLedger (view id, element id)
+and clear_ledger removes them in all views at once.
+"""
+
+from Autodesk.Revit.DB import (
+    Transaction, SubTransaction, TransactionGroup, TransactionStatus, OverrideGraphicSettings,
+    ElementId, FilteredElementCollector, SelectionFilterElement
+)
+from System.Collections.Generic import List
+
+from warnings_data import element_id_value
+from tracing import TRACER
+
+
+class HighlightManager(object):
+    """Per-element override highlighting in one view"""
+
+    # Targets should leave out elements hidden in the view - an override on them is wasted
+    checks_visibility = True
+
+    def __init__(self, doc, override, logger=None, ledger=None):
+        self.doc = doc
+        self.override = override
+        self.logger = logger
+        self.ledger = ledger  # OverrideLedger of the temporary overrides in all views
+        self.highlighted = {}  # int id -> ElementId, currently overridden in the current view
+        self.saved = {}  # int view id -> {int id -> ElementId}, kept when "Highlight speichern" is enabled
+        self._view_key = None  # View the highlighted elements belong to
+
+    def saved_ids(self):
+        """Saved highlights of all views"""
+        ids = {}
+        for saved in self.saved.values():
+            ids.update(saved)
+        return list(ids.values())
+
+    def _view_saved(self):
+        """Saved highlights of the current view (int id -> ElementId)"""
+        return self.saved.get(self._view_key, {})
+
+    def _debug(self, message):
+        if self.logger:
+            self.logger.debug(message)
+
+    def plan(self, target):
+        """Set difference between the current state and a target (int id -> ElementId)
+
+        Returns (to_add, to_remove): only elements whose override actually changes.
+        Saved highlights are never removed.
+        """
+        saved = self._view_saved()
+        to_add = [elem_id for key, elem_id in target.items() if key not in self.highlighted]
+        to_remove = [elem_id for key, elem_id in self.highlighted.items()
+                     if key not in target and key not in saved]
+        return to_add, to_remove
+
+    def apply(self, view, target, save=False, transaction_name="Highlight Warning Elements"):
+        """Make `target` the temporary highlight set of `view` in one transaction
+
+        Returns (added, removed) counts. Raises if the transaction could not be started.
+        """
+        self._switch_view(view)
+        to_add, to_remove = self.plan(target)
+
+        if to_add or to_remove:
+            self._run(view, to_add, to_remove, transaction_name)
+            self._record(view, to_add, to_remove)
+        if save and self.ledger is not None:
+            # Saved highlights are meant to outlive the session
+            self.ledger.discard(element_id_value(view.Id), target.keys())
+
+        saved = self._view_saved()
+        highlighted = dict((key, elem_id) for key, elem_id in self.highlighted.items() if key in saved)
+        highlighted.update(target)
+        self.highlighted = highlighted
+        if save:
+            self.saved.setdefault(self._view_key, {}).update(target)
+
+        self._debug("Highlight update: +{} -{} ({} highlighted, {} saved in view)".format(
+            len(to_add), len(to_remove), len(self.highlighted), len(self._view_saved())))
+        return len(to_add), len(to_remove)
+
+    def clear(self, view):
+        """Remove temporary highlights, keep saved ones"""
+        return self.apply(view, {}, transaction_name="Clear Highlights")[1]
+
+    def clear_all(self, view):
+        """Remove every highlight of the view including saved ones"""
+        self._switch_view(view)
+        to_remove = list(self.highlighted.values())
+        to_remove.extend(elem_id for key, elem_id in self._view_saved().items() if key not in self.highlighted)
+        if to_remove:
+            self._run(view, [], to_remove, "Clear All Highlights")
+            self._record(view, [], to_remove)
+        self.highlighted = {}
+        self.saved.pop(self._view_key, None)
+        return len(to_remove)
+
+    def forget(self):
+        """Drop tracking of temporary highlights without touching the model"""
+        saved = self._view_saved()
+        self.highlighted = dict((key, elem_id) for key, elem_id in self.highlighted.items() if key in saved)
+
+    def release(self, keep_views=()):
+        """Remove the temporary overrides recorded in the ledger from every view except
+        keep_views (int view ids) - see clear_ledger. Returns the number of views cleaned."""
+        if self.ledger is None:
+            return 0
+        self.ledger.drop_views(keep_views)
+        cleaned = clear_ledger(self.doc, self.ledger, self.logger)
+        self.highlighted = {}
+        self._view_key = None
+        return cleaned
+
+    def _switch_view(self, view):
+        """Temporary highlights stay behind in the previous view (the ledger has them) -
+        the set difference of the new view starts from its saved highlights"""
+        view_key = element_id_value(view.Id)
+        if view_key != self._view_key:
+            self.highlighted = dict(self.saved.get(view_key, {}))
+        self._view_key = view_key
+
+    def _record(self, view, to_add, to_remove):
+        if self.ledger is None:
+            return
+        view_key = element_id_value(view.Id)
+        if to_remove:
+            self.ledger.discard(view_key, [element_id_value(elem_id) for elem_id in to_remove])
+        if to_add:
+            self.ledger.record(view_key, [element_id_value(elem_id) for elem_id in to_add],
+                               self._ledger_filter(view))
+
+    def _ledger_filter(self, view):
+        """Name of the selection filter holding the view's highlights, None for element overrides"""
+        return None
+
+    def _touch(self, *element_ids):
+        """Tell the ledger which views and filters the browser changes (see OverrideLedger.touched)"""
+        if self.ledger is not None:
+            self.ledger.touch([element_id_value(elem_id) for elem_id in element_ids])
+
+    def mark(self, view, element_ids):
+        """Highlight elements in a view the browser does not track (new 3D views) - runs
+        inside the caller's transaction"""
+        self._set_overrides(view, element_ids, [])
+
+    @TRACER.traced("Highlight transaction")
+    def _run(self, view, to_add, to_remove, transaction_name):
+        t = Transaction(self.doc, transaction_name)
+        if t.Start() != TransactionStatus.Started:
+            raise Exception("Konnte Transaktion nicht starten")
+        try:
+            self._set_overrides(view, to_add, to_remove)
+            t.Commit()
+        except:
+            if t.HasStarted() and not t.HasEnded():
+                t.RollBack()
+            raise
+
+    def _set_overrides(self, view, to_add, to_remove):
+        self._touch(view.Id)
+        reset = OverrideGraphicSettings()
+        for elem_id in to_remove:
+            try:
+                with TRACER.api("SetElementOverrides"):
+                    view.SetElementOverrides(elem_id, reset)
+            except:
+                pass
+        for elem_id in to_add:
+            try:
+                with TRACER.api("SetElementOverrides"):
+                    view.SetElementOverrides(elem_id, self.override)
+            except Exception as ex:
+                if self.logger:
+                    self.logger.error("Error highlighting element {}: {}".format(
+                        element_id_value(elem_id), str(ex)))
+
+
+# Selection filters created by the filter engine are named "<prefix> <view id>"
+FILTER_PREFIX = u"BIMKraft Warnungen"
+
+
+class FilterHighlightManager(HighlightManager):
+    """Highlighting through one SelectionFilterElement per view
+
+    The filter holds every highlighted and saved element of the view; a change rewrites its
+    members with one SetElementIds call and the override is set once on the filter, so
+    applying or clearing costs the same whatever the number of elements. An empty
+    highlight removes the filter from the view and deletes it. Views that take no filters
+    or reject the filter (templates controlling filters, Revit before 2019) fall back to
+    per-element overrides for the rest of the session.
+    """
+
+    # Hidden members of the filter draw nothing, so targets need no IsHidden check
+    checks_visibility = False
+
+    def __init__(self, doc, override, logger=None, ledger=None):
+        HighlightManager.__init__(self, doc, override, logger, ledger)
+        self._filters = None  # name -> SelectionFilterElement, read on first use
+        self._element_views = set()  # int view ids using per-element overrides
+
+    def filter_name(self, view):
+        return u"{} {}".format(FILTER_PREFIX, element_id_value(view.Id))
+
+    def _ledger_filter(self, view):
+        return self.filter_name(view) if self._uses_filter(view) else None
+
+    def release(self, keep_views=()):
+        cleaned = HighlightManager.release(self, keep_views)
+        self._filters = None  # Filters may have been deleted
+        return cleaned
+
+    def _uses_filter(self, view):
+        if element_id_value(view.Id) in self._element_views:
+            return False
+        try:
+            return view.AreGraphicsOverridesAllowed()
+        except Exception:
+            return False
+
+    def _existing_filters(self):
+        if self._filters is None:
+            with TRACER.api("SelectionFilterElement collector"):
+                self._filters = dict((selection_filter.Name, selection_filter) for selection_filter in
+                                     FilteredElementCollector(self.doc).OfClass(SelectionFilterElement))
+        return self._filters
+
+    def _members(self, to_add, to_remove):
+        """Filter members after the change: current and saved highlights of the view plus
+        to_add minus to_remove"""
+        members = dict(self.highlighted)
+        members.update(self._view_saved())
+        for elem_id in to_remove:
+            members.pop(element_id_value(elem_id), None)
+        for elem_id in to_add:
+            members[element_id_value(elem_id)] = elem_id
+        return list(members.values())
+
+    def mark(self, view, element_ids):
+        element_ids = list(element_ids)
+        if self._uses_filter(view):
+            st = SubTransaction(self.doc)
+            st.Start()
+            try:
+                self._set_filter(view, element_ids)
+                st.Commit()
+                return
+            except Exception as ex:
+                st.RollBack()
+                self._filters = None
+                if self.logger:
+                    self.logger.debug("Selection filter highlight failed, using element overrides: {}".format(str(ex)))
+                self._element_views.add(element_id_value(view.Id))
+        HighlightManager.mark(self, view, element_ids)
+
+    @TRACER.traced("Highlight transaction")
+    def _run(self, view, to_add, to_remove, transaction_name):
+        if not self._uses_filter(view):
+            return HighlightManager._run(self, view, to_add, to_remove, transaction_name)
+
+        t = Transaction(self.doc, transaction_name)
+        if t.Start() != TransactionStatus.Started:
+            raise Exception("Konnte Transaktion nicht starten")
+        try:
+            self._set_filter(view, self._members(to_add, to_remove))
+            t.Commit()
+        except Exception as ex:
+            if t.HasStarted() and not t.HasEnded():
+                t.RollBack()
+            self._filters = None  # Rolled back - re-read on next use
+            if self.logger:
+                self.logger.debug("Selection filter highlight failed, using element overrides: {}".format(str(ex)))
+            self._element_views.add(element_id_value(view.Id))
+            return HighlightManager._run(self, view, to_add, to_remove, transaction_name)
+
+    def _set_filter(self, view, element_ids):
+        """Make element_ids the highlighted set of the view - a constant number of API calls"""
+        filters = self._existing_filters()
+        name = self.filter_name(view)
+        selection_filter = filters.get(name)
+
+        if not element_ids:
+            if selection_filter is not None:
+                self._touch(view.Id, selection_filter.Id)
+                with TRACER.api("RemoveFilter"):
+                    if view.IsFilterApplied(selection_filter.Id):
+                        view.RemoveFilter(selection_filter.Id)
+                    self.doc.Delete(selection_filter.Id)
+                del filters[name]
+            return
+
+        id_list = List[ElementId](element_ids)
+        if selection_filter is None:
+            with TRACER.api("SelectionFilterElement.Create"):
+                selection_filter = SelectionFilterElement.Create(self.doc, name)
+            filters[name] = selection_filter
+        self._touch(view.Id, selection_filter.Id)
+        with TRACER.api("SelectionFilterElement.SetElementIds"):
+            selection_filter.SetElementIds(id_list)
+        with TRACER.api("SetFilterOverrides"):
+            if not view.IsFilterApplied(selection_filter.Id):
+                view.AddFilter(selection_filter.Id)
+            view.SetFilterOverrides(selection_filter.Id, self.override)
+            view.SetFilterVisibility(selection_filter.Id, True)
+
+
+def clear_ledger(doc, ledger, logger=None):
+    """Remove every override recorded in the ledger - one transaction per view, all of them
+    in one transaction group so the cleanup is a single undo step
+
+    Element overrides are reset per element; a highlight filter only loses the recorded
+    elements (saved highlights stay in it) and is deleted once it is empty. Views that no
+    longer exist are dropped. Returns the number of views cleaned.
+    """
+    view_keys = ledger.views()
+    if not view_keys:
+        return 0
+    filters = None
+    done = []
+    group = TransactionGroup(doc, "Clear Warning Highlights")
+    group.Start()
+    try:
+        reset = OverrideGraphicSettings()
+        for view_key in view_keys:
+            view = doc.GetElement(ElementId(view_key))
+            if view is None:
+                done.append(view_key)  # View deleted - nothing left to clear
+                continue
+            filter_name = ledger.filter_name(view_key)
+            if filter_name and filters is None:
+                with TRACER.api("SelectionFilterElement collector"):
+                    filters = dict((selection_filter.Name, selection_filter) for selection_filter in
+                                   FilteredElementCollector(doc).OfClass(SelectionFilterElement))
+
+            selection_filter = filters.get(filter_name) if filter_name else None
+            ledger.touch([view_key] if selection_filter is None
+                         else [view_key, element_id_value(selection_filter.Id)])
+            t = Transaction(doc, "Clear Highlights")
+            t.Start()
+            try:
+                _clear_view(doc, view, ledger.elements(view_key), selection_filter, reset)
+                t.Commit()
+                done.append(view_key)
+            except Exception as ex:
+                if t.HasStarted() and not t.HasEnded():
+                    t.RollBack()
+                if logger:
+                    logger.error("Error clearing highlights in view {}: {}".format(view_key, str(ex)))
+        group.Assimilate()
+    except:
+        if group.HasStarted() and not group.HasEnded():
+            group.RollBack()
+        raise
+    ledger.drop_views(done)
+    return len(done)
+
+
+def _clear_view(doc, view, element_keys, selection_filter, reset):
+    """One view's share of clear_ledger, inside its transaction"""
+    in_filter = set()
+    if selection_filter is not None:
+        members = list(selection_filter.GetElementIds())
+        recorded = set(element_keys)
+        remaining = [elem_id for elem_id in members if element_id_value(elem_id) not in recorded]
+        in_filter = set(element_id_value(elem_id) for elem_id in members)
+        if remaining:
+            with TRACER.api("SelectionFilterElement.SetElementIds"):
+                selection_filter.SetElementIds(List[ElementId](remaining))
+        else:
+            with TRACER.api("RemoveFilter"):
+                if view.IsFilterApplied(selection_filter.Id):
+                    view.RemoveFilter(selection_filter.Id)
+                doc.Delete(selection_filter.Id)
+
+    # Elements overridden one by one (per-element engine or after a filter fallback)
+    for key in element_keys:
+        if key in in_filter:
+            continue
+        try:
+            with TRACER.api("SetElementOverrides"):
+                view.SetElementOverrides(ElementId(key), reset)
+        except:
+            pass
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Warnings history for the Enhanced Warnings Browser
+Appends one compact snapshot per run to an SQLite database shared by all models. Models are
+keyed by file path (the title is only a label - projects may share a name). Message and
+category names are interned; a warning (message + sorted element ids) is stored
+once per model with the snapshot it first appeared in, and its presence is kept as spans of
+consecutive snapshots instead of one row per warning and run. Per snapshot only the counts
+per category and message are stored.
+No clr imports. sqlite3 is optional (missing in some IronPython builds) - check AVAILABLE.
+"""
+
+import argparse
+import os
+import sys
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from snapshot import read_snapshot
+
+AVAILABLE = sqlite3 is not None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL REFERENCES models(id),
+    created TEXT NOT NULL,
+    total INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_model_created ON snapshots(model_id, created);
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY,
+    model_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    element_key TEXT NOT NULL,
+    first_snapshot INTEGER NOT NULL,
+    UNIQUE (model_id, message_id, element_key)
+);
+CREATE TABLE IF NOT EXISTS warning_elements (
+    warning_id INTEGER NOT NULL,
+    element_id INTEGER NOT NULL,
+    PRIMARY KEY (element_id, warning_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS warning_spans (
+    warning_id INTEGER NOT NULL,
+    first_snapshot INTEGER NOT NULL,
+    last_snapshot INTEGER NOT NULL,
+    PRIMARY KEY (warning_id, first_snapshot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS warning_spans_last ON warning_spans(last_snapshot, warning_id);
+CREATE TABLE IF NOT EXISTS snapshot_counts (
+    snapshot_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, category_id, message_id)
+) WITHOUT ROWID;
+"""
+
+
+def default_history_path():
+    root = os.environ.get('APPDATA') or os.path.expanduser('~')
+    return os.path.join(root, 'BIMKraft', 'warnings_history.sqlite')
+
+
+def element_key(element_ids):
+    """Identity of a warning's element set - sorted integer ids"""
+    return u",".join(str(value) for value in sorted(set(element_ids)))
+
+
+class HistoryStore(object):
+    """SQLite warnings history, one database for all models"""
+
+    def __init__(self, path=None):
+        if sqlite3 is None:
+            raise RuntimeError("sqlite3 is not available in this Python engine")
+        self.path = path or default_history_path()
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA foreign_keys = OFF")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _intern(self, table, column, values):
+        """value -> id for a name table, inserting the missing values in one batch"""
+        cursor = self.connection.cursor()
+        ids = dict(cursor.execute("SELECT {0}, id FROM {1}".format(column, table)))
+        missing = [(value,) for value in set(values) if value not in ids]
+        if missing:
+            cursor.executemany("INSERT INTO {0} ({1}) VALUES (?)".format(table, column), missing)
+            ids = dict(cursor.execute("SELECT {0}, id FROM {1}".format(column, table)))
+        return ids
+
+    def _model_id(self, path, name=None):
+        """Id of the model stored under path, created on first use; the name label follows
+        the latest title"""
+        cursor = self.connection.cursor()
+        row = cursor.execute("SELECT id, name FROM models WHERE path = ?", (path,)).fetchone()
+        if row:
+            if name and name != row[1]:
+                cursor.execute("UPDATE models SET name = ? WHERE id = ?", (name, row[0]))
+            return row[0]
+        cursor.execute("INSERT INTO models (path, name) VALUES (?, ?)", (path, name))
+        return cursor.lastrowid
+
+    def find_model(self, model):
+        """Model id for a file path, or for a name if only one model carries it; None if unknown
+
+        Raises ValueError when several models share the name - pass the path instead.
+        """
+        row = self.connection.execute("SELECT id FROM models WHERE path = ?", (model,)).fetchone()
+        if row:
+            return row[0]
+        rows = self.connection.execute("SELECT id, path FROM models WHERE name = ?", (model,)).fetchall()
+        if len(rows) > 1:
+            raise ValueError(u"Several models are named '{}': {}".format(
+                model, u", ".join(path for _, path in rows)))
+        return rows[0][0] if rows else None
+
+    def append(self, snapshot):
+        """Store one snapshot (see snapshot.build_snapshot) in a single transaction
+
+        Returns the snapshot id.
+        """
+        records = snapshot['records']
+        with self.connection:
+            cursor = self.connection.cursor()
+            # Unsaved models have no path yet - their title is all there is
+            model_id = self._model_id(snapshot.get('path') or snapshot.get('model') or u"", snapshot.get('model'))
+            previous = cursor.execute("SELECT MAX(id) FROM snapshots WHERE model_id = ?", (model_id,)).fetchone()[0]
+            cursor.execute("INSERT INTO snapshots (model_id, created, total) VALUES (?, ?, ?)",
+                           (model_id, snapshot['created'], len(records)))
+            snapshot_id = cursor.lastrowid
+
+            message_ids = self._intern('messages', 'text', [record['message'] for record in records])
+            category_ids = self._intern('categories', 'name',
+                                        [category for record in records for category in record['categories']])
+
+            # Warning identities of this snapshot and per category/message counts
+            current = {}  # (message id, element key) -> element ids
+            counts = {}
+            for record in records:
+                message_id = message_ids[record['message']]
+                current[(message_id, element_key(record['element_ids']))] = record['element_ids']
+                for category in set(record['categories']):
+                    count_key = (category_ids[category], message_id)
+                    counts[count_key] = counts.get(count_key, 0) + 1
+
+            known = dict(((message_id, key), warning_id) for warning_id, message_id, key in cursor.execute(
+                "SELECT id, message_id, element_key FROM warnings WHERE model_id = ?", (model_id,)))
+            new_keys = [key for key in current if key not in known]
+            if new_keys:
+                cursor.executemany(
+                    "INSERT INTO warnings (model_id, message_id, element_key, first_snapshot) VALUES (?, ?, ?, ?)",
+                    [(model_id, message_id, key, snapshot_id) for message_id, key in new_keys])
+                for warning_id, message_id, key in cursor.execute(
+                        "SELECT id, message_id, element_key FROM warnings WHERE model_id = ? AND first_snapshot = ?",
+                        (model_id, snapshot_id)):
+                    known[(message_id, key)] = warning_id
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO warning_elements (warning_id, element_id) VALUES (?, ?)",
+                    [(known[key], int(value)) for key in new_keys for value in set(current[key])])
+
+            # Extend the spans that were open in the previous snapshot, open new ones for the rest
+            present = set(known[key] for key in current)
+            open_spans = set()
+            if previous is not None:
+                open_spans = set(row[0] for row in cursor.execute(
+                    "SELECT warning_id FROM warning_spans WHERE last_snapshot = ?", (previous,)))
+            continuing = present & open_spans
+            cursor.executemany(
+                "UPDATE warning_spans SET last_snapshot = ? WHERE last_snapshot = ? AND warning_id = ?",
+                [(snapshot_id, previous, warning_id) for warning_id in continuing])
+            cursor.executemany(
+                "INSERT INTO warning_spans (warning_id, first_snapshot, last_snapshot) VALUES (?, ?, ?)",
+                [(warning_id, snapshot_id, snapshot_id) for warning_id in present - continuing])
+
+            cursor.executemany(
+                "INSERT INTO snapshot_counts (snapshot_id, category_id, message_id, count) VALUES (?, ?, ?, ?)",
+                [(snapshot_id, category_id, message_id, count)
+                 for (category_id, message_id), count in counts.items()])
+        return snapshot_id
+
+    def models(self):
+        """(name, path) of every model"""
+        return self.connection.execute("SELECT name, path FROM models ORDER BY name, path").fetchall()
+
+    # The queries below take a model path or name, see find_model
+
+    def snapshots(self, model):
+        """(id, created, total) of a model's snapshots, oldest first"""
+        return self.connection.execute(
+            "SELECT id, created, total FROM snapshots WHERE model_id = ? ORDER BY created",
+            (self.find_model(model),)).fetchall()
+
+    def weekly_category_counts(self, model):
+        """(week, category, count) from the last snapshot of every week - week as 'YYYY-WW'
+
+        A warning counts once for each category among its elements.
+        """
+        return self.connection.execute(
+            "SELECT strftime('%Y-%W', s.created) AS week, c.name, SUM(sc.count) "
+            "FROM snapshots s "
+            "JOIN snapshot_counts sc ON sc.snapshot_id = s.id "
+            "JOIN categories c ON c.id = sc.category_id "
+            "WHERE s.id IN ("
+            "    SELECT MAX(s2.id) FROM snapshots s2 "
+            "    WHERE s2.model_id = ? GROUP BY strftime('%Y-%W', s2.created)) "
+            "GROUP BY week, c.name ORDER BY week, c.name", (self.find_model(model),)).fetchall()
+
+    def first_seen(self, model, message, element_ids=None):
+        """Creation time of the first snapshot containing the warning (or, without
+        element_ids, any warning with this message); None if it never appeared"""
+        sql = ("SELECT MIN(s.created) FROM warnings w "
+               "JOIN messages t ON t.id = w.message_id "
+               "JOIN snapshots s ON s.id = w.first_snapshot "
+               "WHERE w.model_id = ? AND t.text = ?")
+        params = [self.find_model(model), message]
+        if element_ids is not None:
+            sql += " AND w.element_key = ?"
+            params.append(element_key(element_ids))
+        return self.connection.execute(sql, params).fetchone()[0]
+
+    def element_history(self, model, element_id):
+        """(message, first seen, last seen) for every warning an element took part in"""
+        return self.connection.execute(
+            "SELECT t.text, MIN(f.created), MAX(l.created) FROM warning_elements we "
+            "JOIN warnings w ON w.id = we.warning_id "
+            "JOIN messages t ON t.id = w.message_id "
+            "JOIN warning_spans sp ON sp.warning_id = w.id "
+            "JOIN snapshots f ON f.id = sp.first_snapshot "
+            "JOIN snapshots l ON l.id = sp.last_snapshot "
+            "WHERE we.element_id = ? AND w.model_id = ? GROUP BY w.id ORDER BY 2",
+            (int(element_id), self.find_model(model))).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warnings history store")
+    parser.add_argument('--db', default=default_history_path(), help="history database")
+    commands = parser.add_subparsers(dest='command')
+    add = commands.add_parser('add', help="append snapshot files (jsonl, csv or columnar)")
+    add.add_argument('snapshots', nargs='+')
+    commands.add_parser('models', help="list the models (name and path)")
+    weekly = commands.add_parser('weekly', help="warning count per category per week")
+    weekly.add_argument('model', help="model path, or name if it is unique")
+    first = commands.add_parser('first', help="when did a warning first appear")
+    first.add_argument('model', help="model path, or name if it is unique")
+    first.add_argument('message')
+    first.add_argument('element_ids', nargs='*', type=int)
+    args = parser.parse_args(argv)
+
+    with HistoryStore(args.db) as store:
+        if args.command == 'add':
+            for file_path in args.snapshots:
+                snapshot_id = store.append(read_snapshot(file_path))
+                print("{} -> snapshot {}".format(file_path, snapshot_id))
+        elif args.command == 'models':
+            for name, path in store.models():
+                print(u"{}\t{}".format(name or u"", path))
+        elif args.command in ('weekly', 'first'):
+            try:
+                if args.command == 'weekly':
+                    for week, category, count in store.weekly_category_counts(args.model):
+                        print(u"{}\t{}\t{}".format(week, category, count))
+                else:
+                    print(store.first_seen(args.model, args.message, args.element_ids or None))
+            except ValueError as ex:
+                print(ex)
+                return 1
+        else:
+            parser.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Hotspot ranking for the Enhanced Warnings Browser
+A reverse index element id -> warning occurrences is filled while the warnings are loaded;
+rankings of the elements, categories, levels and families involved in the most warnings are
+taken from it with heap-based top-k selection instead of sorting everything.
+No clr imports.
+"""
+
+import csv
+import heapq
+import io
+from operator import itemgetter
+
+from warnings_data import element_id_value
+
+# Ranking kind -> label; every kind except 'element' is a key of the element info dict
+HOTSPOT_KINDS = [
+    ('element', "Elemente"),
+    ('category', "Kategorien"),
+    ('level', "Ebenen"),
+    ('family', "Familien")
+]
+
+CSV_COLUMNS = ["kind", "rank", "name", "warnings", "elements"]
+
+
+class ElementWarningIndex(object):
+    """Reverse index: int element id -> warning occurrences (message, occurrence index)"""
+
+    def __init__(self):
+        self._refs = {}
+        self._occurrences = {}  # (message, occurrence index) -> element ids
+
+    def __len__(self):
+        return len(self._refs)
+
+    def add(self, message, occurrence_index, element_ids):
+        ref = (message, occurrence_index)
+        self._occurrences[ref] = element_ids
+        for elem_id in element_ids:
+            key = element_id_value(elem_id)
+            refs = self._refs.get(key)
+            if refs is None:
+                self._refs[key] = [ref]
+            elif refs[-1] != ref:  # An element listed twice in one warning counts once
+                refs.append(ref)
+
+    def keys(self):
+        return self._refs.keys()
+
+    def refs(self, element_id):
+        return self._refs.get(element_id_value(element_id), [])
+
+    def warning_count(self, element_id):
+        return len(self.refs(element_id))
+
+    def messages_for(self, element_id):
+        """Warning groups (message texts) an element takes part in, in load order"""
+        messages = []
+        for message, _ in self.refs(element_id):
+            if message not in messages:
+                messages.append(message)
+        return messages
+
+    def elements_of(self, refs):
+        """Unique element ids of all elements in the given occurrences"""
+        seen = set()
+        result = []
+        for ref in refs:
+            for elem_id in self._occurrences.get(ref, ()):
+                key = element_id_value(elem_id)
+                if key not in seen:
+                    seen.add(key)
+                    result.append(elem_id)
+        return result
+
+    def element_counts(self):
+        return dict((key, len(refs)) for key, refs in self._refs.items())
+
+
+class Hotspot(object):
+    """One ranking entry"""
+    __slots__ = ('kind', 'rank', 'name', 'warnings', 'elements', 'refs')
+
+    def __init__(self, kind, rank, name, warnings, elements, refs):
+        self.kind = kind
+        self.rank = rank
+        self.name = name
+        self.warnings = warnings  # Number of warning occurrences involving the hotspot
+        self.elements = elements  # Number of failing elements behind it
+        self.refs = refs
+
+
+def top_k(counts, k):
+    """The k (key, count) pairs with the highest counts - O(n log k)"""
+    return heapq.nlargest(k, counts.items(), key=itemgetter(1))
+
+
+def rank_hotspots(reverse_index, info_for, kind, k=50):
+    """Top-k hotspots of one kind
+
+    info_for(int id) returns the element info dict (see warnings_data.read_element_info).
+    For categories, levels and families a warning occurrence counts once per value even if
+    several of its elements share that value.
+    """
+    if kind == 'element':
+        ranked = top_k(reverse_index.element_counts(), k)
+        hotspots = []
+        for rank, (key, count) in enumerate(ranked):
+            info = info_for(key) or {}
+            name = u"{} [{}]".format(info.get('name', 'Unknown'), key)
+            hotspots.append(Hotspot(kind, rank + 1, name, count, 1, list(reverse_index.refs(key))))
+        return hotspots
+
+    refs_by_value = {}
+    elements_by_value = {}
+    for key in reverse_index.keys():
+        value = (info_for(key) or {}).get(kind) or 'N/A'
+        refs = refs_by_value.get(value)
+        if refs is None:
+            refs = refs_by_value[value] = set()
+            elements_by_value[value] = 0
+        refs.update(reverse_index.refs(key))
+        elements_by_value[value] += 1
+
+    ranked = top_k(dict((value, len(refs)) for value, refs in refs_by_value.items()), k)
+    return [Hotspot(kind, rank + 1, value, count, elements_by_value[value], sorted(refs_by_value[value]))
+            for rank, (value, count) in enumerate(ranked)]
+
+
+def rank_all(reverse_index, info_for, k=50):
+    """kind -> hotspots for every entry of HOTSPOT_KINDS"""
+    return dict((kind, rank_hotspots(reverse_index, info_for, kind, k)) for kind, _ in HOTSPOT_KINDS)
+
+
+def write_hotspots_csv(rankings, file_path):
+    """One row per hotspot, kinds in HOTSPOT_KINDS order"""
+    with io.open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for kind, _ in HOTSPOT_KINDS:
+            for hotspot in rankings.get(kind, []):
+                writer.writerow([kind, hotspot.rank, hotspot.name, hotspot.warnings, hotspot.elements])
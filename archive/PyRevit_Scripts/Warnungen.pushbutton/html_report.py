@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming HTML report writer for the Enhanced Warnings Browser
+Rows are generated one at a time and flushed to disk in chunks, so memory stays flat
+regardless of the number of warnings
+"""
+
+import gzip
+import io
+import os
+
+HTML_HEAD = u"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Enhanced Warnings Report - {project}</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        h1 {{ color: #2c5aa0; text-align: center; }}
+        .header {{ text-align: center; margin-bottom: 20px; }}
+        .pages {{ text-align: center; margin: 10px; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+        th {{ background-color: #2c5aa0; color: white; }}
+        tr:nth-child(even) {{ background-color: #f9f9f9; }}
+        .warning-msg {{ max-width: 300px; word-wrap: break-word; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Enhanced Warnings Report</h1>
+        <p><strong>Projekt:</strong> {project}</p>
+        <p><strong>Erstellt:</strong> {date}</p>
+        <p><strong>ICL Ingenieur Consult GmbH</strong></p>
+    </div>
+    {navigation}
+    <table>
+        <thead>
+            <tr>
+                <th>Nr.</th>
+                <th>Fehlermeldung</th>
+                <th>Anzahl</th>
+                <th>Element IDs</th>
+                <th>Elementnamen</th>
+                <th>Ebenen</th>
+                <th>Ansichten</th>
+                <th>Kategorien</th>
+            </tr>
+        </thead>
+        <tbody>
+"""
+
+HTML_TAIL = u"""        </tbody>
+    </table>
+    {navigation}
+</body>
+</html>"""
+
+ROW_TEMPLATE = (u"<tr><td>{}</td><td class='warning-msg'>{}</td><td>{}</td><td>{}</td>"
+                u"<td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>\n")
+
+
+def escape_html(text):
+    """Escape HTML characters"""
+    if not text:
+        return u""
+    if not isinstance(text, type(u"")):
+        text = u"{}".format(text)
+    return text.replace(u"&", u"&amp;").replace(u"<", u"&lt;").replace(u">", u"&gt;")
+
+
+def format_row(number, item):
+    """One formatted <tr> for a warning row"""
+    return ROW_TEMPLATE.format(
+        number,
+        escape_html(item.Message),
+        item.ElementCount,
+        escape_html(item.ElementIds),
+        escape_html(item.ElementNames),
+        escape_html(item.Levels),
+        escape_html(item.Views),
+        escape_html(item.Categories)
+    )
+
+
+def iter_rows(items, start=1):
+    """Yield one formatted <tr> per warning row"""
+    for number, item in enumerate(items, start):
+        yield format_row(number, item)
+
+
+def is_group_row(item):
+    """False for expanded occurrence rows - they are paged with their group"""
+    return getattr(item, 'IsGroup', True)
+
+
+def page_paths(file_path, page_count):
+    """File names for a paged report: report.html, report_002.html, ..."""
+    if page_count <= 1:
+        return [file_path]
+    base, ext = _split_ext(file_path)
+    return [file_path] + ["{}_{:03d}{}".format(base, page, ext) for page in range(2, page_count + 1)]
+
+
+def _split_ext(file_path):
+    if file_path.lower().endswith(".html.gz"):
+        return file_path[:-len(".html.gz")], file_path[-len(".html.gz"):]
+    return os.path.splitext(file_path)
+
+
+def _navigation(paths, current):
+    if len(paths) <= 1:
+        return u""
+    links = []
+    for index, path in enumerate(paths):
+        label = u"{}".format(index + 1)
+        if index == current:
+            links.append(u"<strong>{}</strong>".format(label))
+        else:
+            links.append(u"<a href=\"{}\">{}</a>".format(escape_html(os.path.basename(path)), label))
+    return u"<div class=\"pages\">Seite: {}</div>".format(u" | ".join(links))
+
+
+def _open_output(file_path, use_gzip):
+    if use_gzip:
+        return gzip.open(file_path, 'wb')
+    return io.open(file_path, 'wb')
+
+
+class ChunkedWriter(object):
+    """Collects text and writes it as UTF-8 in chunks of chunk_size pieces"""
+
+    def __init__(self, handle, chunk_size=500):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self._buffer = []
+
+    def write(self, text):
+        self._buffer.append(text)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.handle.write(u"".join(self._buffer).encode('utf-8'))
+            self._buffer = []
+
+
+def write_html_report(file_path, items, project, date, use_gzip=None, page_size=None, chunk_size=500):
+    """Stream a warnings report to file_path
+
+    items is an iterable of warning rows. page_size counts group rows: expanded
+    occurrence rows stay on the page of their group. use_gzip defaults to True for *.gz
+    paths. Returns the list of written files.
+    """
+    if use_gzip is None:
+        use_gzip = file_path.lower().endswith(".gz")
+
+    if page_size:
+        items = list(items)
+        group_count = sum(1 for item in items if is_group_row(item))
+        page_count = max(1, (group_count + page_size - 1) // page_size)
+    else:
+        page_count = 1
+    paths = page_paths(file_path, page_count)
+
+    rows = iter(items)
+    item = next(rows, None)
+    number = 1
+    for page_index, path in enumerate(paths):
+        navigation = _navigation(paths, page_index)
+        handle = _open_output(path, use_gzip)
+        try:
+            writer = ChunkedWriter(handle, chunk_size)
+            writer.write(HTML_HEAD.format(
+                project=escape_html(project), date=date, navigation=navigation))
+            groups = 0
+            while item is not None:
+                if is_group_row(item):
+                    if page_size and groups >= page_size:
+                        break
+                    groups += 1
+                writer.write(format_row(number, item))
+                number += 1
+                item = next(rows, None)
+            writer.write(HTML_TAIL.format(navigation=navigation))
+            writer.flush()
+        finally:
+            handle.close()
+
+    return paths
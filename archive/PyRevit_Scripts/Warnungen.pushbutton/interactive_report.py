@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+Interactive single-file HTML report for the Enhanced Warnings Browser
+Embeds a warnings snapshot (see snapshot.py) as compact JSON - strings in one table,
+elements stored once and referenced by index, optionally deflated and base64 encoded -
+plus a small inline script that renders only the rows in view and sorts, filters and
+expands groups (down to the single occurrences) in the browser. No external files.
+No clr imports - also converts exported snapshots from the command line:
+
+    python interactive_report.py snapshot.columnar.json report.html
+"""
+
+import argparse
+import base64
+import io
+import json
+import sys
+
+try:
+    import zlib
+except ImportError:
+    zlib = None
+
+from html_report import escape_html
+from snapshot import read_snapshot
+from taxonomy import WarningClassifier, SEVERITIES
+from warnings_data import StringTable
+
+REPORT_FORMAT = 1
+
+
+def pack_snapshot(snapshot, classify=None):
+    """Compact report data from a snapshot dict
+
+    strings: every distinct text once; elements: flat [id, name, level, category] per element
+    (string codes); groups: [message, severity rank, type, fix, occurrences] in first-seen
+    order, each occurrence [element indexes, view codes]. classify(message) returns a
+    taxonomy.Classification.
+    """
+    classify = classify or WarningClassifier().classify
+    strings = StringTable()
+    code = strings.code
+    elements = []
+    element_positions = {}
+    groups = []
+    group_positions = {}
+
+    for record in snapshot['records']:
+        message = record['message']
+        position = group_positions.get(message)
+        if position is None:
+            classification = classify(message)
+            position = group_positions[message] = len(groups)
+            groups.append([code(message), classification.severity, code(classification.warning_type),
+                           code(classification.fix), []])
+
+        refs = []
+        for index, element_id in enumerate(record['element_ids']):
+            element = element_positions.get(element_id)
+            if element is None:
+                element = element_positions[element_id] = len(element_positions)
+                elements.extend([element_id, code(record['names'][index]),
+                                 code(record['levels'][index]), code(record['categories'][index])])
+            refs.append(element)
+        views = []
+        for view in record.get('views', ()):
+            view_code = code(view)
+            if view_code not in views:
+                views.append(view_code)
+        groups[position][4].append([refs, views])
+
+    return {
+        'format': REPORT_FORMAT,
+        'model': snapshot.get('model'),
+        'created': snapshot.get('created'),
+        'severities': dict((str(rank), label) for rank, label in SEVERITIES.items()),
+        'strings': strings.values,
+        'elements': elements,
+        'groups': groups
+    }
+
+
+def encode_data(data, compress=True):
+    """(encoding, text) for the embedded data block - 'deflate' (zlib, base64) or 'json'"""
+    text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    if not isinstance(text, type(u"")):
+        text = text.decode('utf-8')
+    if compress and zlib is not None:
+        packed = base64.b64encode(zlib.compress(text.encode('utf-8'), 9))
+        return 'deflate', packed.decode('ascii')
+    # Keep the JSON from closing the script element early
+    return 'json', text.replace(u"</", u"<\\/")
+
+
+def write_interactive_report(file_path, snapshot, project=None, date=None, classify=None, compress=True):
+    """Write the self-contained report; returns [file_path] like html_report.write_html_report"""
+    encoding, payload = encode_data(pack_snapshot(snapshot, classify), compress)
+    page = (INTERACTIVE_TEMPLATE
+            .replace(u"__PROJECT__", escape_html(project or snapshot.get('model') or u""))
+            .replace(u"__DATE__", escape_html(date or snapshot.get('created') or u""))
+            .replace(u"__ENCODING__", encoding)
+            .replace(u"__DATA__", payload))
+    with io.open(file_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return [file_path]
+
+
+INTERACTIVE_TEMPLATE = u"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>Enhanced Warnings Report - __PROJECT__</title>
+<style>
+body { font-family: Arial, sans-serif; margin: 0; display: flex; flex-direction: column; height: 100vh; }
+.header { text-align: center; padding: 8px; }
+h1 { color: #2c5aa0; margin: 4px; font-size: 22px; }
+.header p { margin: 2px; }
+.tools { padding: 6px 12px; border-bottom: 1px solid #ddd; }
+.tools input, .tools select { margin-right: 12px; }
+#viewport { flex: 1; overflow: auto; position: relative; }
+.row { display: grid; width: max-content; grid-template-columns: 36px 60px 320px 90px 110px 80px 70px 160px 220px 130px 170px 140px 240px;
+       height: 24px; line-height: 24px; border-bottom: 1px solid #eee; font-size: 13px; }
+.row > div { padding: 0 6px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; border-right: 1px solid #eee; }
+.head { position: sticky; top: 0; z-index: 1; background: #2c5aa0; color: white; cursor: pointer; }
+.head > div { border-right-color: #4a78bf; }
+#rows { position: absolute; left: 0; }
+.group { background: #fff; cursor: pointer; }
+.group:nth-child(even) { background: #f9f9f9; }
+.child { background: #eef3fb; color: #333; }
+.sev1 { color: #b00020; font-weight: bold; } .sev2 { color: #d35400; }
+</style>
+</head>
+<body>
+<div class="header">
+<h1>Enhanced Warnings Report</h1>
+<p><strong>Projekt:</strong> __PROJECT__ &nbsp; <strong>Erstellt:</strong> __DATE__ &nbsp; <strong>ICL Ingenieur Consult GmbH</strong></p>
+</div>
+<div class="tools">
+Suche: <input id="search" size="40">
+Schweregrad: <select id="severity"><option value="">(Alle)</option></select>
+Kategorie: <select id="category"><option value="">(Alle)</option></select>
+<span id="count"></span>
+</div>
+<div id="viewport"><div class="row head" id="head"></div><div id="spacer"></div><div id="rows"></div></div>
+<script type="application/octet-stream" id="report-data" data-encoding="__ENCODING__">__DATA__</script>
+<script>
+(function () {
+"use strict";
+var ROW = 24;
+var COLUMNS = ["", "Nr.", "Fehlermeldung", "Schweregrad", "Warnungstyp", "Vorkommen", "Elemente",
+               "Element IDs", "Elementnamen", "Ebenen", "Ansichten", "Kategorien", "L\\u00f6sungsvorschlag"];
+
+function start(data) {
+  var S = data.strings, E = data.elements, G = data.groups, SEV = data.severities;
+  var expanded = new Uint8Array(G.length);
+  var groupCells = new Array(G.length), searchText = null, groupCategories = null;
+  var order = G.map(function (g, i) { return i; });
+  var sortColumn = 1, sortDescending = false;
+  var shown = order, rowGroup = [], rowOccurrence = [];
+  var viewport = document.getElementById("viewport"), rowsBox = document.getElementById("rows"),
+      spacer = document.getElementById("spacer");
+
+  function unique(codes) {
+    var seen = {}, out = [];
+    for (var i = 0; i < codes.length; i++) { if (!seen[codes[i]]) { seen[codes[i]] = 1; out.push(codes[i]); } }
+    return out;
+  }
+  function join(codes) { return codes.map(function (c) { return S[c]; }).join("; "); }
+  function elementsOf(g, o) {
+    if (o >= 0) return G[g][4][o][0];
+    var all = [];
+    G[g][4].forEach(function (occ) { all.push.apply(all, occ[0]); });
+    return all;
+  }
+  function viewsOf(g, o) {
+    if (o >= 0) return G[g][4][o][1];
+    var all = [];
+    G[g][4].forEach(function (occ) { all.push.apply(all, occ[1]); });
+    return unique(all);
+  }
+  // Cells are only formatted for rows that are rendered (group rows are cached)
+  function cells(g, o) {
+    if (o < 0 && groupCells[g]) return groupCells[g];
+    var group = G[g], refs = elementsOf(g, o);
+    var field = function (k) { return refs.map(function (r) { return E[r * 4 + k]; }); };
+    var out = [
+      o < 0 ? (group[4].length > 1 ? (expanded[g] ? "[-]" : "[+]") : "") : "",
+      o < 0 ? String(g + 1) : "",
+      o < 0 ? S[group[0]] : "  \\u2192 Vorkommen " + (o + 1),
+      o < 0 ? (SEV[group[1]] || "") : "",
+      o < 0 ? S[group[2]] : "",
+      o < 0 ? String(group[4].length) : "",
+      String(refs.length),
+      field(0).join("; "),
+      join(field(1)),
+      join(unique(field(2))),
+      join(viewsOf(g, o)),
+      join(unique(field(3))),
+      o < 0 ? S[group[3]] : ""
+    ];
+    if (o < 0) groupCells[g] = out;
+    return out;
+  }
+
+  function rebuild() {
+    rowGroup = []; rowOccurrence = [];
+    shown.forEach(function (g) {
+      rowGroup.push(g); rowOccurrence.push(-1);
+      if (expanded[g]) for (var o = 0; o < G[g][4].length; o++) { rowGroup.push(g); rowOccurrence.push(o); }
+    });
+    spacer.style.height = (rowGroup.length * ROW) + "px";
+    var warnings = 0;
+    shown.forEach(function (g) { warnings += G[g][4].length; });
+    document.getElementById("count").textContent =
+      shown.length + " von " + G.length + " Warnungstypen, " + warnings + " Warnungen";
+    render();
+  }
+
+  function render() {
+    var first = Math.max(0, Math.floor(viewport.scrollTop / ROW) - 5);
+    var last = Math.min(rowGroup.length, first + Math.ceil(viewport.clientHeight / ROW) + 10);
+    var html = [];
+    for (var i = first; i < last; i++) {
+      var g = rowGroup[i], o = rowOccurrence[i], row = cells(g, o);
+      html.push('<div class="row ' + (o < 0 ? "group sev" + G[g][1] : "child") + '" data-g="' + g + '">');
+      for (var c = 0; c < row.length; c++) html.push("<div title=\\"" + escape(row[c]) + "\\">" + escape(row[c]) + "</div>");
+      html.push("</div>");
+    }
+    rowsBox.style.top = (first * ROW + ROW) + "px";
+    rowsBox.innerHTML = html.join("");
+  }
+  function escape(text) {
+    return text.replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;").replace(/"/g, "&quot;");
+  }
+
+  function applyFilter() {
+    var tokens = document.getElementById("search").value.toLowerCase().split(/\\s+/).filter(Boolean);
+    var severity = document.getElementById("severity").value, category = document.getElementById("category").value;
+    if (tokens.length && !searchText) {
+      searchText = G.map(function (group, g) { var c = cells(g, -1); return [c[2], c[4], c[8], c[9], c[11]].join(" ").toLowerCase(); });
+    }
+    shown = order.filter(function (g) {
+      if (severity && String(G[g][1]) !== severity) return false;
+      if (category && !groupCategories[g][category]) return false;
+      for (var t = 0; t < tokens.length; t++) if (searchText[g].indexOf(tokens[t]) < 0) return false;
+      return true;
+    });
+    rebuild();
+  }
+
+  function sortBy(column) {
+    sortDescending = column === sortColumn ? !sortDescending : false;
+    sortColumn = column;
+    var key;
+    if (column === 1 || column === 0) key = function (g) { return g; };
+    else if (column === 3) key = function (g) { return G[g][1]; };
+    else if (column === 5) key = function (g) { return G[g][4].length; };
+    else if (column === 6) key = function (g) { return elementsOf(g, -1).length; };
+    else { var text = G.map(function (group, g) { return cells(g, -1)[column].toLowerCase(); }); key = function (g) { return text[g]; }; }
+    var keys = G.map(function (group, g) { return key(g); }), sign = sortDescending ? -1 : 1;
+    order.sort(function (a, b) { return (keys[a] < keys[b] ? -1 : keys[a] > keys[b] ? 1 : a - b) * sign; });
+    applyFilter();
+  }
+
+  // Filter choices and per-group category sets
+  groupCategories = G.map(function (group, g) {
+    var set = {};
+    elementsOf(g, -1).forEach(function (r) { set[E[r * 4 + 3]] = 1; });
+    return set;
+  });
+  var severitySelect = document.getElementById("severity");
+  Object.keys(SEV).forEach(function (rank) { severitySelect.add(new Option(SEV[rank], rank)); });
+  var categorySelect = document.getElementById("category"), categoryCodes = {};
+  groupCategories.forEach(function (set) { for (var c in set) categoryCodes[c] = 1; });
+  Object.keys(categoryCodes).sort(function (a, b) { return S[a] < S[b] ? -1 : 1; })
+    .forEach(function (c) { categorySelect.add(new Option(S[c], c)); });
+
+  var head = document.getElementById("head");
+  head.innerHTML = COLUMNS.map(function (label, c) { return '<div data-c="' + c + '">' + label + "</div>"; }).join("");
+  head.addEventListener("click", function (e) { var c = e.target.getAttribute("data-c"); if (c !== null) sortBy(+c); });
+  rowsBox.addEventListener("click", function (e) {
+    var row = e.target.closest(".group");
+    if (!row) return;
+    var g = +row.getAttribute("data-g");
+    if (G[g][4].length < 2) return;
+    expanded[g] = expanded[g] ? 0 : 1;
+    groupCells[g] = null;
+    rebuild();
+  });
+  var pending = false;
+  viewport.addEventListener("scroll", function () {
+    if (pending) return;
+    pending = true;
+    requestAnimationFrame(function () { pending = false; render(); });
+  });
+  window.addEventListener("resize", render);
+  var timer = null;
+  document.getElementById("search").addEventListener("input", function () { clearTimeout(timer); timer = setTimeout(applyFilter, 150); });
+  severitySelect.addEventListener("change", applyFilter);
+  categorySelect.addEventListener("change", applyFilter);
+  rebuild();
+}
+
+var holder = document.getElementById("report-data");
+if (holder.getAttribute("data-encoding") === "deflate") {
+  var binary = atob(holder.textContent.trim()), bytes = new Uint8Array(binary.length);
+  for (var i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+  new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"))).text()
+    .then(function (text) { start(JSON.parse(text)); })
+    .catch(function (error) { document.getElementById("count").textContent = "Daten konnten nicht entpackt werden: " + error; });
+} else {
+  start(JSON.parse(holder.textContent));
+}
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interactive HTML report from a warnings snapshot")
+    parser.add_argument('snapshot', help="snapshot file (jsonl, csv or columnar)")
+    parser.add_argument('report', help="output .html file")
+    parser.add_argument('--no-compress', action='store_true', help="embed plain JSON instead of deflate+base64")
+    args = parser.parse_args(argv)
+
+    write_interactive_report(args.report, read_snapshot(args.snapshot), compress=not args.no_compress)
+    print("Report: {}".format(args.report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
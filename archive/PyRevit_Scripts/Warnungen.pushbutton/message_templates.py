@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Fuzzy grouping of near-identical warning messages for the Enhanced Warnings Browser
+Messages are normalized into templates - quoted names, element ids and numbers (with an
+optional unit) become placeholders - by one compiled tokenizer; every distinct text is
+tokenized once and cached. Grouping by template is a single pass over the message groups
+from warnings_data.group_warnings, so it stays linear in the number of warnings.
+No clr imports.
+"""
+
+import re
+
+# Placeholders written into the templates
+NAME = u"'…'"
+ELEMENT_ID = u"<id>"
+NUMBER = u"<n>"
+
+VARIABLE_SEPARATOR = u" | "  # Between the variable parts of one message
+MAX_VARIANTS_SHOWN = 5
+
+# One alternative per placeholder, tried left to right at each position. Quotes: "…", '…'
+# (but not the apostrophes of "can't ... doesn't"), „…“ and “…”. Ids: "id 12345",
+# "ID: 12345", "#12345". Numbers: integers, decimals with point or comma, feet-inch
+# dimensions, and an optional metric unit, degree or percent sign.
+_TOKENIZER = re.compile(
+    u"(?P<name>\"[^\"\\n]{1,200}\"|(?<!\\w)'[^'\\n]{1,200}'(?!\\w)|„[^“”\\n]{1,200}[“”]|“[^”\\n]{1,200}”)"
+    u"|(?P<id>(?:\\bid\\s*[:=]?\\s*|#)\\d+)"
+    u"|(?P<number>(?<![\\w.])[-+]?\\d+(?:[.,]\\d+)*"
+    u"(?:\\s*'\\s*-\\s*\\d+(?:\\s+\\d+/\\d+)?\"|\"|°|%|\\s*(?:mm|cm|m²|m³|m|ft)\\b)?)",
+    re.IGNORECASE | re.UNICODE)
+
+_PLACEHOLDERS = {'name': NAME, 'id': ELEMENT_ID, 'number': NUMBER}
+
+
+class MessageTemplater(object):
+    """Message text -> (template, variable parts), memoized per distinct text"""
+
+    def __init__(self):
+        self._cache = {}
+        self.lookups = 0
+        self.tokenized = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def normalize(self, message):
+        self.lookups += 1
+        result = self._cache.get(message)
+        if result is None:
+            self.tokenized += 1
+            result = self._cache[message] = self._tokenize(message or u"")
+        return result
+
+    def template(self, message):
+        return self.normalize(message)[0]
+
+    @staticmethod
+    def _tokenize(message):
+        parts = []
+        variables = []
+        position = 0
+        for match in _TOKENIZER.finditer(message):
+            parts.append(message[position:match.start()])
+            kind = match.lastgroup
+            parts.append(_PLACEHOLDERS[kind])
+            value = match.group(kind)
+            variables.append(value[1:-1] if kind == 'name' else value)
+            position = match.end()
+        if not variables:
+            return message, ()
+        parts.append(message[position:])
+        return u"".join(parts), tuple(variables)
+
+
+def group_by_template(warning_groups, templater=None):
+    """Merge the message groups of warnings_data.group_warnings by template
+
+    Returns (template_groups, variants): template_groups maps template -> occurrences in the
+    order of the message groups, each occurrence a new dict with 'element_ids', 'warning',
+    'message' and 'variables' (the input is left untouched); variants maps template -> the
+    distinct variable tuples in first-seen order.
+    """
+    templater = templater or MessageTemplater()
+    template_groups = {}
+    variants = {}
+    seen = {}
+    for message, occurrences in warning_groups.items():
+        template, variables = templater.normalize(message)
+        rows = template_groups.get(template)
+        if rows is None:
+            rows = template_groups[template] = []
+            variants[template] = []
+            seen[template] = set()
+        if variables not in seen[template]:
+            seen[template].add(variables)
+            variants[template].append(variables)
+        for occurrence in occurrences:
+            rows.append({
+                'element_ids': occurrence['element_ids'],
+                'warning': occurrence.get('warning'),
+                'message': message,
+                'variables': variables
+            })
+    return template_groups, variants
+
+
+def format_variables(variables):
+    """Variable parts of one message for display"""
+    return VARIABLE_SEPARATOR.join(variables)
+
+
+def format_variants(variants, limit=MAX_VARIANTS_SHOWN):
+    """Distinct variable parts of a template group - the first few plus a count"""
+    shown = [format_variables(variables) for variables in variants[:limit] if variables]
+    text = u"; ".join(shown)
+    if len(variants) > limit:
+        text += u" (+{} weitere)".format(len(variants) - limit)
+    return text
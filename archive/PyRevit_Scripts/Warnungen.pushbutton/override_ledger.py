@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Override ledger for the Enhanced Warnings Browser
+Records every temporary highlight the browser applies, keyed by (view id, element id), and
+which views carry a highlight selection filter, so the overrides can be removed in every
+view - not only the active one - when the window closes. The ledger is mirrored to a small
+sidecar file per document; a file left behind by a crashed session tells the next session
+what to sweep. Saved highlights ("Highlight speichern") are meant to stay and are not kept.
+The ledger also remembers which views and selection filters the browser itself changed, so
+the warnings cache can tell those changes apart from real model edits.
+No clr imports - ids are plain ints.
+"""
+
+import hashlib
+import io
+import json
+import os
+
+LEDGER_FORMAT = 1
+
+
+def default_ledger_dir():
+    root = os.environ.get('APPDATA') or os.path.expanduser('~')
+    return os.path.join(root, 'BIMKraft', 'Overrides')
+
+
+def ledger_path(document_path, folder=None):
+    digest = hashlib.sha1((document_path or u"").encode('utf-8')).hexdigest()
+    return os.path.join(folder or default_ledger_dir(), "{}.json".format(digest))
+
+
+class OverrideLedger(object):
+    """(view id, element id) pairs with a temporary override, plus the highlight filter per view
+
+    Every change is written through to the sidecar file; an empty ledger that remembers no
+    touched elements removes the file. Pass file_path=None to keep the ledger in memory only.
+    """
+
+    def __init__(self, document_path, file_path=None, logger=None):
+        self.document_path = document_path
+        self.file_path = file_path
+        self.logger = logger
+        self._elements = {}  # view id -> set of element ids
+        self._filters = {}  # view id -> selection filter name
+        self._touched = set()  # ids of views and selection filters the browser changed
+
+    def __len__(self):
+        return sum(len(keys) for keys in self._elements.values())
+
+    def __bool__(self):
+        return bool(self._elements or self._filters)
+
+    __nonzero__ = __bool__
+
+    def views(self):
+        """View ids with recorded overrides or a recorded filter"""
+        return sorted(set(self._elements) | set(self._filters))
+
+    def elements(self, view_key):
+        return sorted(self._elements.get(view_key, ()))
+
+    def filter_name(self, view_key):
+        return self._filters.get(view_key)
+
+    def touched(self):
+        """Ids of the views and selection filters the browser has changed - kept after the
+        overrides are cleared, until the next warnings cache write calls untouch()"""
+        return sorted(self._touched)
+
+    def touch(self, keys):
+        keys = set(keys) - self._touched
+        if keys:
+            self._touched.update(keys)
+            self.save()
+
+    def untouch(self, keys):
+        """Forget touched ids - their changes are no longer taken for the browser's own"""
+        keys = self._touched.intersection(keys)
+        if keys:
+            self._touched.difference_update(keys)
+            self.save()
+
+    def record(self, view_key, element_keys, filter_name=None):
+        """Overrides added in a view; filter_name when they went into a selection filter"""
+        element_keys = list(element_keys)
+        if not element_keys and not filter_name:
+            return
+        self._touched.add(view_key)
+        self._elements.setdefault(view_key, set()).update(element_keys)
+        if filter_name:
+            self._filters[view_key] = filter_name
+        self.save()
+
+    def discard(self, view_key, element_keys):
+        """Overrides removed again (or saved, so they are no longer temporary)"""
+        keys = self._elements.get(view_key)
+        if not keys:
+            return
+        keys.difference_update(element_keys)
+        if not keys:
+            del self._elements[view_key]
+        self.save()
+
+    def drop_views(self, view_keys):
+        """Stop tracking views - their overrides are gone or meant to stay"""
+        changed = False
+        for view_key in view_keys:
+            changed = self._elements.pop(view_key, None) is not None or changed
+            changed = self._filters.pop(view_key, None) is not None or changed
+        if changed:
+            self.save()
+
+    def clear(self):
+        self._elements = {}
+        self._filters = {}
+        self.save()
+
+    def to_dict(self):
+        views = {}
+        for view_key in self.views():
+            views[str(view_key)] = {'elements': self.elements(view_key), 'filter': self._filters.get(view_key)}
+        return {'format': LEDGER_FORMAT, 'document': self.document_path, 'views': views,
+                'touched': self.touched()}
+
+    @classmethod
+    def from_dict(cls, payload, file_path=None, logger=None):
+        ledger = cls(payload.get('document'), file_path, logger)
+        for view_key, entry in payload.get('views', {}).items():
+            if entry.get('elements'):
+                ledger._elements[int(view_key)] = set(int(key) for key in entry['elements'])
+            if entry.get('filter'):
+                ledger._filters[int(view_key)] = entry['filter']
+        ledger._touched = set(int(key) for key in payload.get('touched', ()))
+        return ledger
+
+    @classmethod
+    def load(cls, document_path, file_path, logger=None):
+        """Ledger left behind in file_path for this document - empty if there is none"""
+        if file_path and os.path.exists(file_path):
+            try:
+                with io.open(file_path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                if payload.get('format') == LEDGER_FORMAT and payload.get('document') == document_path:
+                    return cls.from_dict(payload, file_path, logger)
+            except (IOError, OSError, ValueError) as ex:
+                if logger:
+                    logger.debug("Ignoring unreadable override ledger {}: {}".format(file_path, str(ex)))
+        return cls(document_path, file_path, logger)
+
+    def save(self):
+        """Write the sidecar file atomically, or remove it when nothing is recorded"""
+        if not self.file_path:
+            return None
+        try:
+            if not self and not self._touched:
+                if os.path.exists(self.file_path):
+                    os.remove(self.file_path)
+                return None
+            folder = os.path.dirname(self.file_path)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+            text = json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+            if not isinstance(text, type(u"")):
+                text = text.decode('utf-8')
+            temp_path = self.file_path + ".tmp"
+            with io.open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
+            os.rename(temp_path, self.file_path)
+        except (IOError, OSError) as ex:
+            if self.logger:
+                self.logger.error("Error writing override ledger: {}".format(str(ex)))
+        return self.file_path
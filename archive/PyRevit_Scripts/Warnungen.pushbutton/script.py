@@ -4,6 +4,7 @@ Enhanced Warnings Browser for Revit
 A modal dialog for browsing warnings with enhanced information and element highlighting
 """
 
+import os
 import clr
 clr.AddReference('PresentationCore')
 clr.AddReference('PresentationFramework')
@@ -14,42 +15,213 @@ from System.Windows import Window, Application, RoutedEventHandler
 from System.Windows.Input import MouseButtonEventHandler
 from System.Windows.Controls import (
     Grid, DataGrid, DataGridTextColumn, Button, StackPanel,
-    CheckBox, TextBlock, ScrollViewer, DataGridLength
+    CheckBox, TextBlock, ScrollViewer, DataGridLength, ProgressBar, TextBox, ComboBox
 )
-from System.Windows.Data import Binding
+from System.Windows.Data import Binding, CollectionViewSource
 from System.Windows.Media import SolidColorBrush, Colors
+from System.Collections import IComparer
 from System.Collections.ObjectModel import ObservableCollection
-from System import EventArgs, Array
+from System.ComponentModel import ListSortDirection
+from System import EventArgs, Array, Predicate
 
 from Autodesk.Revit.DB import (
     Transaction, OverrideGraphicSettings, ElementId,
     Color as RevitColor, View, ViewType, View3D, ViewFamilyType,
     FilteredElementCollector, BuiltInCategory, TransactionStatus,
-    BoundingBoxXYZ, XYZ, FillPatternElement, FillPattern
+    BoundingBoxXYZ, XYZ, FillPatternElement, FillPattern, Document, Level
 )
 
 from pyrevit import revit, DB, UI, forms, script
 import System.Windows.Forms as WinForms
 from System.Threading import Thread, ThreadStart
-from System.Windows.Threading import Dispatcher
-
-class WarningItem:
-    """Data class for warnings display"""
-    def __init__(self, message, element_ids, element_info, occurrence_count=1, is_group=True, parent_item=None):
-        self.Message = message
-        self.ElementCount = len(element_ids)
-        self.OccurrenceCount = occurrence_count if is_group else ""  # Only show for group rows
-        self.ElementIds = "; ".join([str(eid.IntegerValue) for eid in element_ids])
-        self.ElementNames = "; ".join([info['name'] for info in element_info])
-        self.Levels = "; ".join(list(set([info['level'] for info in element_info])))
-        self.Views = "; ".join(list(set([view for info in element_info for view in info['views']])))
-        self.Categories = "; ".join(list(set([info['category'] for info in element_info])))
-        self._element_ids = element_ids  # Store for highlighting
-        self.IsGroup = is_group
-        self.IsExpanded = False
-        self.Children = []  # Child warning items
-        self.Parent = parent_item  # Reference to parent group
-        self.ExpandSymbol = "[+]" if is_group and occurrence_count > 1 else ""
+from System.Windows.Threading import Dispatcher, DispatcherTimer, DispatcherPriority
+
+from warnings_data import group_warnings, element_id_value, ElementInfoIndex
+from warning_rows import WarningRow
+from message_templates import MessageTemplater, group_by_template
+from warnings_cache import (
+    WarningsCache, document_identity, serialize_groups, deserialize_groups, cached_elements
+)
+from view_index import VisibilityIndex, ViewResolutionIndex
+from highlighting import HighlightManager, FilterHighlightManager
+from override_ledger import OverrideLedger, ledger_path
+from spatial import BoundingBoxCache, revit_box_loader, pad_box
+from filtering import FilterIndex
+from hotspots import ElementWarningIndex, HOTSPOT_KINDS, rank_all, write_hotspots_csv
+from taxonomy import WarningClassifier, default_cache_path as taxonomy_cache_path
+from html_report import write_html_report, escape_html
+from interactive_report import write_interactive_report
+from snapshot import (
+    collect_snapshot, export_snapshot, build_snapshot, write_snapshot, snapshot_dir,
+    FORMATS as SNAPSHOT_FORMATS
+)
+from snapshot_diff import diff_files, summarize
+import history
+from tracing import TRACER, WPF, default_trace_dir
+
+# Offer to split HTML exports into pages above this many rows
+HTML_PAGE_SIZE = 5000
+
+# Headless snapshot export (e.g. scheduled "pyrevit run"): set the target folder and
+# optionally a comma separated list of formats (jsonl, csv, columnar)
+SNAPSHOT_DIR_ENV = "BIMKRAFT_WARNINGS_SNAPSHOT_DIR"
+SNAPSHOT_FORMATS_ENV = "BIMKRAFT_WARNINGS_SNAPSHOT_FORMATS"
+
+# Phase tracing: set to 1 (or shift-click the button) to write a Chrome trace to
+# %APPDATA%\BIMKraft\Traces and print a timing table when the window closes
+TRACE_ENV = "BIMKRAFT_WARNINGS_TRACE"
+
+# Highlighting: "filter" puts the highlighted elements of a view into one selection filter
+# instead of setting one override per element (the default)
+HIGHLIGHT_ENGINE_ENV = "BIMKRAFT_WARNINGS_HIGHLIGHT"
+
+# Section boxes of selections with at least this many elements ignore stray elements whose
+# centre lies more than this many robust deviations beyond the typical distance
+SECTION_BOX_TRIM_MIN_ELEMENTS = 20
+SECTION_BOX_OUTLIER_THRESHOLD = 3.5
+
+# "In 3D Ansicht zeigen" offers one view per spatial cluster for larger selections
+CLUSTER_MIN_ELEMENTS = 10
+MAX_3D_VIEW_CLUSTERS = 6
+
+# Auto-highlight waits this long for the grid selection to settle
+AUTO_HIGHLIGHT_DELAY_MS = 250
+
+# Progressive loading: work per idle slice of the UI dispatcher, and how often the grid
+# re-reads its rows meanwhile (every refresh re-filters and re-renders all rows)
+LOAD_SLICE_MS = 40
+LOAD_REFRESH_MS = 500
+
+# Search box: filter once typing pauses this long
+SEARCH_DELAY_MS = 150
+
+# Column filters above the grid: (row attribute, label)
+FILTER_COLUMNS = [("Severity", "Schweregrad"), ("Levels", "Ebene"), ("Categories", "Kategorie")]
+ALL_VALUES = "(Alle)"
+
+# Entries per hotspot ranking
+HOTSPOT_TOP_K = 50
+
+class SelectionDebouncer(object):
+    """Coalesces bursts of selection events into one callback once the selection has settled
+
+    Every schedule() restarts the timer; when it finally fires the callback receives the
+    number of intermediate updates that were skipped.
+    """
+    def __init__(self, callback, interval_ms=AUTO_HIGHLIGHT_DELAY_MS):
+        self.callback = callback
+        self.pending = 0
+        self.skipped_total = 0
+        self._timer = DispatcherTimer()
+        self._timer.Interval = System.TimeSpan.FromMilliseconds(interval_ms)
+        self._timer.Tick += self._on_tick
+
+    def schedule(self):
+        self.pending += 1
+        self._timer.Stop()
+        self._timer.Start()
+
+    def cancel(self):
+        self._timer.Stop()
+        self.pending = 0
+
+    def _on_tick(self, sender, e):
+        self._timer.Stop()
+        if not self.pending:
+            return
+        skipped = self.pending - 1
+        self.pending = 0
+        self.skipped_total += skipped
+        self.callback(skipped)
+
+class IdleLoader(object):
+    """Runs a generator in time slices whenever the UI dispatcher is idle
+
+    The generator yields (label, done, total) progress tuples; after every slice on_progress is
+    called with the last one so the window can refresh. cancel() stops the generator,
+    on_finished(completed) runs once either way.
+    """
+    def __init__(self, steps, on_progress=None, on_finished=None, slice_ms=LOAD_SLICE_MS):
+        self.steps = steps
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.slice_ms = slice_ms
+        self.running = False
+        self._timer = DispatcherTimer(DispatcherPriority.Background)
+        self._timer.Interval = System.TimeSpan.Zero
+        self._timer.Tick += self._on_tick
+
+    def start(self):
+        self.running = True
+        self._timer.Start()
+
+    def cancel(self):
+        if self.running:
+            self.steps.close()
+            self._finish(False)
+
+    def _finish(self, completed):
+        self._timer.Stop()
+        self.running = False
+        if self.on_finished:
+            self.on_finished(completed)
+
+    def _on_tick(self, sender, e):
+        if not self.running:
+            return
+        deadline = System.DateTime.Now.AddMilliseconds(self.slice_ms)
+        progress = None
+        try:
+            with TRACER.span("IdleLoader slice", WPF):
+                while System.DateTime.Now < deadline:
+                    progress = next(self.steps)
+        except StopIteration:
+            if progress and self.on_progress:
+                self.on_progress(progress)
+            self._finish(True)
+            return
+        except Exception as ex:
+            script.get_logger().error("Error while loading warning details: {}".format(str(ex)))
+            self._finish(False)
+            return
+        if progress and self.on_progress:
+            self.on_progress(progress)
+
+class WarningItem(WarningRow):
+    """Data class for warnings display - compact row plus Revit element ids on demand"""
+    __slots__ = ()
+
+    @property
+    def _element_ids(self):
+        """ElementIds for highlighting, zoom and section boxes"""
+        return [ElementId(value) for value in self._ids]
+
+class GroupedRowComparer(IComparer):
+    """Grid sort that keeps expanded occurrence rows right below their group
+
+    Groups are ordered by the sorted column, ties keep the load order; occurrence rows follow
+    their group in occurrence order whatever the column says.
+    """
+    def __init__(self, member, descending, group_positions):
+        self.member = member
+        self.sign = -1 if descending else 1
+        self.group_positions = group_positions
+        self._child_order = {}  # group row -> {child row: occurrence index}
+
+    def Compare(self, x, y):
+        group_x = x if x.IsGroup else x.Parent
+        group_y = y if y.IsGroup else y.Parent
+        if group_x is not group_y:
+            result = cmp(getattr(group_x, self.member), getattr(group_y, self.member)) * self.sign
+            return result or cmp(self.group_positions.get(group_x), self.group_positions.get(group_y))
+        if x is y:
+            return 0
+        if x.IsGroup or y.IsGroup:
+            return -1 if x.IsGroup else 1
+        order = self._child_order.get(group_x)
+        if order is None:
+            order = self._child_order[group_x] = dict((child, i) for i, child in enumerate(group_x.Children))
+        return cmp(order.get(x), order.get(y))
 
 class WarningsBrowserWindow(Window):
     """Modal window for enhanced warnings browsing"""
@@ -57,18 +229,49 @@ class WarningsBrowserWindow(Window):
     def __init__(self):
         self.doc = revit.doc
         self.uidoc = revit.uidoc
-        self.highlighted_elements = []
-        self.saved_highlights = []  # Persistent highlights when "Highlight speichern" is enabled
+        self.highlighter = None  # HighlightManager, see SetupHighlighting
+        self.bbox_cache = BoundingBoxCache(revit_box_loader(self.doc, self._get_element))  # Per session
+        self.highlight_debouncer = SelectionDebouncer(self._apply_auto_highlight)
         self.current_override = None
         self.created_3d_views = []  # Track 3D views created by this tool
+        self.element_index = None  # Per-load element info index, see LoadWarnings
+        self.warning_groups = {}  # message -> occurrences from the last LoadWarnings
+        self.templater = MessageTemplater()  # Message -> template, kept across reloads
+        self.warnings_cache = WarningsCache(logger=script.get_logger())
+        self._cache_identity = None  # Set when the loaded state should be written to the cache
+        self._unique_ids = {}
+        # Temporary highlights of this and earlier sessions, also read by the warnings cache
+        document_path = self.doc.PathName or self.doc.Title
+        self.override_ledger = OverrideLedger.load(document_path, ledger_path(document_path),
+                                                   logger=script.get_logger())
+        self._touched_at_load = []  # Ledger ids dropped once the cache is written, see _save_warnings_cache
+        self.loader = None  # IdleLoader filling in element details, see LoadWarnings
+        self._group_rows = []  # Group rows in load order
+        self._info_for = None  # Element info lookup shared by all rows
+        self._last_refresh = None  # Last grid refresh while loading, see _on_load_progress
+        self.filter_index = None  # FilterIndex over the group rows
+        self.element_warnings = ElementWarningIndex()  # Element -> warning occurrences, see LoadWarnings
+        self._visible_groups = None  # Ordinals of group rows passing the filters, None = all
+        self.search_debouncer = SelectionDebouncer(lambda skipped: self.ApplyFilter(), SEARCH_DELAY_MS)
+        self.snapshot_path = None  # Snapshot of this run, see SaveRunSnapshot
+        self.classifier = WarningClassifier(cache_path=taxonomy_cache_path())
+        self.warnings_collection = None  # Rows bound to the grid, expanded in place
+        self._group_positions = {}
+        self._expanded_groups = set()
+        self._row_sort = None  # (member, descending) of the last column sort, see OnGridSorting
 
         # Cache views for performance
         self.cached_floor_plans = []
         self.cached_3d_views = []
-        self._cache_views()
-
-        self.InitializeComponent()
-        self.LoadWarnings()
+        self.visibility_index = None
+        self.view_resolution = None
+        with TRACER.span("_cache_views"):
+            self._cache_views()
+
+        with TRACER.span("InitializeComponent", WPF):
+            self.InitializeComponent()
+        with TRACER.span("LoadWarnings"):
+            self.LoadWarnings()
         self.SetupHighlighting()
 
     def _cache_views(self):
@@ -88,6 +291,17 @@ class WarningsBrowserWindow(Window):
                     self.cached_3d_views.append(view)
         except Exception as ex:
             script.get_logger().error("Error caching views: {}".format(str(ex)))
+
+        # Floor plans are preferred over 3D views, same order as the old per-element scan
+        self.visibility_index = VisibilityIndex(
+            self.doc,
+            self.cached_floor_plans + self.cached_3d_views,
+            max_views=3,
+            logger=script.get_logger()
+        )
+
+        # Level -> best floor plan, used by "Zoom (Alle Ansichten)"
+        self.view_resolution = ViewResolutionIndex(self.cached_floor_plans, logger=script.get_logger())
     
     def InitializeComponent(self):
         """Initialize the WPF interface"""
@@ -99,6 +313,7 @@ class WarningsBrowserWindow(Window):
 
         # Add closing event handler to clear overrides
         self.Closing += self.OnWindowClosing
+        self.Loaded += self.OnWindowLoaded
         
         # Create main grid
         main_grid = Grid()
@@ -110,6 +325,10 @@ class WarningsBrowserWindow(Window):
         header_row = RowDefinition()
         header_row.Height = GridLength(40)
         main_grid.RowDefinitions.Add(header_row)
+
+        filter_row = RowDefinition()
+        filter_row.Height = GridLength(36)
+        main_grid.RowDefinitions.Add(filter_row)
         
         content_row = RowDefinition()
         content_row.Height = GridLength(1, GridUnitType.Star)
@@ -118,6 +337,10 @@ class WarningsBrowserWindow(Window):
         button_row = RowDefinition()
         button_row.Height = GridLength(60)
         main_grid.RowDefinitions.Add(button_row)
+
+        status_row = RowDefinition()
+        status_row.Height = GridLength(28)
+        main_grid.RowDefinitions.Add(status_row)
         
         # Header
         header = TextBlock()
@@ -129,6 +352,66 @@ class WarningsBrowserWindow(Window):
         header.Foreground = SolidColorBrush(Colors.DarkBlue)
         Grid.SetRow(header, 0)
         main_grid.Children.Add(header)
+
+        # Search box and column filters - combined with AND
+        filter_panel = StackPanel()
+        filter_panel.Orientation = System.Windows.Controls.Orientation.Horizontal
+        filter_panel.Margin = System.Windows.Thickness(10, 4, 10, 4)
+
+        search_label = TextBlock()
+        search_label.Text = "Suche:"
+        search_label.VerticalAlignment = System.Windows.VerticalAlignment.Center
+        search_label.Margin = System.Windows.Thickness(0, 0, 5, 0)
+        filter_panel.Children.Add(search_label)
+
+        self.searchBox = TextBox()
+        self.searchBox.Width = 300
+        self.searchBox.VerticalContentAlignment = System.Windows.VerticalAlignment.Center
+        self.searchBox.TextChanged += self.OnSearchTextChanged
+        filter_panel.Children.Add(self.searchBox)
+
+        self.filterCombos = {}
+        for column, label in FILTER_COLUMNS:
+            combo_label = TextBlock()
+            combo_label.Text = label + ":"
+            combo_label.VerticalAlignment = System.Windows.VerticalAlignment.Center
+            combo_label.Margin = System.Windows.Thickness(15, 0, 5, 0)
+            filter_panel.Children.Add(combo_label)
+
+            combo = ComboBox()
+            combo.Width = 160
+            combo.Items.Add(ALL_VALUES)
+            combo.SelectedIndex = 0
+            combo.SelectionChanged += self.OnFilterChanged
+            filter_panel.Children.Add(combo)
+            self.filterCombos[column] = combo
+
+        reset_filter_btn = Button()
+        reset_filter_btn.Content = "Filter zurücksetzen"
+        reset_filter_btn.Margin = System.Windows.Thickness(15, 0, 5, 0)
+        reset_filter_btn.Padding = System.Windows.Thickness(8, 0, 8, 0)
+        reset_filter_btn.Click += RoutedEventHandler(self.ResetFilters)
+        filter_panel.Children.Add(reset_filter_btn)
+
+        # Optional fuzzy grouping - available once the element details are loaded
+        self.templateGroupingCb = CheckBox()
+        self.templateGroupingCb.Content = "Ähnliche Meldungen zusammenfassen"
+        self.templateGroupingCb.IsChecked = False
+        self.templateGroupingCb.IsEnabled = False
+        self.templateGroupingCb.ToolTip = "Meldungen, die sich nur in Zahlen, Namen oder IDs unterscheiden, als eine Gruppe anzeigen"
+        self.templateGroupingCb.Margin = System.Windows.Thickness(15, 0, 5, 0)
+        self.templateGroupingCb.VerticalAlignment = System.Windows.VerticalAlignment.Center
+        self.templateGroupingCb.Checked += RoutedEventHandler(self.OnGroupingModeChanged)
+        self.templateGroupingCb.Unchecked += RoutedEventHandler(self.OnGroupingModeChanged)
+        filter_panel.Children.Add(self.templateGroupingCb)
+
+        self.filterCountText = TextBlock()
+        self.filterCountText.VerticalAlignment = System.Windows.VerticalAlignment.Center
+        self.filterCountText.Margin = System.Windows.Thickness(10, 0, 0, 0)
+        filter_panel.Children.Add(self.filterCountText)
+
+        Grid.SetRow(filter_panel, 1)
+        main_grid.Children.Add(filter_panel)
         
         # DataGrid - has built-in scrolling
         self.dataGrid = DataGrid()
@@ -154,8 +437,11 @@ class WarningsBrowserWindow(Window):
         # Add mouse double-click event for expand/collapse
         self.dataGrid.MouseDoubleClick += MouseButtonEventHandler(self.OnRowDoubleClick)
 
+        # Column sorting that keeps the rows of an expanded group together
+        self.dataGrid.Sorting += self.OnGridSorting
+
         # Add DataGrid directly to grid
-        Grid.SetRow(self.dataGrid, 1)
+        Grid.SetRow(self.dataGrid, 2)
         main_grid.Children.Add(self.dataGrid)
         
         # Button panel
@@ -234,6 +520,24 @@ class WarningsBrowserWindow(Window):
         view_3d_btn.Click += RoutedEventHandler(self.ShowIn3DView)
         button_panel.Children.Add(view_3d_btn)
 
+        # Elements, categories, levels and families behind most warnings
+        hotspot_btn = Button()
+        hotspot_btn.Content = "Hotspots"
+        hotspot_btn.Width = 100
+        hotspot_btn.Height = 30
+        hotspot_btn.Margin = System.Windows.Thickness(5)
+        hotspot_btn.Click += RoutedEventHandler(self.ShowHotspots)
+        button_panel.Children.Add(hotspot_btn)
+
+        # Compare with an earlier snapshot
+        compare_btn = Button()
+        compare_btn.Content = "Vergleich"
+        compare_btn.Width = 100
+        compare_btn.Height = 30
+        compare_btn.Margin = System.Windows.Thickness(5)
+        compare_btn.Click += RoutedEventHandler(self.CompareWithSnapshot)
+        button_panel.Children.Add(compare_btn)
+
         # Export button
         export_btn = Button()
         export_btn.Content = "Export HTML"
@@ -243,8 +547,33 @@ class WarningsBrowserWindow(Window):
         export_btn.Click += RoutedEventHandler(self.ExportToHtml)
         button_panel.Children.Add(export_btn)
         
-        Grid.SetRow(button_panel, 2)
+        Grid.SetRow(button_panel, 3)
         main_grid.Children.Add(button_panel)
+
+        # Status bar - progress of the element details while they are loaded
+        status_panel = StackPanel()
+        status_panel.Orientation = System.Windows.Controls.Orientation.Horizontal
+        status_panel.Margin = System.Windows.Thickness(10, 0, 10, 5)
+
+        self.statusText = TextBlock()
+        self.statusText.Width = 400
+        self.statusText.VerticalAlignment = System.Windows.VerticalAlignment.Center
+        status_panel.Children.Add(self.statusText)
+
+        self.loadProgress = ProgressBar()
+        self.loadProgress.Width = 200
+        self.loadProgress.Height = 14
+        self.loadProgress.Margin = System.Windows.Thickness(5, 0, 5, 0)
+        status_panel.Children.Add(self.loadProgress)
+
+        self.cancelLoadBtn = Button()
+        self.cancelLoadBtn.Content = "Abbrechen"
+        self.cancelLoadBtn.Width = 80
+        self.cancelLoadBtn.Click += RoutedEventHandler(self.CancelLoading)
+        status_panel.Children.Add(self.cancelLoadBtn)
+
+        Grid.SetRow(status_panel, 4)
+        main_grid.Children.Add(status_panel)
         
         self.Content = main_grid
     
@@ -266,6 +595,29 @@ class WarningsBrowserWindow(Window):
         col1.Width = DataGridLength(280)
         self.dataGrid.Columns.Add(col1)
 
+        # Variable parts of grouped messages - only shown when similar messages are merged
+        self.variablesColumn = DataGridTextColumn()
+        self.variablesColumn.Header = "Variable Teile"
+        self.variablesColumn.Binding = Binding("Variables")
+        self.variablesColumn.Width = DataGridLength(180)
+        self.variablesColumn.Visibility = System.Windows.Visibility.Collapsed
+        self.dataGrid.Columns.Add(self.variablesColumn)
+
+        # Severity (sorted by rank, not by label)
+        col_severity = DataGridTextColumn()
+        col_severity.Header = "Schweregrad"
+        col_severity.Binding = Binding("Severity")
+        col_severity.SortMemberPath = "SeverityRank"
+        col_severity.Width = DataGridLength(80)
+        self.dataGrid.Columns.Add(col_severity)
+
+        # Warning type from the taxonomy
+        col_type = DataGridTextColumn()
+        col_type.Header = "Warnungstyp"
+        col_type.Binding = Binding("WarningType")
+        col_type.Width = DataGridLength(100)
+        self.dataGrid.Columns.Add(col_type)
+
         # Occurrence Count
         col2 = DataGridTextColumn()
         col2.Header = "Vorkommen"
@@ -314,150 +666,409 @@ class WarningsBrowserWindow(Window):
         col8.Binding = Binding("Categories")
         col8.Width = DataGridLength(120)
         self.dataGrid.Columns.Add(col8)
+
+        # Suggested fix from the taxonomy
+        col_fix = DataGridTextColumn()
+        col_fix.Header = "Lösungsvorschlag"
+        col_fix.Binding = Binding("SuggestedFix")
+        col_fix.Width = DataGridLength(220)
+        self.dataGrid.Columns.Add(col_fix)
     
     def LoadWarnings(self):
         """Load warnings from the document and group identical warnings"""
-        warnings_collection = ObservableCollection[object]()
-
         try:
-            warnings = self.doc.GetWarnings()
+            # Group warnings by message - element details come from the cache or are
+            # filled in by the IdleLoader once the window is shown
+            warning_groups, complete = self._collect_warnings()
+            self.warning_groups = warning_groups
+            # One bound method for all rows - they format their cells from it on demand
+            self._info_for = self._element_info
+            self._build_rows(complete)
 
-            # Group warnings by message
-            warning_groups = {}
+            script.get_logger().debug("Loaded {} unique warning types from {} total warnings".format(
+                len(warning_groups), sum(len(occurrences) for occurrences in warning_groups.values())))
+            script.get_logger().debug("Classified {} messages ({} regex matches, rest from cache)".format(
+                self.classifier.lookups, self.classifier.matches))
 
-            for warning in warnings:
-                message = warning.GetDescriptionText()
-                element_ids = list(warning.GetFailingElements())
+            if complete:
+                self._on_load_finished(True)
+            else:
+                # Messages and severities are searchable right away, names once loaded
+                self._build_filter_index()
+                # Lookups ahead of the loader (highlight, zoom, 3D view) must not run a view
+                # collector per element - their views are resolved in the batched phase
+                self.element_index.defer_views = True
+                self.loader = IdleLoader(self._enrich_steps(), self._on_load_progress, self._on_load_finished)
+                self.statusText.Text = "{} Warnungstypen - lade Elementdetails...".format(len(warning_groups))
 
-                if not element_ids:
-                    continue
+        except Exception as ex:
+            script.get_logger().error("Error loading warnings: {}".format(str(ex)))
 
-                # Group by message
-                if message not in warning_groups:
-                    warning_groups[message] = []
-
-                warning_groups[message].append({
-                    'element_ids': element_ids,
-                    'warning': warning
-                })
-
-            # Create warning items with occurrence count and children
-            for message, occurrences in warning_groups.items():
-                # Collect all element IDs and info for this warning type
-                all_element_ids = []
-                all_element_info = []
-
-                for occurrence in occurrences:
-                    all_element_ids.extend(occurrence['element_ids'])
-                    for elem_id in occurrence['element_ids']:
-                        info = self.GetElementInfo(elem_id)
-                        all_element_info.append(info)
-
-                # Create grouped warning item (parent)
-                warning_item = WarningItem(
-                    message,
-                    all_element_ids,
-                    all_element_info,
-                    occurrence_count=len(occurrences),
-                    is_group=True
-                )
+    def _build_rows(self, complete):
+        """Bind one group row per message - or per message template when similar messages
+        are merged - to the grid; counts come straight from the grouping"""
+        warnings_collection = ObservableCollection[object]()
+        self._group_positions = {}  # group row -> ordinal while all groups are collapsed
+        self._expanded_groups = set()
+        self._group_rows = []
+        self.element_warnings = ElementWarningIndex()
+
+        by_template = bool(self.templateGroupingCb.IsChecked)
+        if by_template:
+            with TRACER.span("group_by_template"):
+                groups, variants = group_by_template(self.warning_groups, self.templater)
+        else:
+            groups, variants = self.warning_groups, None
+        self.variablesColumn.Visibility = System.Windows.Visibility.Visible if by_template \
+            else System.Windows.Visibility.Collapsed
 
-                # Create child items for each occurrence (only if more than 1)
-                if len(occurrences) > 1:
-                    for i, occurrence in enumerate(occurrences):
-                        child_element_info = []
-                        for elem_id in occurrence['element_ids']:
-                            info = self.GetElementInfo(elem_id)
-                            child_element_info.append(info)
-
-                        child_item = WarningItem(
-                            "  → Occurrence {}".format(i + 1),
-                            occurrence['element_ids'],
-                            child_element_info,
-                            occurrence_count=1,
-                            is_group=False,
-                            parent_item=warning_item
-                        )
-                        warning_item.Children.append(child_item)
-
-                warnings_collection.Add(warning_item)
+        for message, occurrences in groups.items():
+            # Collect all element IDs and info for this warning type
+            all_element_ids = []
+            for i, occurrence in enumerate(occurrences):
+                all_element_ids.extend(element_id_value(eid) for eid in occurrence['element_ids'])
+                self.element_warnings.add(message, i, occurrence['element_ids'])
+
+            # Create grouped warning item (parent)
+            warning_item = WarningItem(
+                message,
+                all_element_ids,
+                self._info_for if complete else None,
+                occurrence_count=len(occurrences),
+                is_group=True
+            )
+            # One classification per unique message text (or template)
+            warning_item.SetClassification(self.classifier.classify(message))
+            if variants is not None:
+                warning_item.SetVariables(variants[message])
 
-            self.dataGrid.ItemsSource = warnings_collection
+            # Child items for each occurrence are only built when the group is expanded
+            if len(occurrences) > 1:
+                warning_item.SetChildFactory(self._make_child_factory(occurrences))
 
-            script.get_logger().debug("Loaded {} unique warning types from {} total warnings".format(
-                len(warning_groups), len(warnings)))
+            self._group_positions[warning_item] = warnings_collection.Count
+            warnings_collection.Add(warning_item)
+            self._group_rows.append(warning_item)
 
+        self.warnings_collection = warnings_collection
+        with TRACER.span("WPF binding", WPF):
+            self.dataGrid.ItemsSource = warnings_collection
+            # Search and filters only change which rows the view shows, never the collection
+            CollectionViewSource.GetDefaultView(warnings_collection).Filter = Predicate[object](self._row_filter)
+            self._apply_row_sort()
+        if by_template:
+            script.get_logger().debug("Merged {} messages into {} templates ({} texts tokenized)".format(
+                len(self.warning_groups), len(groups), self.templater.tokenized))
+
+    def OnGroupingModeChanged(self, sender, e):
+        """Rebuild the rows by message or by template - the element index stays as it is"""
+        if self.loader is not None and self.loader.running:
+            return
+        try:
+            self._build_rows(True)
+            self._build_filter_index()
+            self.statusText.Text = "{} Warnungstypen, {} Warnungen".format(
+                len(self._group_rows), sum(len(occurrences) for occurrences in self.warning_groups.values()))
         except Exception as ex:
-            script.get_logger().error("Error loading warnings: {}".format(str(ex)))
-    
-    def GetElementInfo(self, element_id):
-        """Get detailed information about an element"""
-        info = {
-            'name': 'Unknown',
-            'level': 'N/A',
-            'category': 'N/A',
-            'views': []
-        }
+            script.get_logger().error("Error regrouping warnings: {}".format(str(ex)))
+
+    def _collect_warnings(self):
+        """(warning_groups, complete) - complete when the element index is already filled
+
+        An unchanged document (same version GUID and number of saves, no unsaved changes) is
+        served from the warnings cache without touching the Revit API. Otherwise the warnings
+        are read again and the cached infos of elements that did not change since the cached
+        version are seeded into the index; the rest is loaded by _enrich_steps and the result
+        written back to the cache by _on_load_finished.
+        """
+        logger = script.get_logger()
+        self.element_index = ElementInfoIndex(
+            self.doc,
+            view_resolver=self.visibility_index,
+            logger=logger
+        )
 
+        identity = self._document_identity()
+        self._touched_at_load = self.override_ledger.touched()
+        payload, exact = None, False
         try:
-            element = self.doc.GetElement(element_id)
-            if not element:
-                return info
-
-            # Element name
-            if hasattr(element, 'Name') and element.Name:
-                info['name'] = element.Name
-            else:
-                info['name'] = "ID: {}".format(element_id.IntegerValue)
+            with TRACER.span("WarningsCache.load"):
+                payload, exact = self.warnings_cache.load(identity)
+        except Exception as ex:
+            logger.error("Error reading warnings cache: {}".format(str(ex)))
+
+        if exact:
+            warning_groups, unique_ids = deserialize_groups(payload['groups'], ElementId)
+            self.element_index.seed(cached_elements(payload))
+            logger.debug("Warnings cache hit: {} warning types, {} elements".format(
+                len(warning_groups), len(unique_ids)))
+            return warning_groups, True
+
+        with TRACER.span("GetWarnings"):
+            warning_groups, unique_ids = group_warnings(self.doc.GetWarnings())
+
+        if payload is not None:
+            changed = self._changed_element_ids(payload['identity'].get('version'))
+            if changed is not None:
+                reused = cached_elements(payload, exclude=changed)
+                self.element_index.seed(reused)
+                logger.debug("Warnings cache: reusing {} element infos, {} elements changed".format(
+                    len(reused), len(changed)))
+        self._cache_identity = identity
+        self._unique_ids = unique_ids
+        return warning_groups, False
+
+    def _save_warnings_cache(self):
+        """Write the fully loaded state to the warnings cache"""
+        if self._cache_identity is None:
+            return
+        try:
+            elements = dict((key, self.element_index.get(elem_id)) for key, elem_id in self._unique_ids.items())
+            with TRACER.span("WarningsCache.save"):
+                saved = self.warnings_cache.save(self._cache_identity,
+                                                 serialize_groups(self.warning_groups, element_id_value), elements)
+            if saved:
+                # Views and filters touched before this load count as changed again from now
+                # on - a real edit to one of them must not hide behind an old highlight
+                self.override_ledger.untouch(self._touched_at_load)
+        except Exception as ex:
+            script.get_logger().error("Error writing warnings cache: {}".format(str(ex)))
+        self._cache_identity = None
+
+    def _enrich_steps(self):
+        """Generator run by the IdleLoader: element details group by group, then the views of
+        all elements loaded so far with one collector per view and step"""
+        total = len(self._group_rows)
+        for done, item in enumerate(self._group_rows):
+            self.element_index.build(item._element_ids, resolve_views=False)
+            item.SetElementInfo(self._info_for)
+            yield "Elemente", done + 1, total
+
+        if self.visibility_index is None:
+            return
+        # Highlighting or zooming may look up more elements while the views are resolved
+        while self.element_index.pending_views:
+            needs_views = dict(self.element_index.pending_views)
+            for done, view_total in self.visibility_index.prepare_steps(needs_views):
+                yield "Ansichten", done, view_total
+            # Rows read the info dicts when they render, so filling in the views is enough
+            self.element_index.resolve_views(needs_views)
+
+    def _element_info(self, value):
+        """Row lookup by int id - elements the loader has not reached yet are read on first
+        use, their views are left to the view phase of _enrich_steps"""
+        if value in self.element_index:
+            return self.element_index.get(value)
+        return self.element_index.get(ElementId(value))
+
+    def OnWindowLoaded(self, sender, e):
+        """Start filling in element details once the rows are on screen"""
+        if self.loader is not None:
+            self.loader.start()
+
+    def CancelLoading(self, sender, e):
+        if self.loader is not None:
+            self.loader.cancel()
+
+    def _on_load_progress(self, progress):
+        label, done, total = progress
+        self.loadProgress.Maximum = max(total, 1)
+        self.loadProgress.Value = done
+        self.statusText.Text = "{}: {} / {}".format(label, done, total)
+        now = System.DateTime.Now
+        if self._last_refresh is None or (now - self._last_refresh).TotalMilliseconds >= LOAD_REFRESH_MS:
+            self._last_refresh = now
+            self._refresh_rows()
+
+    def _on_load_finished(self, completed):
+        """Called once all element details are there (or loading was cancelled)"""
+        self.loadProgress.Visibility = System.Windows.Visibility.Collapsed
+        self.cancelLoadBtn.Visibility = System.Windows.Visibility.Collapsed
+        self.templateGroupingCb.IsEnabled = True
+        if completed:
+            self.element_index.defer_views = False
+        else:
+            # Rows the loader did not reach look their elements up on first use
+            for item in self._group_rows:
+                item.SetElementInfo(self._info_for)
+        self._build_filter_index()
+        self._refresh_rows()
+
+        if not completed:
+            # Partial data - neither cached nor snapshotted
+            self._cache_identity = None
+            self.statusText.Text = "Laden abgebrochen - Ansichten der Elemente unvollständig"
+            return
 
-            # Level
-            if hasattr(element, 'LevelId') and element.LevelId != ElementId.InvalidElementId:
-                level_elem = self.doc.GetElement(element.LevelId)
-                if level_elem:
-                    info['level'] = level_elem.Name
-            elif hasattr(element, 'Level') and element.Level:
-                info['level'] = element.Level.Name
+        self.statusText.Text = "{} Warnungstypen, {} Warnungen".format(
+            len(self.warning_groups), sum(len(occurrences) for occurrences in self.warning_groups.values()))
+        self.element_index.log_stats()
+        self._save_warnings_cache()
+        self.SaveRunSnapshot()
 
-            # Category
-            if element.Category:
-                info['category'] = element.Category.Name
+    @TRACER.traced()
+    def _build_filter_index(self):
+        """Index the group rows for search and fill the column filter choices"""
+        try:
+            self.filter_index = FilterIndex(self._group_rows,
+                                            facet_columns=[column for column, _ in FILTER_COLUMNS])
+        except Exception as ex:
+            self.filter_index = None
+            script.get_logger().error("Error building search index: {}".format(str(ex)))
+            return
 
-            # Get one suitable view - optimized
-            view_name = self.GetElementView(element)
-            if view_name:
-                info['views'] = [view_name]
+        for column, combo in self.filterCombos.items():
+            selected = combo.SelectedItem
+            combo.SelectionChanged -= self.OnFilterChanged
+            combo.Items.Clear()
+            combo.Items.Add(ALL_VALUES)
+            for value in self.filter_index.facet_values(column):
+                combo.Items.Add(value)
+            combo.SelectedItem = selected if selected is not None and combo.Items.Contains(selected) else ALL_VALUES
+            combo.SelectionChanged += self.OnFilterChanged
+        self.ApplyFilter()
+
+    def OnSearchTextChanged(self, sender, e):
+        self.search_debouncer.schedule()
+
+    def OnFilterChanged(self, sender, e):
+        self.ApplyFilter()
+
+    def ResetFilters(self, sender, e):
+        self.search_debouncer.cancel()
+        self.searchBox.Text = ""
+        for combo in self.filterCombos.values():
+            combo.SelectedItem = ALL_VALUES
+        self.ApplyFilter()
+
+    def ApplyFilter(self):
+        """Query the filter index and let the grid's collection view hide the other rows"""
+        if self.filter_index is None or self.warnings_collection is None:
+            return
+        text = (self.searchBox.Text or "").strip()
+        filters = dict((column, combo.SelectedItem) for column, combo in self.filterCombos.items()
+                       if combo.SelectedItem is not None and combo.SelectedItem != ALL_VALUES)
 
+        if not text and not filters:
+            self._visible_groups = None
+            self.filterCountText.Text = ""
+        else:
+            self._visible_groups = self.filter_index.matches(text, filters)
+            self.filterCountText.Text = "{} von {} Warnungstypen".format(
+                len(self._visible_groups), len(self.filter_index))
+        CollectionViewSource.GetDefaultView(self.warnings_collection).Refresh()
+
+    def _row_filter(self, item):
+        """Collection view predicate - child rows follow their group"""
+        if self._visible_groups is None:
+            return True
+        group = item if item.IsGroup else item.Parent
+        return self._group_positions.get(group) in self._visible_groups
+
+    def _refresh_rows(self):
+        """Re-read the bound row objects (they are plain objects without change notification)"""
+        try:
+            with TRACER.span("Items.Refresh", WPF):
+                self.dataGrid.Items.Refresh()
         except Exception as ex:
-            script.get_logger().error("Error getting element info for {}: {}".format(element_id.IntegerValue, str(ex)))
+            script.get_logger().debug("Grid refresh skipped: {}".format(str(ex)))
 
-        return info
-    
-    def GetElementView(self, element):
-        """Get one suitable view where element is visible - optimized with cached views"""
+    def _document_identity(self):
+        """Path plus version marker of the document for the warnings cache
+
+        Unsaved changes that only come from the browser's own highlights (overrides and
+        selection filters listed in the override ledger) do not count as modified.
+        """
+        version_guid, number_of_saves = None, None
         try:
-            # First, try floor plan views from cache
-            for view in self.cached_floor_plans:
-                try:
-                    if not element.IsHidden(view):
-                        if not element.Category or not view.GetCategoryHidden(element.Category.Id):
-                            return view.Name
-                except:
-                    continue
+            # Revit 2021+: changes with every save and synchronize
+            version = Document.GetDocumentVersion(self.doc)
+            version_guid, number_of_saves = str(version.VersionGUID), version.NumberOfSaves
+        except Exception:
+            pass
+        is_modified = self.doc.IsModified
+        if is_modified and version_guid is not None:
+            is_modified = self._changed_element_ids(version_guid) != set()
+        return document_identity(self.doc.PathName or self.doc.Title, version_guid,
+                                 number_of_saves, is_modified)
+
+    def _changed_element_ids(self, cached_version):
+        """Int ids of elements created, modified or deleted since the cached version (Revit 2023+)
+
+        Views and selection filters changed by the browser's own highlighting (see
+        OverrideLedger.touched) are left out. None if the changes cannot be determined or
+        if other levels or views were created or changed - their names and visibility are
+        part of the cached info of otherwise unchanged elements.
+        """
+        if not cached_version or not hasattr(self.doc, 'GetChangedElements'):
+            return None
+        try:
+            changes = self.doc.GetChangedElements(System.Guid(cached_version))
+            created = list(changes.GetCreatedElementIds())
+            modified = list(changes.GetModifiedElementIds())
+            deleted = list(changes.GetDeletedElementIds())
+        except Exception as ex:
+            script.get_logger().debug("No change list for cached version: {}".format(str(ex)))
+            return None
 
-            # If not found in floor plans, try 3D views
-            for view in self.cached_3d_views:
-                try:
-                    if not element.IsHidden(view):
-                        if not element.Category or not view.GetCategoryHidden(element.Category.Id):
-                            return view.Name
-                except:
-                    continue
+        own = set(self.override_ledger.touched())
+        changed = set()
+        for elem_id in created + modified:
+            key = element_id_value(elem_id)
+            if key in own:
+                continue
+            if isinstance(self.doc.GetElement(elem_id), (Level, View)):
+                return None
+            changed.add(key)
+        changed.update(key for key in (element_id_value(elem_id) for elem_id in deleted) if key not in own)
+        return changed
+
+    def _make_child_factory(self, occurrences):
+        """Closure that builds the occurrence rows of one group from the element index"""
+        def build_children(parent_item):
+            children = []
+            for i, occurrence in enumerate(occurrences):
+                child = WarningItem(
+                    "  → Occurrence {}".format(i + 1),
+                    [element_id_value(eid) for eid in occurrence['element_ids']],
+                    self._info_for,
+                    occurrence_count=1,
+                    is_group=False,
+                    parent_item=parent_item
+                )
+                # Template groups show each occurrence's own numbers and names
+                child.SetVariables(occurrence.get('variables'))
+                children.append(child)
+            script.get_logger().debug("Materialized {} child rows for '{}'".format(
+                len(children), parent_item.Message))
+            return children
+        return build_children
 
+    def GetElementInfo(self, element_id):
+        """Get detailed information about an element (served from the per-load index)"""
+        if self.element_index is None:
+            self.element_index = ElementInfoIndex(
+                self.doc,
+                view_resolver=self.visibility_index,
+                logger=script.get_logger()
+            )
+        return self.element_index.get(element_id)
+
+    def _get_element(self, element_id):
+        """Element lookup that reuses the index built by LoadWarnings"""
+        if self.element_index is not None:
+            return self.element_index.element(element_id)
+        return self.doc.GetElement(element_id)
+
+    @TRACER.traced()
+    def GetElementView(self, element):
+        """Get the first view where element is visible - answered from the visibility index"""
+        try:
+            return self.visibility_index.first_view(element)
         except Exception as ex:
             script.get_logger().error("Error getting element view: {}".format(str(ex)))
-
         return None
-    
+
     def SetupHighlighting(self):
         """Setup element highlighting graphics with solid red fill"""
         self.current_override = OverrideGraphicSettings()
@@ -491,11 +1102,36 @@ class WarningsBrowserWindow(Window):
 
         # Keep some transparency
         self.current_override.SetSurfaceTransparency(30)
+
+        engine = System.Environment.GetEnvironmentVariable(HIGHLIGHT_ENGINE_ENV)
+        manager = FilterHighlightManager if (engine or "").lower() == "filter" else HighlightManager
+        ledger = self.override_ledger
+        self.highlighter = manager(self.doc, self.current_override, logger=script.get_logger(), ledger=ledger)
+
+        # A ledger left behind means an earlier session did not close cleanly - sweep its overrides
+        if ledger:
+            try:
+                with TRACER.span("Sweep stale overrides"):
+                    swept = self.highlighter.release()
+                script.get_logger().debug("Removed stale highlights from {} view(s) of an earlier session".format(swept))
+            except Exception as ex:
+                script.get_logger().error("Error removing stale highlights: {}".format(str(ex)))
     
     def OnSelectionChanged(self, sender, e):
-        """Handle selection change in the grid"""
+        """Handle selection change in the grid - auto-highlight is debounced"""
         if self.autoHighlightCb.IsChecked:
-            self.HighlightElements(sender, e)
+            self.highlight_debouncer.schedule()
+
+    def _apply_auto_highlight(self, skipped):
+        """Apply the final selection's highlight state once the selection has settled"""
+        script.get_logger().debug("Auto-highlight: {} intermediate updates skipped ({} total)".format(
+            skipped, self.highlight_debouncer.skipped_total))
+        if not self.autoHighlightCb.IsChecked:
+            return
+        if self.dataGrid.SelectedItems.Count == 0:
+            self.ClearHighlights(None, None)
+            return
+        self.HighlightElements(None, None)
 
     def OnRowDoubleClick(self, sender, e):
         """Handle double-click to expand/collapse groups"""
@@ -503,59 +1139,88 @@ class WarningsBrowserWindow(Window):
         if not selected_item or not hasattr(selected_item, 'IsGroup'):
             return
 
-        if selected_item.IsGroup and len(selected_item.Children) > 0:
-            # Toggle expansion
+        if selected_item.IsGroup and selected_item.HasChildren:
+            # Toggle expansion in place - only the group's own rows are touched
+            rows = self.warnings_collection
+            parent_index = self._row_index(selected_item)
+            children = selected_item.Children
             selected_item.IsExpanded = not selected_item.IsExpanded
 
             if selected_item.IsExpanded:
                 # Expand: insert children after parent
-                selected_item.ExpandSymbol = "[-]"
-                items = list(self.dataGrid.ItemsSource)
-                parent_index = items.index(selected_item)
-
-                # Insert children
-                for i, child in enumerate(selected_item.Children):
-                    items.insert(parent_index + 1 + i, child)
-
-                # Update ItemsSource
-                new_collection = ObservableCollection[object]()
-                for item in items:
-                    new_collection.Add(item)
-                self.dataGrid.ItemsSource = new_collection
+                for i, child in enumerate(children):
+                    rows.Insert(parent_index + 1 + i, child)
+                self._expanded_groups.add(selected_item)
 
             else:
-                # Collapse: remove children
-                selected_item.ExpandSymbol = "[+]"
-                items = list(self.dataGrid.ItemsSource)
+                # Collapse: remove the block of children right after the parent
+                for _ in range(len(children)):
+                    rows.RemoveAt(parent_index + 1)
+                self._expanded_groups.discard(selected_item)
 
-                # Remove children
-                items = [item for item in items if item not in selected_item.Children]
-
-                # Update ItemsSource
-                new_collection = ObservableCollection[object]()
-                for item in items:
-                    new_collection.Add(item)
-                self.dataGrid.ItemsSource = new_collection
+            # Re-set the parent row so the grid picks up the new expand symbol
+            rows[parent_index] = selected_item
 
             # Reselect the parent item
             self.dataGrid.SelectedItem = selected_item
 
+    def OnGridSorting(self, sender, e):
+        """Sort the groups by the clicked column - the grid's own sort would move the
+        occurrence rows of expanded groups away from their group"""
+        column = e.Column
+        member = column.SortMemberPath
+        if not member:
+            return
+        e.Handled = True
+        descending = column.SortDirection == ListSortDirection.Ascending
+        for other in self.dataGrid.Columns:
+            other.SortDirection = None
+        column.SortDirection = ListSortDirection.Descending if descending else ListSortDirection.Ascending
+        self._row_sort = (member, descending)
+        self._apply_row_sort()
+
+    def _apply_row_sort(self):
+        """(Re-)apply the last column sort to the bound rows"""
+        if self._row_sort is None or self.warnings_collection is None:
+            return
+        member, descending = self._row_sort
+        CollectionViewSource.GetDefaultView(self.warnings_collection).CustomSort = \
+            GroupedRowComparer(member, descending, self._group_positions)
+
+    def _row_index(self, group_item):
+        """Position of a group row: its ordinal plus the children of expanded groups above it"""
+        index = self._group_positions[group_item]
+        for expanded in self._expanded_groups:
+            if self._group_positions[expanded] < self._group_positions[group_item]:
+                index += len(expanded.Children)
+        return index
+
     def OnWindowClosing(self, sender, e):
         """Clear all overrides when window is closing (except in created 3D views)"""
         script.get_logger().debug("Window closing - clearing overrides in non-3D views")
+        self.highlight_debouncer.cancel()
+        self.search_debouncer.cancel()
+        if self.loader is not None:
+            self.loader.cancel()
 
-        # Only clear highlights if not in a created 3D view
-        active_view_id = self.uidoc.ActiveView.Id
-        is_created_3d_view = any(view_id == active_view_id for view_id in self.created_3d_views)
+        try:
+            self.classifier.save()
+        except Exception as ex:
+            script.get_logger().error("Error saving taxonomy cache: {}".format(str(ex)))
 
-        if is_created_3d_view:
-            script.get_logger().debug("Keeping overrides in created 3D view")
-            # Don't clear, but reset the tracked elements so we don't try to clear them
-            self.highlighted_elements = []
-        else:
-            # Clear highlights in regular views
-            self.ClearHighlights(None, None)
+        # Clear the temporary highlights of every view in one batch - the 3D views created
+        # by the browser keep theirs, saved highlights stay everywhere
+        try:
+            with TRACER.span("Clear highlights"):
+                cleaned = self.highlighter.release(
+                    keep_views=[element_id_value(view_id) for view_id in self.created_3d_views])
+            script.get_logger().debug("Cleared highlights in {} view(s)".format(cleaned))
+        except Exception as ex:
+            script.get_logger().error("Error clearing highlights: {}".format(str(ex)))
+
+        report_trace()
 
+    @TRACER.traced()
     def HighlightElements(self, sender, e):
         """Highlight selected warning elements - supports multiple selection"""
         script.get_logger().debug("HighlightElements called")
@@ -565,149 +1230,102 @@ class WarningsBrowserWindow(Window):
             forms.alert("Bitte wählen Sie eine oder mehrere Warnungen aus der Liste aus.")
             return
 
-        # Collect all element IDs from all selected warnings
-        all_element_ids = []
-        for item in selected_items:
-            all_element_ids.extend(item._element_ids)
-
-        script.get_logger().debug("Total elements from {} selected warnings: {}".format(
-            selected_items.Count, len(all_element_ids)))
-
-        # Clear previous highlights first (only clears temporary ones)
-        self.ClearHighlights(None, None)
-
-        # Perform highlighting in a transaction
-        t = Transaction(self.doc, "Highlight Warning Elements")
-
         try:
-            status = t.Start()
-            if status != TransactionStatus.Started:
-                forms.alert("Konnte Transaktion nicht starten")
-                return
-
             active_view = self.uidoc.ActiveView
-            newly_highlighted = []
+            target = self._visible_targets(selected_items, active_view)
 
-            for elem_id in all_element_ids:
-                try:
-                    element = self.doc.GetElement(elem_id)
-                    if element:
-                        try:
-                            if not element.IsHidden(active_view):
-                                active_view.SetElementOverrides(elem_id, self.current_override)
-                                newly_highlighted.append(elem_id)
-                        except:
-                            # Element might not be visible in current view
-                            pass
-                except Exception as ex:
-                    script.get_logger().error("Error highlighting element {}: {}".format(elem_id.IntegerValue, str(ex)))
-
-            # Add new highlights to the current list
-            for elem_id in newly_highlighted:
-                if elem_id not in self.highlighted_elements:
-                    self.highlighted_elements.append(elem_id)
-
-            # If "Highlight speichern" is checked, add to saved highlights
-            if self.saveHighlightsCb.IsChecked:
-                for elem_id in newly_highlighted:
-                    if elem_id not in self.saved_highlights:
-                        self.saved_highlights.append(elem_id)
-                script.get_logger().debug("Added {} elements to saved highlights (total saved: {})".format(
-                    len(newly_highlighted), len(self.saved_highlights)))
-
-            t.Commit()
-            script.get_logger().debug("Highlighted {} elements (visible in current view)".format(
-                len(newly_highlighted)))
+            script.get_logger().debug("Elements from {} selected warnings visible in current view: {}".format(
+                selected_items.Count, len(target)))
+
+            # One set difference against the current state, applied in one transaction
+            self.highlighter.apply(active_view, target, save=bool(self.saveHighlightsCb.IsChecked))
 
         except Exception as ex:
-            if t.HasStarted() and not t.HasEnded():
-                t.RollBack()
             forms.alert("Fehler beim Markieren: {}".format(str(ex)))
             script.get_logger().error("Error in highlight operation: {}".format(str(ex)))
-    
-    def ClearHighlights(self, sender, e):
-        """Clear all element highlights (respects saved highlights)"""
-        script.get_logger().debug("ClearHighlights called")
 
-        # Determine which elements to clear - only clear temporary highlights, not saved ones
-        elements_to_clear = [elem_id for elem_id in self.highlighted_elements if elem_id not in self.saved_highlights]
+    def _visible_targets(self, selected_items, view):
+        """int id -> ElementId for the selected warnings' elements not hidden in the view"""
+        return self._visible_element_targets(
+            (elem_id for item in selected_items for elem_id in item._element_ids), view)
+
+    def _visible_element_targets(self, element_ids, view):
+        """int id -> ElementId for the given elements not hidden in the view - with the
+        filter engine hidden elements stay in, so there is no IsHidden call per element"""
+        check_hidden = self.highlighter.checks_visibility
+        target = {}
+        checked = set()
+        for elem_id in element_ids:
+            key = elem_id.IntegerValue
+            if key in checked:
+                continue
+            checked.add(key)
+            element = self._get_element(elem_id)
+            if not element:
+                continue
+            if not check_hidden:
+                target[key] = elem_id
+                continue
+            try:
+                if not element.IsHidden(view):
+                    target[key] = elem_id
+            except:
+                # Element might not be visible in current view
+                pass
+        return target
 
-        if not elements_to_clear:
-            script.get_logger().debug("No temporary elements to clear")
-            return
+    def ShowHotspots(self, sender, e):
+        """Rank the elements, categories, levels and families behind most warnings"""
+        script.get_logger().debug("ShowHotspots called")
 
-        t = Transaction(self.doc, "Clear Highlights")
+        if self.loader is not None and self.loader.running:
+            forms.alert("Elementdetails werden noch geladen - bitte warten.")
+            return
 
         try:
-            status = t.Start()
-            if status != TransactionStatus.Started:
-                script.get_logger().error("Could not start clear transaction")
-                return
+            rankings = rank_all(self.element_warnings, self.element_index.get, HOTSPOT_TOP_K)
+            hotspot_window = HotspotWindow(self, rankings)
+            hotspot_window.Owner = self
+            hotspot_window.Show()
+        except Exception as ex:
+            forms.alert("Hotspot Fehler: {}".format(str(ex)))
+            script.get_logger().error("Error ranking hotspots: {}".format(str(ex)))
 
+    def HighlightHotspot(self, hotspot):
+        """Highlight every element of every warning the hotspot takes part in"""
+        try:
             active_view = self.uidoc.ActiveView
-            cleared_count = 0
-
-            for elem_id in elements_to_clear:
-                try:
-                    # Only clear if not in saved highlights
-                    if elem_id not in self.saved_highlights:
-                        active_view.SetElementOverrides(elem_id, OverrideGraphicSettings())
-                        cleared_count += 1
-                except:
-                    pass
-
-            # Remove only cleared elements from highlighted_elements
-            self.highlighted_elements = [elem_id for elem_id in self.highlighted_elements if elem_id in self.saved_highlights]
+            element_ids = self.element_warnings.elements_of(hotspot.refs)
+            target = self._visible_element_targets(element_ids, active_view)
+            script.get_logger().debug("Hotspot '{}': {} warnings, {} of {} elements visible".format(
+                hotspot.name, hotspot.warnings, len(target), len(element_ids)))
+            self.highlighter.apply(active_view, target, save=bool(self.saveHighlightsCb.IsChecked))
+        except Exception as ex:
+            forms.alert("Fehler beim Markieren: {}".format(str(ex)))
+            script.get_logger().error("Error highlighting hotspot: {}".format(str(ex)))
+    
+    def ClearHighlights(self, sender, e):
+        """Clear all element highlights (respects saved highlights)"""
+        script.get_logger().debug("ClearHighlights called")
 
-            t.Commit()
+        try:
+            cleared_count = self.highlighter.clear(self.uidoc.ActiveView)
             script.get_logger().debug("Cleared {} temporary element highlights ({} saved highlights preserved)".format(
-                cleared_count, len(self.saved_highlights)))
-
+                cleared_count, len(self.highlighter.saved_ids())))
         except Exception as ex:
-            if t.HasStarted() and not t.HasEnded():
-                t.RollBack()
             script.get_logger().error("Error clearing highlights: {}".format(str(ex)))
 
     def ClearAllHighlights(self, sender, e):
         """Clear ALL element highlights including saved ones"""
         script.get_logger().debug("ClearAllHighlights called")
 
-        if not self.highlighted_elements and not self.saved_highlights:
-            script.get_logger().debug("No elements to clear")
-            return
-
-        t = Transaction(self.doc, "Clear All Highlights")
-
         try:
-            status = t.Start()
-            if status != TransactionStatus.Started:
-                script.get_logger().error("Could not start clear transaction")
-                return
-
-            active_view = self.uidoc.ActiveView
-            cleared_count = 0
-
-            # Clear all highlighted elements
-            all_to_clear = list(set(self.highlighted_elements + self.saved_highlights))
-            for elem_id in all_to_clear:
-                try:
-                    active_view.SetElementOverrides(elem_id, OverrideGraphicSettings())
-                    cleared_count += 1
-                except:
-                    pass
-
-            # Reset all lists
-            self.highlighted_elements = []
-            self.saved_highlights = []
-
-            t.Commit()
+            cleared_count = self.highlighter.clear_all(self.uidoc.ActiveView)
             script.get_logger().debug("Cleared all {} element highlights (including saved)".format(cleared_count))
-
         except Exception as ex:
-            if t.HasStarted() and not t.HasEnded():
-                t.RollBack()
             script.get_logger().error("Error clearing all highlights: {}".format(str(ex)))
     
+    @TRACER.traced()
     def ZoomToElementsCurrentView(self, sender, e):
         """Zoom to selected elements in current view only"""
         script.get_logger().debug("ZoomToElementsCurrentView called")
@@ -729,7 +1347,7 @@ class WarningsBrowserWindow(Window):
 
             for elem_id in all_element_ids:
                 try:
-                    element = self.doc.GetElement(elem_id)
+                    element = self._get_element(elem_id)
                     if element:
                         try:
                             if not element.IsHidden(active_view):
@@ -761,6 +1379,7 @@ class WarningsBrowserWindow(Window):
             forms.alert("Fehler beim Zoomen: {}".format(str(ex)))
             script.get_logger().error("Error zooming to elements in current view: {}".format(str(ex)))
 
+    @TRACER.traced()
     def ZoomToElements(self, sender, e):
         """Zoom to selected elements - supports multiple selection (may switch views intelligently)"""
         script.get_logger().debug("ZoomToElements called")
@@ -804,56 +1423,22 @@ class WarningsBrowserWindow(Window):
             return None
 
         try:
-            # Get the first element to determine level
-            first_element = self.doc.GetElement(element_ids[0])
+            first_element = self._get_element(element_ids[0])
             if not first_element:
                 return None
 
-            # Try to get the element's level
-            element_level = None
-            level_name = None
-
-            if hasattr(first_element, 'LevelId') and first_element.LevelId != ElementId.InvalidElementId:
-                level_elem = self.doc.GetElement(first_element.LevelId)
-                if level_elem:
-                    element_level = level_elem
-                    level_name = level_elem.Name
-            elif hasattr(first_element, 'Level') and first_element.Level:
-                element_level = first_element.Level
-                level_name = first_element.Level.Name
-
-            script.get_logger().debug("Element level: {}".format(level_name if level_name else "None"))
-
-            # Get all floor plan views
-            floor_plan_views = [v for v in self.cached_floor_plans if not v.IsTemplate]
-
-            if level_name and floor_plan_views:
-                # Try exact match first
-                for view in floor_plan_views:
-                    if view.Name == level_name:
-                        script.get_logger().debug("Found exact match view: {}".format(view.Name))
-                        return view
-
-                # Try partial match (e.g., "OG 3" in "OG 3 - OK FFB")
-                level_parts = level_name.split()
-                for view in floor_plan_views:
-                    view_name = view.Name
-                    # Check if any significant part of level name is in view name
-                    for part in level_parts:
-                        if len(part) >= 2 and part in view_name:
-                            script.get_logger().debug("Found partial match view: {} (matches '{}')".format(
-                                view.Name, part))
-                            return view
-
-                # Try to match by level object
-                if element_level:
-                    for view in floor_plan_views:
-                        try:
-                            if hasattr(view, 'GenLevel') and view.GenLevel and view.GenLevel.Id == element_level.Id:
-                                script.get_logger().debug("Found view by level ID: {}".format(view.Name))
-                                return view
-                        except:
-                            pass
+            # Levels of all selected elements, straight from the element info index
+            levels = []
+            for elem_id in element_ids:
+                info = self.GetElementInfo(elem_id)
+                if info['level_id'] is not None:
+                    levels.append((info['level_id'], info['level']))
+
+            floor_plan_views = self.view_resolution.plans
+
+            view = self.view_resolution.best_plan(levels)
+            if view is not None:
+                return view
 
             # Check if element is visible in current view
             active_view = self.uidoc.ActiveView
@@ -880,8 +1465,9 @@ class WarningsBrowserWindow(Window):
 
         return None
 
+    @TRACER.traced()
     def ShowIn3DView(self, sender, e):
-        """Create a new 3D view with crop box focused on selected warning elements"""
+        """Create 3D views with section boxes focused on the selected warning elements"""
         script.get_logger().debug("ShowIn3DView called")
 
         selected_items = self.dataGrid.SelectedItems
@@ -899,44 +1485,27 @@ class WarningsBrowserWindow(Window):
                 forms.alert("Keine Elemente gefunden.")
                 return
 
-            # Calculate bounding box for all elements
-            min_x = min_y = min_z = float('inf')
-            max_x = max_y = max_z = float('-inf')
-
-            valid_elements = 0
-            for elem_id in all_element_ids:
-                try:
-                    element = self.doc.GetElement(elem_id)
-                    if element and hasattr(element, 'get_BoundingBox'):
-                        bbox = element.get_BoundingBox(None)
-                        if bbox:
-                            min_x = min(min_x, bbox.Min.X)
-                            min_y = min(min_y, bbox.Min.Y)
-                            min_z = min(min_z, bbox.Min.Z)
-                            max_x = max(max_x, bbox.Max.X)
-                            max_y = max(max_y, bbox.Max.Y)
-                            max_z = max(max_z, bbox.Max.Z)
-                            valid_elements += 1
-                except:
-                    pass
-
-            if valid_elements == 0:
+            # Split selections spread over the building into compact clusters, one view each
+            clusters = [all_element_ids]
+            if len(all_element_ids) >= CLUSTER_MIN_ELEMENTS:
+                found = self.bbox_cache.clusters(all_element_ids, max_clusters=MAX_3D_VIEW_CLUSTERS)
+                script.get_logger().debug("Spatial clusters: {}".format([len(c) for c in found]))
+                if len(found) > 1 and forms.alert(
+                        "Die Elemente verteilen sich auf {} Bereiche.\n\n"
+                        "Eine 3D Ansicht pro Bereich erstellen?".format(len(found)), yes=True, no=True):
+                    clusters = found
+
+            boxes = []
+            for cluster in clusters:
+                box = self._section_box(cluster)
+                if box is not None:
+                    boxes.append((cluster, box))
+
+            if not boxes:
                 forms.alert("Konnte keine Bounding Box für die Elemente berechnen.")
                 return
 
-            # Add some padding (10% on each side)
-            padding_x = (max_x - min_x) * 0.1
-            padding_y = (max_y - min_y) * 0.1
-            padding_z = (max_z - min_z) * 0.1
-
-            min_x -= padding_x
-            min_y -= padding_y
-            min_z -= padding_z
-            max_x += padding_x
-            max_y += padding_y
-            max_z += padding_z
-
-            # Start transaction
+            # All views are created in one transaction
             t = Transaction(self.doc, "Create 3D View for Warnings")
             t.Start()
 
@@ -957,51 +1526,61 @@ class WarningsBrowserWindow(Window):
                     t.RollBack()
                     return
 
-                # Create new 3D view
-                new_view = View3D.CreateIsometric(self.doc, view_type_3d.Id)
-
-                # Generate unique name
+                # Generate unique names
                 from System import DateTime
                 timestamp = DateTime.Now.ToString("yyyyMMdd_HHmmss")
-                new_view.Name = "Warnings_3D_{}".format(timestamp)
+                saved_highlights = self.highlighter.saved_ids()
+
+                new_views = []
+                for number, (cluster, box) in enumerate(boxes, 1):
+                    min_x, min_y, min_z, max_x, max_y, max_z = box
+
+                    # Create new 3D view
+                    new_view = View3D.CreateIsometric(self.doc, view_type_3d.Id)
+                    if len(boxes) > 1:
+                        new_view.Name = "Warnings_3D_{}_{}".format(timestamp, number)
+                    else:
+                        new_view.Name = "Warnings_3D_{}".format(timestamp)
 
-                # Create and set crop box
-                crop_box = BoundingBoxXYZ()
-                crop_box.Min = XYZ(min_x, min_y, min_z)
-                crop_box.Max = XYZ(max_x, max_y, max_z)
+                    # Create and set crop box
+                    crop_box = BoundingBoxXYZ()
+                    crop_box.Min = XYZ(min_x, min_y, min_z)
+                    crop_box.Max = XYZ(max_x, max_y, max_z)
 
-                new_view.SetSectionBox(crop_box)
-                new_view.CropBoxActive = True
-                new_view.CropBoxVisible = True
+                    new_view.SetSectionBox(crop_box)
+                    new_view.CropBoxActive = True
+                    new_view.CropBoxVisible = True
 
-                # Apply red overrides to ALL highlighted elements (saved + current) in this view
-                all_highlights = list(set(all_element_ids + self.saved_highlights))
-                for elem_id in all_highlights:
-                    try:
-                        new_view.SetElementOverrides(elem_id, self.current_override)
-                    except:
-                        pass
+                    # Apply red overrides to the cluster's elements and all saved highlights
+                    self.highlighter.mark(new_view, set(cluster + saved_highlights))
+
+                    new_views.append(new_view)
 
                 t.Commit()
 
-                # Track this view so we don't clear overrides when closing
-                self.created_3d_views.append(new_view.Id)
+                # Track these views so we don't clear overrides when closing
+                for new_view in new_views:
+                    self.created_3d_views.append(new_view.Id)
 
-                # Switch to the new view
-                self.uidoc.ActiveView = new_view
+                # Switch to the view of the largest cluster
+                self.uidoc.ActiveView = new_views[0]
 
                 # Select the elements
                 from System.Collections.Generic import List
                 id_list = List[ElementId](all_element_ids)
                 self.uidoc.Selection.SetElementIds(id_list)
 
-                total_highlighted = len(all_highlights)
-                script.get_logger().debug("Created 3D view '{}' with {} elements ({} current + {} saved)".format(
-                    new_view.Name, total_highlighted, len(all_element_ids), len(self.saved_highlights)))
-
-                msg = "3D Ansicht '{}' wurde erstellt.\n\nDie roten Markierungen bleiben in dieser Ansicht erhalten.".format(new_view.Name)
-                if len(self.saved_highlights) > 0:
-                    msg += "\n\nGespeicherte Highlights: {} Elemente".format(len(self.saved_highlights))
+                script.get_logger().debug("Created {} 3D view(s) for {} elements ({} saved highlights)".format(
+                    len(new_views), len(all_element_ids), len(saved_highlights)))
+
+                if len(new_views) > 1:
+                    msg = "{} 3D Ansichten wurden erstellt:\n{}".format(
+                        len(new_views), "\n".join([view.Name for view in new_views]))
+                else:
+                    msg = "3D Ansicht '{}' wurde erstellt.".format(new_views[0].Name)
+                msg += "\n\nDie roten Markierungen bleiben in diesen Ansichten erhalten."
+                if len(saved_highlights) > 0:
+                    msg += "\n\nGespeicherte Highlights: {} Elemente".format(len(saved_highlights))
                 forms.alert(msg)
 
             except Exception as ex:
@@ -1013,13 +1592,28 @@ class WarningsBrowserWindow(Window):
             forms.alert("Fehler beim Erstellen der 3D Ansicht: {}".format(str(ex)))
             script.get_logger().error("Error creating 3D view: {}".format(str(ex)))
 
+    def _section_box(self, element_ids):
+        """Padded section box for a set of elements, None if no element has a bounding box"""
+        # Large selections use a trimmed box so a single stray element does not blow it up
+        if len(element_ids) >= SECTION_BOX_TRIM_MIN_ELEMENTS:
+            box = self.bbox_cache.trimmed_union(element_ids, SECTION_BOX_OUTLIER_THRESHOLD)
+        else:
+            box = self.bbox_cache.union(element_ids)
+        if box is None:
+            return None
+
+        # Add some padding (10% on each side)
+        return pad_box(box, 0.1)
+
+    @TRACER.traced()
     def ExportToHtml(self, sender, e):
         """Export warnings to HTML file"""
         script.get_logger().debug("ExportToHtml called")
 
         try:
             save_dialog = WinForms.SaveFileDialog()
-            save_dialog.Filter = "HTML files (*.html)|*.html"
+            save_dialog.Filter = "HTML files (*.html)|*.html|Komprimiertes HTML (*.html.gz)|*.html.gz|" \
+                                 "Interaktives HTML (*.html)|*.html"
             save_dialog.DefaultExt = "html"
             save_dialog.FileName = "Enhanced_Warnings_{}.html".format(
                 self.doc.Title.replace(" ", "_")
@@ -1029,94 +1623,261 @@ class WarningsBrowserWindow(Window):
             script.get_logger().debug("SaveDialog result: {}".format(result))
 
             if result == WinForms.DialogResult.OK:
-                self.CreateHtmlReport(save_dialog.FileName)
-                forms.alert("Export erfolgreich: {}".format(save_dialog.FileName))
+                file_path = save_dialog.FileName
+                if save_dialog.FilterIndex == 3:
+                    # One small file with all rows and occurrences - no paging needed
+                    self.CreateInteractiveReport(file_path)
+                    forms.alert("Export erfolgreich: {}".format(file_path))
+                    return
+                if save_dialog.FilterIndex == 2 and not file_path.lower().endswith(".gz"):
+                    file_path += ".gz"
+
+                page_size = None
+                if len(self._group_positions) > HTML_PAGE_SIZE:
+                    if forms.alert("Der Report enthält {} Warnungen.\n\nIn Seiten zu je {} Warnungen aufteilen?".format(
+                            len(self._group_positions), HTML_PAGE_SIZE), yes=True, no=True):
+                        page_size = HTML_PAGE_SIZE
+
+                paths = self.CreateHtmlReport(file_path, page_size=page_size)
+                if len(paths) > 1:
+                    forms.alert("Export erfolgreich: {} Seiten\n{}".format(len(paths), paths[0]))
+                else:
+                    forms.alert("Export erfolgreich: {}".format(file_path))
 
         except Exception as ex:
             forms.alert("Export Fehler: {}".format(str(ex)))
             script.get_logger().error("Error exporting to HTML: {}".format(str(ex)))
     
-    def CreateHtmlReport(self, file_path):
-        """Create HTML report"""
-        html_template = """<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Enhanced Warnings Report - {project}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-        h1 {{ color: #2c5aa0; text-align: center; }}
-        .header {{ text-align: center; margin-bottom: 20px; }}
-        table {{ border-collapse: collapse; width: 100%; }}
-        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-        th {{ background-color: #2c5aa0; color: white; }}
-        tr:nth-child(even) {{ background-color: #f9f9f9; }}
-        .warning-msg {{ max-width: 300px; word-wrap: break-word; }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>Enhanced Warnings Report</h1>
-        <p><strong>Projekt:</strong> {project}</p>
-        <p><strong>Erstellt:</strong> {date}</p>
-        <p><strong>ICL Ingenieur Consult GmbH</strong></p>
-    </div>
-    <table>
-        <thead>
-            <tr>
-                <th>Nr.</th>
-                <th>Fehlermeldung</th>
-                <th>Anzahl</th>
-                <th>Element IDs</th>
-                <th>Elementnamen</th>
-                <th>Ebenen</th>
-                <th>Ansichten</th>
-                <th>Kategorien</th>
-            </tr>
-        </thead>
-        <tbody>
-            {rows}
-        </tbody>
-    </table>
-</body>
-</html>"""
-        
-        # Generate table rows
-        rows = ""
-        for i, item in enumerate(self.dataGrid.ItemsSource, 1):
-            rows += "<tr>"
-            rows += "<td>{}</td>".format(i)
-            rows += "<td class='warning-msg'>{}</td>".format(self.escape_html(item.Message))
-            rows += "<td>{}</td>".format(item.ElementCount)
-            rows += "<td>{}</td>".format(self.escape_html(item.ElementIds))
-            rows += "<td>{}</td>".format(self.escape_html(item.ElementNames))
-            rows += "<td>{}</td>".format(self.escape_html(item.Levels))
-            rows += "<td>{}</td>".format(self.escape_html(item.Views))
-            rows += "<td>{}</td>".format(self.escape_html(item.Categories))
-            rows += "</tr>"
-        
+    def CreateHtmlReport(self, file_path, page_size=None, use_gzip=None):
+        """Create HTML report - rows are streamed to disk in chunks"""
         from System import DateTime
         current_time = DateTime.Now.ToString("dd.MM.yyyy HH:mm:ss")
-        
-        final_html = html_template.format(
+
+        paths = write_html_report(
+            file_path,
+            self.dataGrid.ItemsSource,
             project=self.doc.Title,
             date=current_time,
-            rows=rows
+            use_gzip=use_gzip,
+            page_size=page_size
         )
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(final_html)
+
+        if self.element_index is not None:
+            self.element_index.log_stats("Element info index after HTML export")
+        return paths
     
+    @TRACER.traced()
+    def CreateInteractiveReport(self, file_path):
+        """Self-contained report: snapshot data embedded compressed, rows rendered in the browser"""
+        from System import DateTime
+        snapshot = build_snapshot(self.warning_groups, self.element_index,
+                                  model=self.doc.Title, path=self.doc.PathName)
+        return write_interactive_report(
+            file_path,
+            snapshot,
+            project=self.doc.Title,
+            date=DateTime.Now.ToString("dd.MM.yyyy HH:mm:ss"),
+            classify=self.classifier.classify
+        )
+
+    @TRACER.traced()
+    def SaveRunSnapshot(self):
+        """Store a compact columnar snapshot of this run for later comparisons"""
+        self.snapshot_path = None
+        try:
+            folder = snapshot_dir(self.doc.Title)
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            snapshot = build_snapshot(self.warning_groups, self.element_index,
+                                      model=self.doc.Title, path=self.doc.PathName)
+            file_name = "{}.columnar.json".format(snapshot['created'].replace(':', '').replace('-', ''))
+            self.snapshot_path = write_snapshot(snapshot, os.path.join(folder, file_name), 'columnar')
+            script.get_logger().debug("Saved warning snapshot: {}".format(self.snapshot_path))
+            append_history(snapshot)
+        except Exception as ex:
+            script.get_logger().error("Error saving warning snapshot: {}".format(str(ex)))
+
+    def CompareWithSnapshot(self, sender, e):
+        """Diff the snapshot of this run against an earlier one"""
+        script.get_logger().debug("CompareWithSnapshot called")
+
+        if not self.snapshot_path:
+            forms.alert("Für diesen Lauf wurde kein Snapshot gespeichert.")
+            return
+
+        try:
+            open_dialog = WinForms.OpenFileDialog()
+            open_dialog.Filter = "Warnungs-Snapshots (*.json;*.jsonl;*.csv)|*.json;*.jsonl;*.csv"
+            open_dialog.InitialDirectory = snapshot_dir(self.doc.Title)
+
+            if open_dialog.ShowDialog() == WinForms.DialogResult.OK:
+                diff = diff_files(open_dialog.FileName, self.snapshot_path)
+                forms.alert("Vergleich mit {}\n\n{}".format(
+                    os.path.basename(open_dialog.FileName), summarize(diff)))
+
+        except Exception as ex:
+            forms.alert("Vergleich Fehler: {}".format(str(ex)))
+            script.get_logger().error("Error comparing snapshots: {}".format(str(ex)))
+
     def escape_html(self, text):
         """Escape HTML characters"""
-        if not text:
-            return ""
-        return str(text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        return escape_html(text)
+
+class HotspotRow(object):
+    """Data class for one hotspot ranking row"""
+    def __init__(self, hotspot):
+        self.Rank = hotspot.rank
+        self.Name = hotspot.name
+        self.Warnings = hotspot.warnings
+        self.Elements = hotspot.elements
+        self.hotspot = hotspot
+
+class HotspotWindow(Window):
+    """Top-k rankings by element, category, level and family - double-click highlights"""
+
+    def __init__(self, browser, rankings):
+        self.browser = browser
+        self.rankings = rankings
+        self.Title = "Warnungs-Hotspots"
+        self.Width = 600
+        self.Height = 500
+        self.WindowStartupLocation = System.Windows.WindowStartupLocation.CenterOwner
+
+        from System.Windows.Controls import DockPanel, Dock
+
+        panel = DockPanel()
+
+        top_panel = StackPanel()
+        top_panel.Orientation = System.Windows.Controls.Orientation.Horizontal
+        top_panel.Margin = System.Windows.Thickness(10)
+
+        self.kindCombo = ComboBox()
+        self.kindCombo.Width = 160
+        for _, label in HOTSPOT_KINDS:
+            self.kindCombo.Items.Add(label)
+        self.kindCombo.SelectionChanged += self.OnKindChanged
+        top_panel.Children.Add(self.kindCombo)
+
+        highlight_btn = Button()
+        highlight_btn.Content = "Markieren"
+        highlight_btn.Width = 100
+        highlight_btn.Margin = System.Windows.Thickness(10, 0, 0, 0)
+        highlight_btn.Click += RoutedEventHandler(self.HighlightSelected)
+        top_panel.Children.Add(highlight_btn)
+
+        export_btn = Button()
+        export_btn.Content = "Export CSV"
+        export_btn.Width = 100
+        export_btn.Margin = System.Windows.Thickness(10, 0, 0, 0)
+        export_btn.Click += RoutedEventHandler(self.ExportCsv)
+        top_panel.Children.Add(export_btn)
+
+        DockPanel.SetDock(top_panel, Dock.Top)
+        panel.Children.Add(top_panel)
+
+        self.grid = DataGrid()
+        self.grid.AutoGenerateColumns = False
+        self.grid.IsReadOnly = True
+        self.grid.SelectionMode = System.Windows.Controls.DataGridSelectionMode.Single
+        self.grid.HeadersVisibility = System.Windows.Controls.DataGridHeadersVisibility.Column
+        for header, path, width in [("Rang", "Rank", 50), ("Name", "Name", 300),
+                                    ("Warnungen", "Warnings", 90), ("Elemente", "Elements", 80)]:
+            column = DataGridTextColumn()
+            column.Header = header
+            column.Binding = Binding(path)
+            column.Width = DataGridLength(width)
+            self.grid.Columns.Add(column)
+        self.grid.MouseDoubleClick += MouseButtonEventHandler(self.HighlightSelected)
+        panel.Children.Add(self.grid)
+
+        self.Content = panel
+        self.kindCombo.SelectedIndex = 0
+
+    def OnKindChanged(self, sender, e):
+        kind = HOTSPOT_KINDS[self.kindCombo.SelectedIndex][0]
+        rows = ObservableCollection[object]()
+        for hotspot in self.rankings.get(kind, []):
+            rows.Add(HotspotRow(hotspot))
+        self.grid.ItemsSource = rows
+
+    def HighlightSelected(self, sender, e):
+        row = self.grid.SelectedItem
+        if row is None:
+            return
+        self.browser.HighlightHotspot(row.hotspot)
+
+    def ExportCsv(self, sender, e):
+        try:
+            save_dialog = WinForms.SaveFileDialog()
+            save_dialog.Filter = "CSV files (*.csv)|*.csv"
+            save_dialog.FileName = "Warnungs_Hotspots_{}.csv".format(
+                System.DateTime.Now.ToString("yyyyMMdd_HHmmss"))
+            if save_dialog.ShowDialog() == WinForms.DialogResult.OK:
+                write_hotspots_csv(self.rankings, save_dialog.FileName)
+                forms.alert("Hotspots exportiert: {}".format(save_dialog.FileName))
+        except Exception as ex:
+            forms.alert("Export Fehler: {}".format(str(ex)))
+            script.get_logger().error("Error exporting hotspots: {}".format(str(ex)))
+
+def report_trace():
+    """Write the Chrome trace and print the timing table (only when tracing is enabled)"""
+    if not TRACER.enabled:
+        return None
+    try:
+        file_path = TRACER.write_chrome_trace(os.path.join(
+            default_trace_dir(), "warnings_{}.json".format(System.DateTime.Now.ToString("yyyyMMdd_HHmmss"))))
+        output = script.get_output()
+        output.print_table(
+            table_data=TRACER.summary_rows(),
+            columns=["Span", "Kategorie", "Anzahl", "Summe ms", "Mittel ms", "Max ms"],
+            title="Enhanced Warnings Browser - Laufzeiten"
+        )
+        print("Chrome Trace (chrome://tracing): {}".format(file_path))
+        return file_path
+    except Exception as ex:
+        script.get_logger().error("Error writing trace: {}".format(str(ex)))
+    return None
+
+def append_history(snapshot):
+    """Add a run to the warnings history database (skipped where sqlite3 is missing)"""
+    if not history.AVAILABLE:
+        script.get_logger().debug("Warnings history skipped - sqlite3 not available")
+        return None
+    try:
+        with history.HistoryStore() as store:
+            return store.append(snapshot)
+    except Exception as ex:
+        script.get_logger().error("Error writing warnings history: {}".format(str(ex)))
+    return None
+
+def run_headless_export(doc, output_dir):
+    """Write warning snapshots without opening the window"""
+    formats_env = System.Environment.GetEnvironmentVariable(SNAPSHOT_FORMATS_ENV)
+    formats = [fmt.strip() for fmt in formats_env.split(",") if fmt.strip()] if formats_env else SNAPSHOT_FORMATS
+
+    views = FilteredElementCollector(doc).OfClass(View).WhereElementIsNotElementType().ToElements()
+    plans = [v for v in views if not v.IsTemplate and v.ViewType == ViewType.FloorPlan]
+    views_3d = [v for v in views if not v.IsTemplate and v.ViewType == ViewType.ThreeD]
+    visibility_index = VisibilityIndex(doc, plans + views_3d, max_views=3, logger=script.get_logger())
+
+    snapshot = collect_snapshot(doc, view_resolver=visibility_index, logger=script.get_logger())
+    paths = export_snapshot(snapshot, output_dir, formats)
+    append_history(snapshot)
+    script.get_logger().info("Exported {} warning occurrences to {}".format(
+        len(snapshot['records']), ", ".join(paths)))
+    return paths
 
 # Main execution
 try:
+    export_dir = System.Environment.GetEnvironmentVariable(SNAPSHOT_DIR_ENV)
+    TRACER.enable(bool(System.Environment.GetEnvironmentVariable(TRACE_ENV)) or
+                  bool(globals().get('__shiftclick__')))
     if not revit.doc:
         forms.alert("Kein aktives Revit Dokument gefunden.")
+    elif export_dir:
+        with TRACER.span("run_headless_export"):
+            run_headless_export(revit.doc, export_dir)
+        report_trace()
     else:
         # Show the warnings browser window as modal
         window = WarningsBrowserWindow()
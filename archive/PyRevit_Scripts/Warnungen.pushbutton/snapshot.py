@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Machine-readable warning snapshots for the Enhanced Warnings Browser
+Builds one record per warning occurrence from the LoadWarnings grouping and the element
+info index, and writes it as JSON Lines, CSV or a dictionary-encoded columnar JSON file.
+No clr imports - works headless and outside of Revit.
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+from warnings_data import group_warnings, ElementInfoIndex, element_id_value
+
+SNAPSHOT_VERSION = 1
+FORMATS = ('jsonl', 'csv', 'columnar')
+CSV_COLUMNS = ['message', 'occurrence', 'element_ids', 'names', 'levels', 'categories', 'views']
+
+
+def build_snapshot(warning_groups, element_index, model=None, path=None, created=None):
+    """Snapshot dict from grouped warnings (see warnings_data.group_warnings)"""
+    records = []
+    for message, occurrences in warning_groups.items():
+        for number, occurrence in enumerate(occurrences, 1):
+            ids = occurrence['element_ids']
+            infos = element_index.infos(ids)
+            records.append({
+                'message': message,
+                'occurrence': number,
+                'element_ids': [element_id_value(eid) for eid in ids],
+                'names': [info['name'] for info in infos],
+                'levels': [info['level'] for info in infos],
+                'categories': [info['category'] for info in infos],
+                'views': [view for info in infos for view in info['views']]
+            })
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'model': model,
+        'path': path,
+        'created': created or datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        'records': records
+    }
+
+
+def collect_snapshot(doc, view_resolver=None, logger=None):
+    """Group the document's warnings and build a snapshot without any UI"""
+    warning_groups, unique_ids = group_warnings(doc.GetWarnings())
+    element_index = ElementInfoIndex(doc, view_resolver=view_resolver, logger=logger)
+    element_index.build(unique_ids.values())
+    return build_snapshot(
+        warning_groups,
+        element_index,
+        model=getattr(doc, 'Title', None),
+        path=getattr(doc, 'PathName', None)
+    )
+
+
+def _header(snapshot):
+    return dict((key, snapshot.get(key)) for key in ('version', 'model', 'path', 'created'))
+
+
+def _open_text(file_path, mode='w'):
+    return io.open(file_path, mode, encoding='utf-8', newline='')
+
+
+def _json_line(value):
+    text = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    if not isinstance(text, type(u"")):
+        text = text.decode('utf-8')
+    return text + u"\n"
+
+
+def write_jsonl(snapshot, file_path):
+    """Header line followed by one JSON object per warning occurrence"""
+    with _open_text(file_path) as f:
+        f.write(_json_line(dict(_header(snapshot), type='header')))
+        for record in snapshot['records']:
+            f.write(_json_line(record))
+
+
+def _json_cell(values):
+    """List column as a JSON array - names may contain any separator"""
+    return _json_line(values)[:-1]
+
+
+def write_csv(snapshot, file_path):
+    """One row per warning occurrence, list columns as JSON arrays"""
+    with _open_text(file_path) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for record in snapshot['records']:
+            writer.writerow([
+                record['message'],
+                record['occurrence'],
+                _json_cell(record['element_ids']),
+                _json_cell(record['names']),
+                _json_cell(record['levels']),
+                _json_cell(record['categories']),
+                _json_cell(record['views'])
+            ])
+
+
+class _Dictionary(object):
+    """String -> code table for dictionary-encoded columns"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+
+def to_columnar(snapshot):
+    """Columnar layout: one array per column, strings dictionary-encoded
+
+    Per-element columns (element_id, name, level, category) are flattened and sliced by
+    element_offsets: occurrence i owns element_offsets[i]:element_offsets[i + 1].
+    """
+    messages, levels, categories, names = _Dictionary(), _Dictionary(), _Dictionary(), _Dictionary()
+    columns = {
+        'message': [], 'occurrence': [], 'element_offsets': [0],
+        'element_id': [], 'name': [], 'level': [], 'category': []
+    }
+
+    for record in snapshot['records']:
+        columns['message'].append(messages.encode(record['message']))
+        columns['occurrence'].append(record['occurrence'])
+        columns['element_id'].extend(record['element_ids'])
+        columns['name'].extend([names.encode(value) for value in record['names']])
+        columns['level'].extend([levels.encode(value) for value in record['levels']])
+        columns['category'].extend([categories.encode(value) for value in record['categories']])
+        columns['element_offsets'].append(len(columns['element_id']))
+
+    return {
+        'header': _header(snapshot),
+        'dictionaries': {
+            'message': messages.values,
+            'name': names.values,
+            'level': levels.values,
+            'category': categories.values
+        },
+        'columns': columns
+    }
+
+
+def from_columnar(data):
+    """Rebuild a snapshot dict from to_columnar output (views are not stored)"""
+    dictionaries = data['dictionaries']
+    columns = data['columns']
+    offsets = columns['element_offsets']
+    records = []
+    for row, code in enumerate(columns['message']):
+        start, end = offsets[row], offsets[row + 1]
+        records.append({
+            'message': dictionaries['message'][code],
+            'occurrence': columns['occurrence'][row],
+            'element_ids': columns['element_id'][start:end],
+            'names': [dictionaries['name'][c] for c in columns['name'][start:end]],
+            'levels': [dictionaries['level'][c] for c in columns['level'][start:end]],
+            'categories': [dictionaries['category'][c] for c in columns['category'][start:end]],
+            'views': []
+        })
+    snapshot = dict(data['header'])
+    snapshot['records'] = records
+    return snapshot
+
+
+def write_columnar(snapshot, file_path):
+    with _open_text(file_path) as f:
+        f.write(_json_line(to_columnar(snapshot)))
+
+
+def read_jsonl(file_path):
+    snapshot = {'records': []}
+    with io.open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            value = json.loads(line)
+            if value.get('type') == 'header':
+                value.pop('type')
+                snapshot.update(value)
+            else:
+                snapshot['records'].append(value)
+    return snapshot
+
+
+def read_csv(file_path):
+    def split(value):
+        return json.loads(value) if value else []
+
+    records = []
+    with _open_text(file_path, 'r') as f:
+        for row in csv.DictReader(f):
+            records.append({
+                'message': row['message'],
+                'occurrence': int(row['occurrence']),
+                'element_ids': [int(eid) for eid in split(row['element_ids'])],
+                'names': split(row['names']),
+                'levels': split(row['levels']),
+                'categories': split(row['categories']),
+                'views': split(row['views'])
+            })
+    return {'version': SNAPSHOT_VERSION, 'model': None, 'path': None, 'created': None, 'records': records}
+
+
+def read_columnar(file_path):
+    with io.open(file_path, 'r', encoding='utf-8') as f:
+        return from_columnar(json.load(f))
+
+
+def read_snapshot(file_path, fmt=None):
+    """Load a snapshot written by write_snapshot"""
+    fmt = fmt or snapshot_format(file_path)
+    if fmt == 'csv':
+        return read_csv(file_path)
+    if fmt == 'columnar':
+        return read_columnar(file_path)
+    return read_jsonl(file_path)
+
+
+def snapshot_dir(model=None):
+    """Default folder for per-run snapshots (%APPDATA%\\BIMKraft\\WarningsSnapshots\\<model>)"""
+    root = os.path.join(os.environ.get('APPDATA') or os.path.expanduser('~'), 'BIMKraft', 'WarningsSnapshots')
+    if model:
+        root = os.path.join(root, model.replace(' ', '_'))
+    return root
+
+
+def snapshot_format(file_path):
+    """Format name from a file extension"""
+    name = file_path.lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith('.columnar.json') or name.endswith('.cols.json'):
+        return 'columnar'
+    return 'jsonl'
+
+
+def write_snapshot(snapshot, file_path, fmt=None):
+    fmt = fmt or snapshot_format(file_path)
+    if fmt == 'csv':
+        write_csv(snapshot, file_path)
+    elif fmt == 'columnar':
+        write_columnar(snapshot, file_path)
+    elif fmt == 'jsonl':
+        write_jsonl(snapshot, file_path)
+    else:
+        raise ValueError("Unknown snapshot format: {}".format(fmt))
+    return file_path
+
+
+def export_snapshot(snapshot, output_dir, formats=('jsonl', 'csv', 'columnar')):
+    """Write a snapshot in several formats; file names are <model>_<timestamp>.<ext>"""
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    stamp = snapshot['created'].replace(':', '').replace('-', '')
+    base = u"{}_{}".format((snapshot.get('model') or 'model').replace(' ', '_'), stamp)
+    extensions = {'jsonl': '.jsonl', 'csv': '.csv', 'columnar': '.columnar.json'}
+    paths = []
+    for fmt in formats:
+        paths.append(write_snapshot(snapshot, os.path.join(output_dir, base + extensions[fmt]), fmt))
+    return paths
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Diff of two warning snapshots (see snapshot.py)
+A warning is identified by its message plus the sorted tuple of failing element ids, so the
+comparison is a pair of hash lookups per record - linear in the size of both snapshots.
+Runs without Revit:  python snapshot_diff.py before.jsonl after.jsonl
+"""
+
+import argparse
+import json
+import sys
+
+from snapshot import read_snapshot
+
+
+def warning_key(record):
+    """(message, sorted element ids) - stable across runs and element order"""
+    return (record['message'], tuple(sorted(record['element_ids'])))
+
+
+def _same_details(before, after):
+    """Same names, levels and categories - compared in place, no tuples per record"""
+    return (before.get('names') == after.get('names') and before.get('levels') == after.get('levels')
+            and before.get('categories') == after.get('categories'))
+
+
+def _index(records):
+    """warning key -> record, or list of records for keys that occur more than once"""
+    index = {}
+    for record in records:
+        key = warning_key(record)
+        found = index.get(key)
+        if found is None:
+            index[key] = record
+        elif isinstance(found, list):
+            found.append(record)
+        else:
+            index[key] = [found, record]
+    return index
+
+
+def _message_counts(records):
+    counts = {}
+    for record in records:
+        message = record['message']
+        counts[message] = counts.get(message, 0) + 1
+    return counts
+
+
+def _records(found):
+    if found is None:
+        return ()
+    return found if isinstance(found, list) else (found,)
+
+
+def diff_snapshots(before, after):
+    """Compare two snapshot dicts
+
+    Returns a dict with
+    - new:       records only present in `after`
+    - resolved:  records only present in `before`
+    - changed:   (before, after) record pairs with the same key whose names, levels or
+                 categories differ
+    - unchanged: number of records present in both without changes
+    - messages:  message -> (count before, count after) for every message whose count changed
+    """
+    before_index = _index(before['records'])
+    after_index = _index(after['records'])
+
+    new, resolved, changed = [], [], []
+    unchanged = 0
+
+    for key, found in after_index.items():
+        before_found = before_index.get(key)
+        if before_found is not None and type(found) is not list and type(before_found) is not list:
+            # The common case: the warning occurs once in both snapshots
+            if _same_details(before_found, found):
+                unchanged += 1
+            else:
+                changed.append((before_found, found))
+            continue
+        before_records = _records(before_found)
+        for position, record in enumerate(_records(found)):
+            if position >= len(before_records):
+                new.append(record)
+            elif not _same_details(before_records[position], record):
+                changed.append((before_records[position], record))
+            else:
+                unchanged += 1
+
+    for key, found in before_index.items():
+        after_found = after_index.get(key)
+        if after_found is None and type(found) is not list:
+            resolved.append(found)
+            continue
+        before_records = _records(found)
+        surplus = len(before_records) - len(_records(after_found))
+        if surplus > 0:
+            resolved.extend(before_records[-surplus:])
+
+    before_counts = _message_counts(before['records'])
+    after_counts = _message_counts(after['records'])
+    messages = {}
+    for message in set(before_counts) | set(after_counts):
+        pair = (before_counts.get(message, 0), after_counts.get(message, 0))
+        if pair[0] != pair[1]:
+            messages[message] = pair
+
+    return {
+        'new': new,
+        'resolved': resolved,
+        'changed': changed,
+        'unchanged': unchanged,
+        'messages': messages
+    }
+
+
+def summarize(diff):
+    """Short text summary (German, as shown in the browser)"""
+    lines = [
+        "Neu: {}".format(len(diff['new'])),
+        "Behoben: {}".format(len(diff['resolved'])),
+        "Geändert: {}".format(len(diff['changed'])),
+        "Unverändert: {}".format(diff['unchanged'])
+    ]
+    top = sorted(diff['messages'].items(), key=lambda item: abs(item[1][1] - item[1][0]), reverse=True)[:10]
+    if top:
+        lines.append("")
+        for message, (count_before, count_after) in top:
+            lines.append("{:+d}  {}".format(count_after - count_before, message))
+    return "\n".join(lines)
+
+
+def diff_files(before_path, after_path):
+    return diff_snapshots(read_snapshot(before_path), read_snapshot(after_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two warning snapshots")
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--json', dest='json_path', help="write the full diff as JSON")
+    args = parser.parse_args(argv)
+
+    diff = diff_files(args.before, args.after)
+    print(summarize(diff))
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(dict(diff, changed=[{'before': b, 'after': a} for b, a in diff['changed']],
+                           messages=dict((m, list(c)) for m, c in diff['messages'].items())), f)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
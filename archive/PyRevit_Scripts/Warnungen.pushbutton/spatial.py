@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+Bounding box aggregation and spatial clustering for the Enhanced Warnings Browser
+Element boxes are cached once per session in a flat array (6 doubles per element) and
+unions are computed over the whole selection in one pass - with NumPy when it is available
+(CPython engine), with a plain array('d') loop otherwise (IronPython). Selections spread
+over the whole building can be split into compact clusters (grid hash or k-means) that get
+one section box each.
+No clr imports - the Revit lookup is passed in as a callable.
+"""
+
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from tracing import TRACER
+
+# Box layout inside the flat array
+MIN_X, MIN_Y, MIN_Z, MAX_X, MAX_Y, MAX_Z = range(6)
+
+
+def revit_box_loader(doc, get_element=None):
+    """Loader for BoundingBoxCache: element id -> (min_x, min_y, min_z, max_x, max_y, max_z) or None"""
+    get_element = get_element or doc.GetElement
+
+    def load(element_id):
+        element = get_element(element_id)
+        if not element or not hasattr(element, 'get_BoundingBox'):
+            return None
+        with TRACER.api("get_BoundingBox"):
+            bbox = element.get_BoundingBox(None)
+        if not bbox:
+            return None
+        return (bbox.Min.X, bbox.Min.Y, bbox.Min.Z, bbox.Max.X, bbox.Max.Y, bbox.Max.Z)
+    return load
+
+
+def pad_box(box, ratio=0.1):
+    """Grow a box by ratio of its extent on each side"""
+    dx = (box[MAX_X] - box[MIN_X]) * ratio
+    dy = (box[MAX_Y] - box[MIN_Y]) * ratio
+    dz = (box[MAX_Z] - box[MIN_Z]) * ratio
+    return (box[MIN_X] - dx, box[MIN_Y] - dy, box[MIN_Z] - dz,
+            box[MAX_X] + dx, box[MAX_Y] + dy, box[MAX_Z] + dz)
+
+
+# Median absolute deviation -> standard deviation of a normal distribution
+MAD_SCALE = 1.4826
+
+
+def _median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) * 0.5
+
+
+def _box_union(boxes):
+    """Union of an (n, 6) NumPy array or a flat array('d') of boxes, None when empty"""
+    if len(boxes) == 0:
+        return None
+    if np is not None and not isinstance(boxes, array):
+        mins = boxes[:, :3].min(axis=0)
+        maxs = boxes[:, 3:].max(axis=0)
+        return tuple(float(v) for v in mins) + tuple(float(v) for v in maxs)
+
+    # Strided slices of the flat array are one column each - min/max run in C
+    return (min(boxes[MIN_X::6]), min(boxes[MIN_Y::6]), min(boxes[MIN_Z::6]),
+            max(boxes[MAX_X::6]), max(boxes[MAX_Y::6]), max(boxes[MAX_Z::6]))
+
+
+class BoundingBoxCache(object):
+    """Session cache of element bounding boxes with vectorized unions
+
+    loader(element_id) returns a 6-tuple or None; element ids may be Revit ElementIds or ints.
+    """
+
+    def __init__(self, loader, key=None):
+        self.loader = loader
+        self.key = key or (lambda element_id: getattr(element_id, 'IntegerValue', element_id))
+        self._slots = {}  # key -> slot index, -1 when the element has no box
+        self._data = array('d')
+        self.loaded = 0
+
+    def __len__(self):
+        return len(self._data) // 6
+
+    def slot(self, element_id):
+        key = self.key(element_id)
+        slot = self._slots.get(key)
+        if slot is None:
+            box = None
+            try:
+                box = self.loader(element_id)
+            except Exception:
+                pass
+            self.loaded += 1
+            if box is None:
+                slot = -1
+            else:
+                slot = len(self._data) // 6
+                self._data.extend(box)
+            self._slots[key] = slot
+        return slot
+
+    def slots(self, element_ids):
+        """Unique slot indexes of all ids that have a box"""
+        seen = set()
+        result = []
+        for element_id in element_ids:
+            slot = self.slot(element_id)
+            if slot >= 0 and slot not in seen:
+                seen.add(slot)
+                result.append(slot)
+        return result
+
+    def box(self, element_id):
+        slot = self.slot(element_id)
+        if slot < 0:
+            return None
+        return tuple(self._data[slot * 6:slot * 6 + 6])
+
+    def boxes(self, element_ids):
+        """(n, 6) NumPy array when available, otherwise a flat array('d') of 6 * n values"""
+        slots = self.slots(element_ids)
+        if np is not None:
+            return np.frombuffer(self._data, dtype=np.float64).reshape(-1, 6)[slots]
+        data = self._data
+        flat = array('d')
+        for slot in slots:
+            flat.extend(data[slot * 6:slot * 6 + 6])
+        return flat
+
+    def union(self, element_ids):
+        """Box enclosing all elements, or None if none of them has a box"""
+        return _box_union(self.boxes(element_ids))
+
+    def trimmed_union(self, element_ids, threshold=3.5):
+        """Outlier-robust box: the full union of all elements except stray ones
+
+        An element is stray when its centre lies further from the median centre than the
+        median distance plus threshold robust deviations (MAD of the distances, but at least
+        the median element diagonal, so a tight crowd does not reject its own neighbours).
+        """
+        boxes = self.boxes(element_ids)
+        if len(boxes) == 0:
+            return None
+        if np is not None:
+            centres = (boxes[:, :3] + boxes[:, 3:]) * 0.5
+            distances = np.sqrt(((centres - np.median(centres, axis=0)) ** 2).sum(axis=1))
+            diagonals = np.sqrt(((boxes[:, 3:] - boxes[:, :3]) ** 2).sum(axis=1))
+            typical = float(np.median(distances))
+            spread = max(MAD_SCALE * float(np.median(np.abs(distances - typical))), float(np.median(diagonals)))
+            return _box_union(boxes[distances <= typical + threshold * spread])
+
+        count = len(boxes) // 6
+        centres = [[(boxes[i * 6 + axis] + boxes[i * 6 + axis + 3]) * 0.5 for i in range(count)]
+                   for axis in (MIN_X, MIN_Y, MIN_Z)]
+        median_centre = [_median(values) for values in centres]
+        distances = [math.sqrt(sum((centres[axis][i] - median_centre[axis]) ** 2 for axis in range(3)))
+                     for i in range(count)]
+        diagonals = [math.sqrt(sum((boxes[i * 6 + axis + 3] - boxes[i * 6 + axis]) ** 2 for axis in range(3)))
+                     for i in range(count)]
+        typical = _median(distances)
+        spread = max(MAD_SCALE * _median([abs(d - typical) for d in distances]), _median(diagonals))
+        limit = typical + threshold * spread
+        kept = array('d')
+        for i in range(count):
+            if distances[i] <= limit:
+                kept.extend(boxes[i * 6:i * 6 + 6])
+        return _box_union(kept)
+
+    def centroids(self, element_ids):
+        """(ids, xs, ys, zs): box centres as parallel array('d')s for the ids that have a box"""
+        ids, xs, ys, zs = [], array('d'), array('d'), array('d')
+        data = self._data
+        seen = set()
+        for element_id in element_ids:
+            slot = self.slot(element_id)
+            if slot < 0 or slot in seen:
+                continue
+            seen.add(slot)
+            offset = slot * 6
+            ids.append(element_id)
+            xs.append((data[offset + MIN_X] + data[offset + MAX_X]) * 0.5)
+            ys.append((data[offset + MIN_Y] + data[offset + MAX_Y]) * 0.5)
+            zs.append((data[offset + MIN_Z] + data[offset + MAX_Z]) * 0.5)
+        return ids, xs, ys, zs
+
+    def clusters(self, element_ids, max_clusters=8, cell_size=None, method='grid'):
+        """Split a selection into compact spatial clusters of element ids, largest first
+
+        Elements without a bounding box are not part of any cluster.
+        """
+        ids, xs, ys, zs = self.centroids(element_ids)
+        if not ids:
+            return []
+        if method == 'kmeans':
+            groups = kmeans_clusters(xs, ys, zs, max_clusters)
+        else:
+            groups = grid_clusters(xs, ys, zs, cell_size=cell_size, max_clusters=max_clusters)
+        return [[ids[index] for index in group] for group in groups]
+
+
+# Neighbour offsets of a cell in a 3D grid (including the cell itself)
+_NEIGHBOURS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+
+def _grid_components(xs, ys, zs, cell_size):
+    """Connected components of occupied grid cells - linear in the number of points"""
+    cells = {}
+    inverse = 1.0 / cell_size
+    for index in range(len(xs)):
+        key = (int(math.floor(xs[index] * inverse)),
+               int(math.floor(ys[index] * inverse)),
+               int(math.floor(zs[index] * inverse)))
+        members = cells.get(key)
+        if members is None:
+            cells[key] = [index]
+        else:
+            members.append(index)
+
+    components = []
+    visited = set()
+    for start in cells:
+        if start in visited:
+            continue
+        visited.add(start)
+        stack = [start]
+        members = []
+        while stack:
+            cx, cy, cz = stack.pop()
+            members.extend(cells[(cx, cy, cz)])
+            for dx, dy, dz in _NEIGHBOURS:
+                neighbour = (cx + dx, cy + dy, cz + dz)
+                if neighbour in cells and neighbour not in visited:
+                    visited.add(neighbour)
+                    stack.append(neighbour)
+        components.append(members)
+    return components
+
+
+def _robust_extent(values):
+    """Spread of the middle 90 % of the values - a few stray points do not widen it"""
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return ordered[int(last * 0.95)] - ordered[int(last * 0.05)]
+
+
+def grid_clusters(xs, ys, zs, cell_size=None, max_clusters=8, min_share=0.01):
+    """Grid-hash clustering of points given as parallel coordinate arrays
+
+    Points in touching cells belong to the same cluster. Without a cell_size, the largest
+    robust extent is split into about the cube root of the point count (2 to 64 cells), so
+    a few stray points cannot coarsen the grid. The cell size is doubled until at most
+    max_clusters clusters hold min_share of the points or more; stray points in smaller
+    clusters then join the cluster with the nearest centre. Returns lists of point
+    indexes, largest cluster first.
+    """
+    count = len(xs)
+    if count == 0:
+        return []
+    if cell_size is None:
+        extent = max(_robust_extent(xs), _robust_extent(ys), _robust_extent(zs))
+        cell_size = extent / min(64, max(2, int(round(count ** (1.0 / 3)))))
+    cell_size = max(cell_size, 1e-6)
+    minimum = max(1, int(count * min_share))
+
+    while True:
+        components = _grid_components(xs, ys, zs, cell_size)
+        major = [members for members in components if len(members) >= minimum]
+        if major and len(major) <= max_clusters:
+            break
+        cell_size *= 2.0
+
+    if len(major) < len(components):
+        centres = []
+        for members in major:
+            size = float(len(members))
+            centres.append((sum(xs[i] for i in members) / size,
+                            sum(ys[i] for i in members) / size,
+                            sum(zs[i] for i in members) / size))
+        for members in components:
+            if len(members) >= minimum:
+                continue
+            for index in members:
+                x, y, z = xs[index], ys[index], zs[index]
+                nearest = min(range(len(centres)), key=lambda c: (x - centres[c][0]) ** 2 +
+                              (y - centres[c][1]) ** 2 + (z - centres[c][2]) ** 2)
+                major[nearest].append(index)
+
+    major.sort(key=len, reverse=True)
+    return major
+
+
+def kmeans_clusters(xs, ys, zs, k, iterations=20):
+    """Plain k-means over parallel coordinate arrays (NumPy when available)
+
+    Initial centres are spread over the points in input order. Returns lists of point
+    indexes, largest cluster first; empty clusters are dropped.
+    """
+    count = len(xs)
+    if count == 0:
+        return []
+    k = max(1, min(k, count))
+    seeds = [int(i * count / k) for i in range(k)]
+
+    if np is not None:
+        points = np.column_stack((np.asarray(xs), np.asarray(ys), np.asarray(zs)))
+        centres = points[seeds].copy()
+        labels = None
+        for _ in range(iterations):
+            distances = ((points[:, None, :] - centres[None, :, :]) ** 2).sum(axis=2)
+            new_labels = distances.argmin(axis=1)
+            if labels is not None and (new_labels == labels).all():
+                break
+            labels = new_labels
+            for cluster in range(k):
+                mask = labels == cluster
+                if mask.any():
+                    centres[cluster] = points[mask].mean(axis=0)
+        groups = [list(np.nonzero(labels == cluster)[0]) for cluster in range(k)]
+    else:
+        centres = [[xs[i], ys[i], zs[i]] for i in seeds]
+        labels = [0] * count
+        for _ in range(iterations):
+            changed = False
+            sums = [[0.0, 0.0, 0.0, 0] for _ in range(k)]
+            for index in range(count):
+                x, y, z = xs[index], ys[index], zs[index]
+                best, best_distance = 0, None
+                for cluster, (cx, cy, cz) in enumerate(centres):
+                    distance = (x - cx) ** 2 + (y - cy) ** 2 + (z - cz) ** 2
+                    if best_distance is None or distance < best_distance:
+                        best, best_distance = cluster, distance
+                if labels[index] != best:
+                    labels[index] = best
+                    changed = True
+                total = sums[best]
+                total[0] += x
+                total[1] += y
+                total[2] += z
+                total[3] += 1
+            for cluster, total in enumerate(sums):
+                if total[3]:
+                    centres[cluster] = [total[0] / total[3], total[1] / total[3], total[2] / total[3]]
+            if not changed:
+                break
+        groups = [[] for _ in range(k)]
+        for index, cluster in enumerate(labels):
+            groups[cluster].append(index)
+
+    groups = [[int(index) for index in group] for group in groups if len(group)]
+    groups.sort(key=len, reverse=True)
+    return groups
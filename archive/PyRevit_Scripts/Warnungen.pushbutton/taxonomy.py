@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Warning taxonomy for the Enhanced Warnings Browser
+Maps Revit warning texts (English and German UI) to a warning type, a severity and a
+suggested fix. The rule catalog is compiled once into a single regular expression and
+every unique message text is classified once; results are cached on disk across sessions.
+No clr imports.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+
+# Severity rank -> label; lower rank = more urgent
+SEVERITIES = {
+    1: "Kritisch",
+    2: "Hoch",
+    3: "Mittel",
+    4: "Niedrig"
+}
+CRITICAL, HIGH, MEDIUM, LOW = 1, 2, 3, 4
+
+# (pattern, warning type, severity, suggested fix) - first matching rule wins.
+# Patterns are matched against the lower-cased message; use only non-capturing groups.
+RULES = [
+    (r"identical instances in the same place|identische exemplare",
+     "Duplikate", HIGH, "Doppelte Exemplare löschen"),
+    (r"rebar is placed completely outside|bewehrung .*vollständig außerhalb",
+     "Tragwerk", CRITICAL, "Bewehrung in das Wirtsbauteil verschieben oder löschen"),
+    (r"room is not in a properly enclosed region|raum .*nicht in einem .*umschlossenen bereich",
+     "Räume", HIGH, "Raumbegrenzung schließen oder Raum löschen"),
+    (r"multiple rooms are in the same enclosed region|mehrere räume .*im selben umschlossenen bereich",
+     "Räume", HIGH, "Überzählige Räume löschen oder Raumtrennlinien ergänzen"),
+    (r"area is not in a properly enclosed region|fläche .*nicht in einem .*umschlossenen bereich",
+     "Flächen", MEDIUM, "Flächenbegrenzung schließen oder Fläche löschen"),
+    (r"room separation line.*overlap|raumtrennlinien .*überlappen",
+     "Räume", MEDIUM, "Doppelte Raumtrennlinien löschen"),
+    (r"room tag is outside of its room|raumbeschriftung .*außerhalb",
+     "Beschriftung", LOW, "Raumbeschriftung in den Raum verschieben"),
+    (r"walls overlap|wände überlappen",
+     "Geometrie", MEDIUM, "Wände kürzen oder eine der Wände löschen"),
+    (r"floors overlap|geschossdecken überlappen|böden überlappen",
+     "Geometrie", MEDIUM, "Decken anpassen oder eine der Decken löschen"),
+    (r"joined but do not intersect|verbunden, .*überschneiden sich (?:aber )?nicht",
+     "Geometrie", LOW, "Verbindung der Elemente aufheben"),
+    (r"can't cut instance out of its host|exemplar kann nicht aus .*wirt",
+     "Geometrie", MEDIUM, "Exemplar oder Wirtsbauteil verschieben"),
+    (r"slightly off axis|geringfügig außerhalb der achse|leicht von der achse",
+     "Genauigkeit", LOW, "Element exakt auf die Achse ausrichten"),
+    (r"duplicate .*(?:mark|kennzeichen)|doppelte .*(?:mark|kennzeichen)",
+     "Daten", MEDIUM, "Eindeutige Kennzeichen vergeben"),
+    (r"does not lie on host face|liegt nicht auf .*fläche des wirts",
+     "Hosting", MEDIUM, "Exemplar neu auf der Wirtsfläche platzieren"),
+    (r"open connector|offene anschlüsse|not connected|nicht verbunden",
+     "TGA", MEDIUM, "Anschlüsse verbinden oder Endkappen setzen"),
+    (r"stair|treppe|railing|geländer",
+     "Treppen/Geländer", MEDIUM, "Treppen- bzw. Geländerpfad prüfen"),
+    (r"beam|brace|träger|stütze|column|structural|tragwerk",
+     "Tragwerk", HIGH, "Tragwerkselemente und Verbindungen prüfen"),
+    (r"too short|zu kurz|very small|sehr klein",
+     "Geometrie", LOW, "Sehr kleine Elemente entfernen oder verlängern"),
+]
+
+UNCLASSIFIED = ("Sonstige", MEDIUM, "")
+
+_WHITESPACE = re.compile(r"\s+", re.UNICODE)
+
+
+def normalize_message(message):
+    """Cache key for a message: lower case, collapsed whitespace"""
+    return _WHITESPACE.sub(u" ", (message or u"").strip().lower())
+
+
+class Classification(object):
+    """Result of classifying one message text"""
+    __slots__ = ('rule', 'warning_type', 'severity', 'fix')
+
+    def __init__(self, rule, warning_type, severity, fix):
+        self.rule = rule
+        self.warning_type = warning_type
+        self.severity = severity
+        self.fix = fix
+
+    @property
+    def severity_label(self):
+        return SEVERITIES.get(self.severity, "")
+
+
+class WarningClassifier(object):
+    """Single-regex classifier over a rule catalog, memoized per unique message text"""
+
+    def __init__(self, rules=None, cache_path=None):
+        self.rules = list(rules if rules is not None else RULES)
+        self.cache_path = cache_path
+        self.catalog_hash = self._catalog_hash()
+        # Each alternative is anchored and scans lazily, so at position 0 the rules are tried
+        # in catalog order and the first matching rule wins regardless of match position
+        self._matcher = re.compile(
+            u"^(?:{})".format(u"|".join(
+                u"(?P<r{}>.*?(?:{}))".format(index, rule[0]) for index, rule in enumerate(self.rules))),
+            re.IGNORECASE | re.DOTALL | re.UNICODE)
+        self._classifications = [Classification(index, rule[1], rule[2], rule[3])
+                                 for index, rule in enumerate(self.rules)]
+        self._unclassified = Classification(-1, UNCLASSIFIED[0], UNCLASSIFIED[1], UNCLASSIFIED[2])
+        self._results = {}  # normalized message -> rule index, -1 for unclassified
+        self._dirty = False
+        self.lookups = 0
+        self.matches = 0
+        if cache_path:
+            self.load()
+
+    def _catalog_hash(self):
+        text = json.dumps([list(rule) for rule in self.rules], ensure_ascii=False, sort_keys=True)
+        if not isinstance(text, bytes):
+            text = text.encode('utf-8')
+        return hashlib.sha1(text).hexdigest()
+
+    def rule_index(self, message):
+        key = normalize_message(message)
+        self.lookups += 1
+        rule_index = self._results.get(key)
+        if rule_index is None:
+            self.matches += 1
+            match = self._matcher.match(key)
+            rule_index = int(match.lastgroup[1:]) if match else -1
+            self._results[key] = rule_index
+            self._dirty = True
+        return rule_index
+
+    def classify(self, message):
+        rule_index = self.rule_index(message)
+        return self._classifications[rule_index] if rule_index >= 0 else self._unclassified
+
+    def load(self):
+        """Read cached results - ignored if the catalog changed since they were written"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with io.open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('catalog') == self.catalog_hash:
+                self._results.update(data.get('results', {}))
+        except (IOError, OSError, ValueError):
+            pass
+
+    def save(self):
+        """Write cached results if anything new was classified"""
+        if not self.cache_path or not self._dirty:
+            return
+        folder = os.path.dirname(self.cache_path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        text = json.dumps({'catalog': self.catalog_hash, 'results': self._results}, ensure_ascii=False)
+        if not isinstance(text, type(u"")):
+            text = text.decode('utf-8')
+        with io.open(self.cache_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self._dirty = False
+
+
+def default_cache_path():
+    root = os.environ.get('APPDATA') or os.path.expanduser('~')
+    return os.path.join(root, 'BIMKraft', 'warning_taxonomy_cache.json')
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight phase tracing for the Enhanced Warnings Browser
+Nested spans with counts and durations per phase and per Revit API call category, exported
+as Chrome trace-event JSON (chrome://tracing, Perfetto) and as a summary table.
+Disabled by default: span() then returns one shared no-op context manager, so instrumented
+code pays a method call and nothing else.
+No clr imports.
+"""
+
+import io
+import json
+import os
+import time
+
+# Python 2 has no perf_counter; IronPython's time.clock is backed by a Stopwatch, while
+# time.time only ticks every few milliseconds on Windows
+_clock = getattr(time, 'perf_counter', None) or getattr(time, 'clock', time.time)
+
+# Categories used by the browser
+PHASE = 'phase'
+API = 'revit-api'
+WPF = 'wpf'
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ('tracer', 'name', 'category', 'start', 'depth')
+
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        tracer = self.tracer
+        self.depth = tracer._depth
+        tracer._depth += 1
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = _clock()
+        tracer = self.tracer
+        tracer._depth -= 1
+        tracer._record(self.name, self.category, self.start, end - self.start, self.depth)
+        return False
+
+
+class Tracer(object):
+    """Collects spans while enabled; aggregated stats are always kept, individual trace
+    events only up to max_events (high-frequency API spans would flood the trace)"""
+
+    def __init__(self, enabled=False, max_events=100000):
+        self.enabled = enabled
+        self.max_events = max_events
+        self.reset()
+
+    def reset(self):
+        self.origin = _clock()
+        self.events = []  # (name, category, start, duration, depth)
+        self.dropped = 0
+        self.stats = {}  # (category, name) -> [count, total, max, depth, first start]
+        self.counters = {}
+        self._depth = 0
+
+    def enable(self, enabled=True):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def span(self, name, category=PHASE):
+        """Context manager timing one nested span"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category)
+
+    def api(self, name):
+        """Span for one Revit API call category (GetElement, collectors, overrides, ...)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, API)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def traced(self, name=None, category=PHASE):
+        """Decorator: run the function inside a span"""
+        def decorate(func):
+            span_name = name or func.__name__
+
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, span_name, category):
+                    return func(*args, **kwargs)
+            wrapper.__name__ = func.__name__
+            wrapper.__doc__ = func.__doc__
+            return wrapper
+        return decorate
+
+    def _record(self, name, category, start, duration, depth):
+        key = (category, name)
+        stat = self.stats.get(key)
+        if stat is None:
+            self.stats[key] = [1, duration, duration, depth, start]
+        else:
+            stat[0] += 1
+            stat[1] += duration
+            if duration > stat[2]:
+                stat[2] = duration
+            if depth < stat[3]:
+                stat[3] = depth
+        if len(self.events) < self.max_events:
+            self.events.append((name, category, start, duration, depth))
+        else:
+            self.dropped += 1
+
+    def summary_rows(self):
+        """[name, category, count, total ms, avg ms, max ms] in order of first start,
+        names indented by nesting depth"""
+        rows = []
+        for (category, name), (count, total, longest, depth, _) in sorted(
+                self.stats.items(), key=lambda item: item[1][4]):
+            rows.append([u"  " * depth + name, category, count,
+                         round(total * 1000.0, 2), round(total * 1000.0 / count, 3), round(longest * 1000.0, 2)])
+        for name, amount in sorted(self.counters.items()):
+            rows.append([name, 'counter', amount, '', '', ''])
+        return rows
+
+    def format_summary(self):
+        lines = [u"{:<40} {:<10} {:>8} {:>12} {:>10} {:>10}".format(
+            "Span", "Kategorie", "Anzahl", "Summe ms", "Mittel ms", "Max ms")]
+        for row in self.summary_rows():
+            lines.append(u"{:<40} {:<10} {:>8} {:>12} {:>10} {:>10}".format(*row))
+        return u"\n".join(lines)
+
+    def chrome_trace(self):
+        """Trace-event format: one complete ('X') event per span, times in microseconds"""
+        pid = os.getpid()
+        events = [{
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - self.origin) * 1e6, 1),
+            'dur': round(duration * 1e6, 1),
+            'pid': pid,
+            'tid': 1,
+            'args': {'depth': depth}
+        } for name, category, start, duration, depth in self.events]
+        for name, amount in self.counters.items():
+            events.append({'name': name, 'ph': 'C', 'ts': 0, 'pid': pid, 'tid': 1, 'args': {name: amount}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'dropped_events': self.dropped}}
+
+    def write_chrome_trace(self, file_path):
+        folder = os.path.dirname(file_path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        text = json.dumps(self.chrome_trace(), ensure_ascii=False, separators=(',', ':'))
+        if not isinstance(text, type(u"")):
+            text = text.decode('utf-8')
+        with io.open(file_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return file_path
+
+
+def default_trace_dir():
+    root = os.environ.get('APPDATA') or os.path.expanduser('~')
+    return os.path.join(root, 'BIMKraft', 'Traces')
+
+
+# Shared by all modules of the browser; enabled by script.py on request
+TRACER = Tracer()
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+View lookup indexes for the Enhanced Warnings Browser
+Answers "which views show element X" with one view-scoped collector per view instead of
+calling IsHidden / GetCategoryHidden for every element in every view
+"""
+
+import re
+
+from Autodesk.Revit.DB import FilteredElementCollector, ElementMulticategoryFilter, ElementId
+from System.Collections.Generic import List
+
+from warnings_data import element_id_value
+from tracing import TRACER
+
+
+class VisibilityIndex(object):
+    """Inverted element -> visible views index
+
+    prepare() runs one collector per candidate view, restricted to the categories of the
+    failing elements that are not hidden in that view and intersected with the elements
+    still looking for views, and records the first max_views views for every target
+    element. Revit does the matching, so the Python side only sees the target elements.
+    Elements without a category have no category to hide; a second collector per view,
+    without the category filter, finds them.
+    """
+
+    def __init__(self, doc, views, max_views=3, logger=None):
+        self.doc = doc
+        self.views = list(views)  # Preference order: floor plans first, then 3D views
+        self.max_views = max_views
+        self.logger = logger
+        self._views_by_element = {}
+        self._hidden_categories = {}
+        self._prepared = set()
+        self.collector_calls = 0
+
+    def hidden_categories(self, view, category_ids):
+        """Set of integer category ids hidden in a view - each category is checked once per view"""
+        key = element_id_value(view.Id)
+        states = self._hidden_categories.setdefault(key, {})
+        for cat_value, cat_id in category_ids.items():
+            if cat_value in states:
+                continue
+            try:
+                with TRACER.api("GetCategoryHidden"):
+                    states[cat_value] = bool(view.GetCategoryHidden(cat_id))
+            except:
+                states[cat_value] = False
+        return set(cat_value for cat_value, is_hidden in states.items() if is_hidden)
+
+    def prepare(self, elements):
+        """Resolve visible views for a batch of elements (dict: int id -> element)"""
+        for _ in self.prepare_steps(elements):
+            pass
+
+    def prepare_steps(self, elements):
+        """prepare() as a generator yielding (views done, views total) after every view,
+        so a caller on the UI thread can spread the collectors over idle time"""
+        targets = {}
+        category_ids = {}
+        uncategorized = set()  # Keys of elements without a category - no category to hide
+        for key, element in elements.items():
+            if element is None or key in self._prepared:
+                continue
+            targets[key] = element
+            # Reset - an earlier, interrupted run may have left partial results
+            self._views_by_element[key] = []
+            if element.Category:
+                category_ids[element_id_value(element.Category.Id)] = element.Category.Id
+            else:
+                uncategorized.add(key)
+
+        if not targets:
+            return
+
+        pending = set(targets)
+        total = len(self.views)
+        for done, view in enumerate(self.views):
+            if not pending:
+                break
+
+            visible_categories = []
+            if category_ids:
+                hidden = self.hidden_categories(view, category_ids)
+                visible_categories = [cat_id for cat_value, cat_id in category_ids.items()
+                                      if cat_value not in hidden]
+            categorized_ids = [targets[key].Id for key in pending if key not in uncategorized] \
+                if visible_categories else []
+            uncategorized_ids = [targets[key].Id for key in pending if key in uncategorized]
+            if not categorized_ids and not uncategorized_ids:
+                yield done + 1, total
+                continue
+
+            try:
+                visible_ids = []
+                with TRACER.api("FilteredElementCollector (view)"):
+                    if categorized_ids:
+                        self.collector_calls += 1
+                        visible_ids.extend(FilteredElementCollector(self.doc, view.Id)
+                                           .WherePasses(ElementMulticategoryFilter(List[ElementId](visible_categories)))
+                                           .IntersectWith(FilteredElementCollector(self.doc, List[ElementId](categorized_ids)))
+                                           .ToElementIds())
+                    if uncategorized_ids:
+                        self.collector_calls += 1
+                        visible_ids.extend(FilteredElementCollector(self.doc, view.Id)
+                                           .IntersectWith(FilteredElementCollector(self.doc, List[ElementId](uncategorized_ids)))
+                                           .ToElementIds())
+            except Exception as ex:
+                if self.logger:
+                    self.logger.debug("Skipping view {} in visibility index: {}".format(view.Name, str(ex)))
+                yield done + 1, total
+                continue
+
+            view_name = view.Name
+            for elem_id in visible_ids:
+                key = element_id_value(elem_id)
+                views = self._views_by_element[key]
+                views.append(view_name)
+                if len(views) >= self.max_views:
+                    pending.discard(key)
+            yield done + 1, total
+
+        self._prepared.update(targets)
+
+        if self.logger:
+            self.logger.debug("Visibility index: {} elements, {} views, {} collector calls".format(
+                len(targets), len(self.views), self.collector_calls))
+
+    def views_for(self, element, limit=None):
+        """Names of the first views (in preference order) that show the element"""
+        key = element_id_value(element.Id)
+        if key not in self._prepared:
+            self.prepare({key: element})
+        views = self._views_by_element.get(key, [])
+        if limit is None:
+            return list(views)
+        return views[:limit]
+
+    def first_view(self, element):
+        views = self.views_for(element, 1)
+        return views[0] if views else None
+
+    def __call__(self, element):
+        return self.views_for(element)
+
+    def resolve_many(self, elements):
+        """Batch entry point used by ElementInfoIndex.build"""
+        self.prepare(elements)
+        return dict((key, list(self._views_by_element.get(key, []))) for key in elements)
+
+
+_TOKEN_SPLIT = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def name_tokens(name):
+    """Normalized tokens of a level or view name - lower case, digits kept, other tokens >= 2 chars"""
+    tokens = []
+    for token in _TOKEN_SPLIT.split((name or u"").lower()):
+        if token and (len(token) >= 2 or token.isdigit()) and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+class ViewResolutionIndex(object):
+    """Level -> best floor plan lookup, built once per session
+
+    Preference order per level: exact view name, best token overlap between level and view
+    name (ties broken by GenLevel, then view order), GenLevel. The partial match differs
+    from the old scan, which took the first plan containing any level name part of two or
+    more characters as a case-sensitive substring: names are now compared as lower-cased
+    tokens (see name_tokens) and the plan sharing the most tokens wins, so "OG 3" prefers
+    "og 3 - OK FFB" over an earlier "OG 1 - OK FFB".
+    Each level is resolved once and memoized, so lookups are constant time.
+    """
+
+    def __init__(self, floor_plans, logger=None):
+        self.plans = [view for view in floor_plans if not view.IsTemplate]
+        self.logger = logger
+        self._by_name = {}
+        self._by_level = {}
+        self._by_token = {}
+        self._plan_levels = []
+        self._memo = {}
+
+        for position, view in enumerate(self.plans):
+            self._by_name.setdefault(view.Name, view)
+            level_value = None
+            try:
+                if view.GenLevel:
+                    level_value = element_id_value(view.GenLevel.Id)
+                    self._by_level.setdefault(level_value, []).append(view)
+            except:
+                pass
+            self._plan_levels.append(level_value)
+            for token in name_tokens(view.Name):
+                self._by_token.setdefault(token, []).append(position)
+
+    def plans_for_level(self, level_value):
+        return list(self._by_level.get(level_value, []))
+
+    def plan_for_level(self, level_value, level_name):
+        """Best floor plan for a level (memoized), None if nothing matches"""
+        key = (level_value, level_name)
+        if key not in self._memo:
+            self._memo[key] = self._resolve(level_value, level_name)
+        return self._memo[key]
+
+    def _resolve(self, level_value, level_name):
+        if level_name:
+            view = self._by_name.get(level_name)
+            if view is not None:
+                self._debug("Found exact match view: {}".format(view.Name))
+                return view
+
+            # e.g. "OG 3" -> "OG 3 - OK FFB": most shared tokens wins
+            scores = {}
+            for token in name_tokens(level_name):
+                for position in self._by_token.get(token, ()):
+                    scores[position] = scores.get(position, 0) + 1
+            if scores:
+                position = max(scores, key=lambda p: (
+                    scores[p], self._plan_levels[p] == level_value and level_value is not None, -p))
+                self._debug("Found partial match view: {} ({} shared tokens)".format(
+                    self.plans[position].Name, scores[position]))
+                return self.plans[position]
+
+        if level_value is not None and self._by_level.get(level_value):
+            view = self._by_level[level_value][0]
+            self._debug("Found view by level ID: {}".format(view.Name))
+            return view
+
+        return None
+
+    def best_plan(self, levels):
+        """Best plan for a set of element levels: iterable of (level id value, level name)
+
+        The level shared by most elements wins; the other levels are tried in order of
+        their element count if it has no matching plan.
+        """
+        counts = {}
+        for level in levels:
+            if level[0] is None and not level[1]:
+                continue
+            counts[level] = counts.get(level, 0) + 1
+
+        for level in sorted(counts, key=lambda lvl: counts[lvl], reverse=True):
+            view = self.plan_for_level(level[0], level[1])
+            if view is not None:
+                return view
+        return None
+
+    def _debug(self, message):
+        if self.logger:
+            self.logger.debug(message)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Memory-compact grid rows for the Enhanced Warnings Browser
+A row keeps its element ids in a packed integer array and a reference to the shared element
+info lookup; the joined display strings (names, levels, views, categories) are only
+formatted when the grid reads a cell. Repeated names, levels and categories are interned
+through a StringTable so all rows share one string object per distinct value.
+No clr imports - script.py adds the ElementId conversion on top.
+"""
+
+from array import array
+
+from message_templates import format_variables, format_variants
+
+try:
+    array('q')
+    ID_TYPECODE = 'q'
+except ValueError:
+    ID_TYPECODE = 'l'
+
+SEPARATOR = u"; "
+
+
+def pack_ids(values):
+    return array(ID_TYPECODE, values)
+
+
+def _unique_join(values):
+    """'; '-joined distinct values in first-seen order"""
+    seen = set()
+    ordered = []
+    for value in values:
+        if value not in seen:
+            seen.add(value)
+            ordered.append(value)
+    return SEPARATOR.join(ordered)
+
+
+class WarningRow(object):
+    """One group or occurrence row of the warnings grid
+
+    info_for(int id) returns the element info dict (see warnings_data.ElementInfoIndex.get);
+    pass the same callable to every row. Until it is set the element columns are empty.
+    """
+    __slots__ = ('Message', 'IsGroup', 'IsExpanded', 'Parent', '_ids', '_info_for',
+                 '_occurrence_total', '_children', '_child_factory', '_classification', '_variables')
+
+    def __init__(self, message, id_values, info_for=None, occurrence_count=1, is_group=True, parent_item=None):
+        self.Message = message
+        self.IsGroup = is_group
+        self.IsExpanded = False
+        self.Parent = parent_item  # Reference to parent group
+        self._ids = pack_ids(id_values)
+        self._info_for = info_for
+        self._occurrence_total = occurrence_count if is_group else 1
+        self._children = None  # Child rows, built on first expand
+        self._child_factory = None
+        self._classification = None
+        self._variables = None
+
+    # Element columns - formatted on demand
+
+    def _infos(self):
+        info_for = self._info_for
+        if info_for is None:
+            return []
+        return [info_for(value) for value in self._ids]
+
+    @property
+    def ElementCount(self):
+        return len(self._ids)
+
+    @property
+    def OccurrenceCount(self):
+        return self._occurrence_total if self.IsGroup else ""  # Only show for group rows
+
+    @property
+    def ElementIds(self):
+        return SEPARATOR.join([str(value) for value in self._ids])
+
+    @property
+    def ElementNames(self):
+        return SEPARATOR.join([info['name'] for info in self._infos()])
+
+    @property
+    def Levels(self):
+        return _unique_join(info['level'] for info in self._infos())
+
+    @property
+    def Views(self):
+        return _unique_join(view for info in self._infos() for view in info['views'])
+
+    @property
+    def Categories(self):
+        return _unique_join(info['category'] for info in self._infos())
+
+    @property
+    def ExpandSymbol(self):
+        if not self.HasChildren:
+            return ""
+        return "[-]" if self.IsExpanded else "[+]"
+
+    def SetElementInfo(self, info_for):
+        """Attach the element info lookup - rows can be shown first and enriched later"""
+        self._info_for = info_for
+
+    # Variable parts of template rows (see message_templates)
+
+    def SetVariables(self, variables):
+        """Distinct variable tuples on a template group row, one tuple on its occurrence rows"""
+        self._variables = variables
+
+    @property
+    def Variables(self):
+        if not self._variables:
+            return ""
+        return format_variants(self._variables) if self.IsGroup else format_variables(self._variables)
+
+    # Taxonomy columns - read from the shared classification object
+
+    def SetClassification(self, classification):
+        self._classification = classification
+
+    @property
+    def WarningType(self):
+        return self._classification.warning_type if self._classification else ""
+
+    @property
+    def Severity(self):
+        return self._classification.severity_label if self._classification else ""
+
+    @property
+    def SeverityRank(self):
+        return self._classification.severity if self._classification else 99
+
+    @property
+    def SuggestedFix(self):
+        return self._classification.fix if self._classification else ""
+
+    # Children
+
+    def SetChildFactory(self, child_factory):
+        """Register the callable that builds the child rows when the group is first expanded"""
+        self._child_factory = child_factory
+
+    @property
+    def HasChildren(self):
+        return self.IsGroup and self._occurrence_total > 1
+
+    @property
+    def ChildrenLoaded(self):
+        return self._children is not None
+
+    @property
+    def Children(self):
+        """Child rows - materialized once, then cached"""
+        if self._children is None:
+            if self.HasChildren and self._child_factory:
+                self._children = self._child_factory(self)
+            else:
+                self._children = []
+        return self._children
+
+    @property
+    def id_values(self):
+        return self._ids
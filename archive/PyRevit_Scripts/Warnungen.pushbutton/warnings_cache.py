@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of processed warnings for the Enhanced Warnings Browser
+Stores the warning grouping (message -> occurrences -> element ids) and the element info
+index per document, keyed by the document path and its version GUID / number of saves.
+No clr imports - the caller supplies the document identity.
+"""
+
+import hashlib
+import io
+import json
+import os
+
+# Bump when the cached info dicts change shape
+CACHE_FORMAT = 1
+
+
+def default_cache_dir():
+    root = os.environ.get('APPDATA') or os.path.expanduser('~')
+    return os.path.join(root, 'BIMKraft', 'WarningsCache')
+
+
+def document_identity(path, version_guid=None, number_of_saves=None, is_modified=False):
+    """Identity dict of a document state; version_guid / number_of_saves come from
+    Document.GetDocumentVersion, is_modified from Document.IsModified"""
+    return {
+        'path': path,
+        'version': version_guid,
+        'saves': number_of_saves,
+        'modified': bool(is_modified)
+    }
+
+
+def serialize_groups(warning_groups, id_value):
+    """[[message, [[element id, ...], ...]], ...] - the Revit warning objects are not kept"""
+    return [[message, [[id_value(eid) for eid in occurrence['element_ids']] for occurrence in occurrences]]
+            for message, occurrences in warning_groups.items()]
+
+
+def deserialize_groups(groups, make_id):
+    """Inverse of serialize_groups; make_id turns an int back into an element id"""
+    warning_groups = {}
+    unique_ids = {}
+    for message, occurrences in groups:
+        rows = []
+        for ids in occurrences:
+            element_ids = []
+            for value in ids:
+                elem_id = unique_ids.get(value)
+                if elem_id is None:
+                    elem_id = make_id(value)
+                    unique_ids[value] = elem_id
+                element_ids.append(elem_id)
+            rows.append({'element_ids': element_ids, 'warning': None})
+        warning_groups[message] = rows
+    return warning_groups, unique_ids
+
+
+class WarningsCache(object):
+    """One JSON file per document path"""
+
+    def __init__(self, folder=None, logger=None):
+        self.folder = folder or default_cache_dir()
+        self.logger = logger
+
+    def path_for(self, document_path):
+        digest = hashlib.sha1((document_path or u"").encode('utf-8')).hexdigest()
+        return os.path.join(self.folder, "{}.json".format(digest))
+
+    def load(self, identity):
+        """Returns (payload, exact) - exact when the cached document version matches and the
+        document has no unsaved changes; (None, False) if there is no usable cache file"""
+        file_path = self.path_for(identity['path'])
+        if not os.path.exists(file_path):
+            return None, False
+        try:
+            with io.open(file_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (IOError, OSError, ValueError) as ex:
+            if self.logger:
+                self.logger.debug("Ignoring unreadable warnings cache {}: {}".format(file_path, str(ex)))
+            return None, False
+
+        if payload.get('format') != CACHE_FORMAT or payload.get('identity', {}).get('path') != identity['path']:
+            return None, False
+
+        cached = payload['identity']
+        exact = (not identity['modified'] and identity['version'] is not None
+                 and cached.get('version') == identity['version']
+                 and cached.get('saves') == identity['saves'])
+        return payload, exact
+
+    def save(self, identity, groups, elements):
+        """groups from serialize_groups, elements: int id -> info dict"""
+        if identity['modified']:
+            # Unsaved changes are not described by the version marker - nothing to key on
+            return None
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+        payload = {
+            'format': CACHE_FORMAT,
+            'identity': identity,
+            'groups': groups,
+            'elements': dict((str(key), info) for key, info in elements.items())
+        }
+        text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+        if not isinstance(text, type(u"")):
+            text = text.decode('utf-8')
+        file_path = self.path_for(identity['path'])
+        temp_path = file_path + ".tmp"
+        with io.open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        os.rename(temp_path, file_path)
+        return file_path
+
+
+def cached_elements(payload, exclude=None):
+    """int id -> info dict from a cache payload, without the ids in exclude"""
+    exclude = exclude or ()
+    return dict((int(key), info) for key, info in payload.get('elements', {}).items()
+                if int(key) not in exclude)
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Warning data helpers for the Enhanced Warnings Browser
+Pure Python (no clr imports) so the grouping and element lookups can be reused outside the WPF window
+"""
+
+from tracing import TRACER
+
+INVALID_ID_VALUE = -1
+
+
+def element_id_value(element_id):
+    """Integer value of a Revit ElementId (or a plain int)"""
+    if isinstance(element_id, int):
+        return element_id
+    return element_id.IntegerValue
+
+
+class StringTable(object):
+    """Canonical string objects and integer codes for repeated values"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def intern(self, value):
+        """The shared instance equal to value"""
+        return self.values[self.code(value)]
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+
+# Info fields holding names that repeat across many elements
+INTERNED_FIELDS = ('name', 'level', 'category', 'family')
+
+
+def group_warnings(warnings):
+    """Group failure messages by description text
+
+    Returns (warning_groups, unique_ids) where warning_groups maps message -> list of
+    occurrences ({'element_ids': [...], 'warning': warning}) and unique_ids maps
+    integer id -> ElementId for every failing element seen.
+    """
+    warning_groups = {}
+    unique_ids = {}
+
+    for warning in warnings:
+        with TRACER.api("FailureMessage"):
+            message = warning.GetDescriptionText()
+            element_ids = list(warning.GetFailingElements())
+
+        if not element_ids:
+            continue
+
+        if message not in warning_groups:
+            warning_groups[message] = []
+
+        warning_groups[message].append({
+            'element_ids': element_ids,
+            'warning': warning
+        })
+
+        for elem_id in element_ids:
+            unique_ids[element_id_value(elem_id)] = elem_id
+
+    return warning_groups, unique_ids
+
+
+def read_element_info(doc, element_id, view_resolver=None):
+    """Read name, level, category and views of an element
+
+    Returns (element, info). view_resolver is called with the element and must
+    return a list of view names.
+    """
+    info = {
+        'name': 'Unknown',
+        'level': 'N/A',
+        'level_id': None,
+        'category': 'N/A',
+        'family': 'N/A',
+        'views': []
+    }
+
+    with TRACER.api("GetElement"):
+        element = doc.GetElement(element_id)
+    if not element:
+        return None, info
+
+    # Element name
+    if hasattr(element, 'Name') and element.Name:
+        info['name'] = element.Name
+    else:
+        info['name'] = "ID: {}".format(element_id_value(element_id))
+
+    # Level
+    level_id = getattr(element, 'LevelId', None)
+    if level_id is not None and element_id_value(level_id) != INVALID_ID_VALUE:
+        with TRACER.api("GetElement (Level)"):
+            level_elem = doc.GetElement(level_id)
+        if level_elem:
+            info['level'] = level_elem.Name
+            info['level_id'] = element_id_value(level_id)
+    elif hasattr(element, 'Level') and element.Level:
+        info['level'] = element.Level.Name
+        info['level_id'] = element_id_value(element.Level.Id)
+
+    # Category
+    if element.Category:
+        info['category'] = element.Category.Name
+
+    # Family - loadable families and system families both expose it on the type
+    type_id = element.GetTypeId() if hasattr(element, 'GetTypeId') else None
+    if type_id is not None and element_id_value(type_id) != INVALID_ID_VALUE:
+        with TRACER.api("GetElement (Type)"):
+            element_type = doc.GetElement(type_id)
+        family_name = getattr(element_type, 'FamilyName', None)
+        if family_name:
+            info['family'] = family_name
+
+    if view_resolver:
+        with TRACER.span("GetElementView"):
+            info['views'] = view_resolver(element) or []
+
+    return element, info
+
+
+class ElementInfoIndex(object):
+    """Per-load element info cache keyed by integer element id
+
+    Built once from the unique failing ids of a LoadWarnings run and shared by
+    group rows, child rows, the HTML export and highlighting. With defer_views set, ids
+    looked up before build() reached them are read without views; like the elements of
+    build(resolve_views=False) they wait in pending_views for a batched resolve_views().
+    """
+
+    def __init__(self, doc, view_resolver=None, logger=None, strings=None):
+        self.doc = doc
+        self.view_resolver = view_resolver
+        self.logger = logger
+        self.strings = strings if strings is not None else StringTable()
+        self.defer_views = False
+        self.pending_views = {}  # int id -> element loaded without views
+        self._info = {}
+        self._elements = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._info)
+
+    def __contains__(self, element_id):
+        return element_id_value(element_id) in self._info
+
+    def build(self, element_ids, resolve_views=True):
+        """Resolve every id once - element_ids should already be unique
+
+        If the view resolver offers resolve_many (see view_index.VisibilityIndex) the views
+        of all elements are resolved in one batch instead of per element. With
+        resolve_views=False the views are left for a later resolve_views() call.
+        Returns the newly loaded elements (int id -> element).
+        """
+        batch_views = hasattr(self.view_resolver, 'resolve_many')
+        loaded = {}
+        with TRACER.span("GetElementInfo"):
+            for elem_id in element_ids:
+                key = element_id_value(elem_id)
+                if key not in self._info:
+                    self._load(key, elem_id, with_views=resolve_views and not batch_views)
+                    loaded[key] = self._elements[key]
+
+        if resolve_views and batch_views and loaded:
+            self.resolve_views(loaded)
+        return loaded
+
+    def resolve_views(self, elements):
+        """Fill the views of already loaded elements (int id -> element) in one batch"""
+        try:
+            with TRACER.span("GetElementView"):
+                views_by_key = self.view_resolver.resolve_many(elements)
+        except Exception as ex:
+            views_by_key = {}
+            if self.logger:
+                self.logger.error("Error resolving element views: {}".format(str(ex)))
+        for key, views in views_by_key.items():
+            if key in self._info:
+                self._info[key]['views'] = [self.strings.intern(view) for view in views]
+        for key in elements:
+            self.pending_views.pop(key, None)
+
+    def seed(self, infos):
+        """Adopt info dicts from an earlier run (int id -> info); build() skips these ids and
+        their elements are only looked up when element() is asked for them"""
+        for key, info in infos.items():
+            self._info[key] = self._intern(info)
+
+    def _load(self, key, element_id, with_views=True):
+        try:
+            element, info = read_element_info(
+                self.doc, element_id, self.view_resolver if with_views else None)
+        except Exception as ex:
+            element, info = None, {'name': 'Unknown', 'level': 'N/A', 'level_id': None,
+                                   'category': 'N/A', 'family': 'N/A', 'views': []}
+            if self.logger:
+                self.logger.error("Error getting element info for {}: {}".format(key, str(ex)))
+        self._info[key] = self._intern(info)
+        self._elements[key] = element
+        if not with_views and element is not None and self.view_resolver is not None:
+            self.pending_views[key] = element
+        return info
+
+    def _intern(self, info):
+        """Share one string object per distinct name, level, category, family and view"""
+        intern = self.strings.intern
+        for field in INTERNED_FIELDS:
+            value = info.get(field)
+            if value is not None:
+                info[field] = intern(value)
+        if info.get('views'):
+            info['views'] = [intern(view) for view in info['views']]
+        return info
+
+    def get(self, element_id):
+        """Info dict for an element, resolved on first access"""
+        key = element_id_value(element_id)
+        info = self._info.get(key)
+        if info is not None:
+            self.hits += 1
+            return info
+        self.misses += 1
+        return self._load(key, element_id, with_views=not self.defer_views)
+
+    def infos(self, element_ids):
+        """Info dicts for a list of element ids, in order"""
+        return [self.get(elem_id) for elem_id in element_ids]
+
+    def element(self, element_id):
+        """Cached Revit element (None if it could not be resolved)"""
+        key = element_id_value(element_id)
+        if key not in self._elements:
+            self.misses += 1
+            if key in self._info:
+                self._elements[key] = self.doc.GetElement(element_id)
+            else:
+                self._load(key, element_id, with_views=not self.defer_views)
+        else:
+            self.hits += 1
+        return self._elements[key]
+
+    def stats(self):
+        return {'entries': len(self._info), 'hits': self.hits, 'misses': self.misses}
+
+    def log_stats(self, label="Element info index"):
+        if self.logger:
+            self.logger.debug("{}: {} entries, {} hits, {} misses".format(
+                label, len(self._info), self.hits, self.misses))